@@ -13,6 +13,7 @@ import subprocess
 import sys
 import time
 import threading
+import click
 
 # Railway compatibility - add backend directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -107,9 +108,9 @@ jwt.init_app(app)
 # Import models after extensions initialization
 # Import models with Railway compatibility
 try:
-    from models import User, PrayerTime, RamadanArrangement, Bookmark, UserPreference
+    from models import User, PrayerTime, RamadanArrangement, Bookmark, UserPreference, QuranSurah, QuranAyah, QuranWord, ReadingProgress, HadithRecord, HadithBook, HadithRelated
 except ImportError:
-    from backend.models import User, PrayerTime, RamadanArrangement, Bookmark, UserPreference
+    from backend.models import User, PrayerTime, RamadanArrangement, Bookmark, UserPreference, QuranSurah, QuranAyah, QuranWord, ReadingProgress, HadithRecord, HadithBook, HadithRelated
 
 # Import routes with Railway compatibility and debugging
 try:
@@ -146,6 +147,15 @@ app.register_blueprint(arrangements_bp, url_prefix='/api/arrangements')
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
 print("✅ All blueprints registered successfully")
 
+# create_all() never alters existing tables, so add new columns and indexes on startup;
+# rows that block a unique index are only cleaned up by `flask upgrade-db`
+try:
+    from services.schema import upgrade_schema
+    with app.app_context():
+        upgrade_schema()
+except Exception as e:
+    print(f"⚠️ Schema upgrade skipped: {e}")
+
 # Static file serving for production (Railway)
 @app.route('/', methods=['GET'])
 def serve_frontend():
@@ -254,11 +264,14 @@ def serve_static(filename):
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    from services.upstream import upstream
+
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if upstream.is_degraded else 'healthy',
         'message': 'Qareeb Islamic Companion Backend is running',
         'timestamp': datetime.utcnow().isoformat(),
-        'environment': 'railway' if os.environ.get('RAILWAY_ENVIRONMENT') else 'development'
+        'environment': 'railway' if os.environ.get('RAILWAY_ENVIRONMENT') else 'development',
+        'upstreams': upstream.snapshot()
     })
 
 @app.route('/api/debug/routes', methods=['GET'])
@@ -333,12 +346,10 @@ def dashboard():
     """Dashboard data with prayer times and Islamic calendar"""
     current_user = get_jwt_identity()
 
-    # Get current prayer times (mock data)
+    # Today's prayer times
+    from services.prayer_calc import prayer_times as calculate_prayer_times, CITY_COORDINATES
     prayer_times = {
-        'Delhi': {
-            'Fajr': '04:25', 'Dhuhr': '12:10', 'Asr': '15:45', 
-            'Maghrib': '18:30', 'Isha': '20:00', 'Sunrise': '06:15'
-        }
+        'Delhi': calculate_prayer_times(*CITY_COORDINATES['Delhi'])
     }
 
     # Islamic calendar events
@@ -384,6 +395,8 @@ def create_tables():
             # Force create all tables
             print("🗄️ Creating database tables...")
             db.create_all()
+            from services.schema import upgrade_schema
+            upgrade_schema()
             print("✅ Database tables created successfully!")
 
             # Create default admin user
@@ -422,6 +435,60 @@ def create_tables():
         db.session.rollback()
         raise e
 
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables, add new columns and indexes, and clean up rows that block them"""
+    from services.schema import upgrade_schema
+
+    print("🗄️ Upgrading database schema...")
+    db.create_all()
+    changes = upgrade_schema(cleanup=True)
+    print(f"✅ Schema up to date ({len(changes)} changes)")
+
+@app.cli.command('import-quran')
+@click.option('--translation', default=20, show_default=True, help='Quran.com translation id to store')
+def import_quran_command(translation):
+    """Import all surahs and ayahs into the local Quran store"""
+    from services.quran_store import import_corpus
+
+    print("📖 Importing Quran corpus from Quran.com...")
+    db.create_all()
+    total = import_corpus(translation_id=translation)
+    print(f"✅ Imported {total} ayahs")
+
+@app.cli.command('import-hadith')
+@click.option('--collection', '-c', 'collections', multiple=True, help='Collection to import (repeatable, default: all)')
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), help='JSON export to load instead of sunnah.com')
+def import_hadith_command(collections, path):
+    """Import hadith collections into the local corpus and search index"""
+    from services.hadith_store import import_hadith
+    from services.hadith_related import build_related_index
+
+    print("📚 Importing hadith collections...")
+    db.create_all()
+    try:
+        total = import_hadith(list(collections) or None, api_key=app.config.get('SUNNAH_API_KEY'), path=path)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
+    build_related_index()
+    print(f"✅ Imported {total} hadith")
+
+@app.cli.command('generate-prayer-times')
+@click.option('--year', '-y', 'years', type=int, multiple=True, help='Year to generate (repeatable, default: this year)')
+@click.option('--method', '-m', 'methods', multiple=True, help='Calculation method (repeatable, default: all)')
+def generate_prayer_times_command(years, methods):
+    """Precompute yearly prayer timetables for every supported city"""
+    from services.prayer_calc import METHODS
+    from services.prayer_store import generate_timetables
+
+    unknown = [method for method in methods if method not in METHODS]
+    if unknown:
+        raise click.UsageError(f"Unknown method {', '.join(unknown)}; choose from {', '.join(METHODS)}")
+    print("🕌 Generating prayer timetables...")
+    db.create_all()
+    total = generate_timetables(list(years) or [datetime.utcnow().year], methods=list(methods) or None)
+    print(f"✅ Stored {total} daily timetables")
+
 def start_frontend_server():
     """Start the React frontend development server"""
     try:
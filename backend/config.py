@@ -56,10 +56,16 @@ class Config:
     # API configuration
     ITEMS_PER_PAGE = 20
 
+    # Recitation audio proxy - off by default, clients stream from the mirrors directly
+    AUDIO_PROXY_ENABLED = os.environ.get('AUDIO_PROXY_ENABLED', 'false').lower() == 'true'
+    AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR') or os.path.join(basedir, 'instance', 'audio_cache')
+    AUDIO_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # 2GB
+
     # Islamic APIs
     ALADHAN_API_URL = 'http://api.aladhan.com/v1'
     ALQURAN_API_URL = 'http://api.alquran.cloud/v1'
     HADITH_API_URL = 'https://hadithapi.com/api'
+    SUNNAH_API_KEY = os.environ.get('SUNNAH_API_KEY')  # needed only by `flask import-hadith`
 
     # Google Maps API
     GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY') or 'your-google-maps-api-key'
@@ -36,6 +36,9 @@ class User(db.Model):
 class PrayerTime(db.Model):
     """Prayer times for different cities"""
     __tablename__ = 'prayer_times'
+    __table_args__ = (
+        db.UniqueConstraint('city', 'date', 'method', name='uq_prayer_times_city_date_method'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     city = db.Column(db.String(100), nullable=False)
@@ -99,13 +102,22 @@ class RamadanArrangement(db.Model):
 class Bookmark(db.Model):
     """User bookmarks for Quran verses, Hadiths, etc."""
     __tablename__ = 'bookmarks'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_type', 'content_id', name='uq_bookmarks_user_content'),
+        # Keyset pagination walks a user's bookmarks of one type in id order
+        db.Index('ix_bookmarks_user_type', 'user_id', 'content_type', 'id'),
+        db.Index('ix_bookmarks_user_updated', 'user_id', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content_type = db.Column(db.String(20), nullable=False)  # quran, hadith, guide
     content_id = db.Column(db.String(50), nullable=False)
     notes = db.Column(db.Text)
+    deleted = db.Column(db.Boolean, default=False, nullable=False)  # tombstone kept for delta sync
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # server write time, for ?since=
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)  # when the user made the change, for conflicts
 
     def to_dict(self):
         return {
@@ -114,7 +126,10 @@ class Bookmark(db.Model):
             'content_type': self.content_type,
             'content_id': self.content_id,
             'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'deleted': self.deleted,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
         }
 
 class UserPreference(db.Model):
@@ -141,3 +156,164 @@ class UserPreference(db.Model):
             'prayer_method': self.prayer_method,
             'location': self.location
         }
+
+class QuranSurah(db.Model):
+    """Quran surah metadata imported from Quran.com"""
+    __tablename__ = 'quran_surahs'
+
+    number = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)  # Arabic name
+    english_name = db.Column(db.String(100), nullable=False)
+    translated_name = db.Column(db.String(100))
+    number_of_ayahs = db.Column(db.Integer, nullable=False)
+    revelation_type = db.Column(db.String(20))  # Meccan, Medinan
+    revelation_order = db.Column(db.Integer)
+    para = db.Column(db.Integer, nullable=False)  # Para of the first ayah
+
+    def to_dict(self):
+        # Same field names as Quran.com chapter objects so clients can use either source
+        return {
+            'id': self.number,
+            'name_simple': self.english_name,
+            'name_arabic': self.name,
+            'translated_name': {'name': self.translated_name or '', 'language_name': 'english'},
+            'verses_count': self.number_of_ayahs,
+            'revelation_place': 'madinah' if self.revelation_type == 'Medinan' else 'makkah',
+            'revelation_order': self.revelation_order,
+            'para': self.para
+        }
+
+class QuranAyah(db.Model):
+    """Quran ayah text with its default English translation"""
+    __tablename__ = 'quran_ayahs'
+    __table_args__ = (
+        db.UniqueConstraint('surah_number', 'ayah_number', name='uq_quran_ayahs_surah_ayah'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)  # Quran.com verse id (1-6236)
+    surah_number = db.Column(db.Integer, db.ForeignKey('quran_surahs.number'), nullable=False)
+    ayah_number = db.Column(db.Integer, nullable=False)
+    verse_key = db.Column(db.String(10), nullable=False)
+    arabic_text = db.Column(db.Text, nullable=False)
+    translation = db.Column(db.Text, nullable=False)
+    transliteration = db.Column(db.Text)
+    para = db.Column(db.Integer, nullable=False)
+    rub_el_hizb = db.Column(db.Integer)  # 1-240
+    page = db.Column(db.Integer)
+    audio_url = db.Column(db.String(255))
+
+    def to_dict(self):
+        # Matches the verse shape returned by /api/quran/verses/<surah_id>
+        return {
+            'id': self.id,
+            'verse_number': self.ayah_number,
+            'verse_key': self.verse_key,
+            'text_uthmani': self.arabic_text,
+            'translation': self.translation
+        }
+
+class QuranWord(db.Model):
+    """Word-by-word breakdown of a Quran ayah"""
+    __tablename__ = 'quran_words'
+    __table_args__ = (
+        db.UniqueConstraint('verse_id', 'position', name='uq_quran_words_verse_position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    verse_id = db.Column(db.Integer, db.ForeignKey('quran_ayahs.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    text_uthmani = db.Column(db.String(100), nullable=False)
+    transliteration = db.Column(db.String(100))
+    translation = db.Column(db.String(255))
+
+class ReadingProgress(db.Model):
+    """Quran reading progress as one bit per ayah, in mushaf order"""
+    __tablename__ = 'reading_progress'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    bitmap = db.Column(db.LargeBinary(780), nullable=False)  # bit n is set once global ayah n has been read
+    verses_read = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class HadithRecord(db.Model):
+    """A hadith from one of the imported collections"""
+    __tablename__ = 'hadiths'
+    __table_args__ = (
+        db.UniqueConstraint('collection', 'hadith_number', name='uq_hadiths_collection_number'),
+        db.UniqueConstraint('collection', 'ordinal', name='uq_hadiths_collection_ordinal'),
+        db.Index('ix_hadiths_collection_book', 'collection', 'book_number', 'ordinal'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    collection = db.Column(db.String(20), nullable=False)  # key of HADITH_COLLECTIONS
+    book_number = db.Column(db.Integer, nullable=False, default=0)
+    book = db.Column(db.String(200))
+    chapter = db.Column(db.String(500))
+    hadith_number = db.Column(db.String(20), nullable=False)  # as printed, e.g. "52a"
+    ordinal = db.Column(db.Integer, nullable=False)  # position within the collection
+    arabic = db.Column(db.Text)
+    english = db.Column(db.Text)
+    narrator = db.Column(db.String(200))
+    grades = db.Column(db.JSON)
+    topics = db.Column(db.JSON)
+    refs = db.Column(db.JSON)
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'collection': self.collection,
+            'book': self.book or '',
+            'book_number': self.book_number,
+            'hadith_number': self.hadith_number,
+            'chapter': self.chapter or '',
+            'arabic': self.arabic or '',
+            'english': self.english or '',
+            'narrator': self.narrator or '',
+            'grades': self.grades or [],
+            'topics': self.topics or [],
+            'references': self.refs or []
+        }
+
+class HadithBook(db.Model):
+    """A book (table of contents entry) of a hadith collection"""
+    __tablename__ = 'hadith_books'
+    __table_args__ = (
+        db.UniqueConstraint('collection', 'book_number', name='uq_hadith_books_collection_number'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    collection = db.Column(db.String(20), nullable=False)
+    book_number = db.Column(db.Integer, nullable=False)
+    source_id = db.Column(db.String(20))  # sunnah.com bookID, if sent
+    name = db.Column(db.String(200))
+    arabic_name = db.Column(db.String(200))
+    hadith_start = db.Column(db.Integer)
+    hadith_end = db.Column(db.Integer)
+    total_hadith = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.source_id,
+            'number': self.book_number,
+            'name': self.name or 'Unknown',
+            'arabic_name': self.arabic_name or '',
+            'hadith_start': self.hadith_start,
+            'hadith_end': self.hadith_end,
+            'total_hadith': self.total_hadith or 0
+        }
+
+class HadithRelated(db.Model):
+    """Precomputed related hadith, packed as (hadith_id, score, relation) records"""
+    __tablename__ = 'hadith_related'
+
+    hadith_id = db.Column(db.Integer, db.ForeignKey('hadiths.id'), primary_key=True)
+    neighbours = db.Column(db.LargeBinary, nullable=False)
+
+class DataVersion(db.Model):
+    """Import counter per dataset, so every process notices an import made by another"""
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)  # quran, hadith
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
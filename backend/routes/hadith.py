@@ -1,37 +1,145 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+import random
 import requests
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from functools import partial
+from services.catalog import CatalogBundle
+from services.hadith_store import hadith_store, book_listings, HADITH_COLLECTIONS, SUNNAH_API_BASE
+from services.hadith_related import related_hadith, MAX_RELATED
+from services.hadith_random import hadith_picker, daily_index, GRADE_PREFIXES
+from services.hadith_fuzzy import fuzzy_index
+from services.hadith_facets import hadith_facets, FACET_TOPIC, FACET_GRADE, FACET_COLLECTION
+from services.upstream import upstream
 
 hadith_bp = Blueprint('hadith', __name__)
 
-# Sunnah.com API Configuration
-SUNNAH_API_BASE = "https://api.sunnah.com/v1"
-
-# Available Hadith Collections
-HADITH_COLLECTIONS = {
-    'bukhari': {'name': 'Sahih al-Bukhari', 'description': 'Most authentic collection of Hadith'},
-    'muslim': {'name': 'Sahih Muslim', 'description': 'Second most authentic collection'},
-    'abudawud': {'name': 'Sunan Abu Dawud', 'description': 'Comprehensive collection covering various topics'},
-    'tirmidhi': {'name': 'Jami at-Tirmidhi', 'description': 'Well-organized collection with grades'},
-    'nasai': {'name': 'Sunan an-Nasa\'i', 'description': 'Focused on legal matters'},
-    'ibnmajah': {'name': 'Sunan Ibn Majah', 'description': 'One of the six major collections'},
-    'malik': {'name': 'Muwatta Malik', 'description': 'Early collection focusing on Medina practices'},
-    'ahmad': {'name': 'Musnad Ahmad', 'description': 'Largest collection of Hadith'},
-    'darimi': {'name': 'Sunan ad-Darimi', 'description': 'Well-structured topical arrangement'}
-}
+# Largest page served from the local corpus
+MAX_PAGE_SIZE = 50
+
+# Cache lifetime (seconds) of a hadith of the day for a date other than today
+DAILY_MAX_AGE = 24 * 60 * 60
+
+# Book listing for collections with no imported hadith while sunnah.com is unreachable,
+# matching the books of the sample hadith
+FALLBACK_BOOKS = [
+    {'id': None, 'number': 1, 'name': 'Book of Faith', 'arabic_name': 'كتاب الإيمان', 'hadith_start': 1, 'hadith_end': 2, 'total_hadith': 2},
+    {'id': None, 'number': 2, 'name': 'Book of Prayer', 'arabic_name': 'كتاب الصلاة', 'hadith_start': 3, 'hadith_end': 3, 'total_hadith': 1},
+    {'id': None, 'number': 3, 'name': 'Book of Charity', 'arabic_name': 'كتاب الزكاة', 'hadith_start': 4, 'hadith_end': 4, 'total_hadith': 1},
+    {'id': None, 'number': 4, 'name': 'Book of Knowledge', 'arabic_name': 'كتاب العلم', 'hadith_start': 5, 'hadith_end': 5, 'total_hadith': 1}
+]
+
+# Fallback hadith collection
+FALLBACK_HADITH = [
+    {
+        'id': '1',
+        'collection': 'Sahih Bukhari',
+        'arabic': 'إِنَّمَا الْأَعْمَالُ بِالنِّيَّاتِ وَإِنَّمَا لِكُلِّ امْرِئٍ مَا نَوَى',
+        'english': 'Actions are but by intention and every man shall have but that which he intended.',
+        'narrator': 'Umar ibn Al-Khattab',
+        'reference': 'Sahih Bukhari 1'
+    },
+    {
+        'id': '2',
+        'collection': 'Sahih Muslim',
+        'arabic': 'مَنْ كَانَ يُؤْمِنُ بِاللَّهِ وَالْيَوْمِ الْآخِرِ فَلْيَقُلْ خَيْرًا أَوْ لِيَصْمُتْ',
+        'english': 'Whoever believes in Allah and the Last Day should speak good or keep silent.',
+        'narrator': 'Abu Hurairah',
+        'reference': 'Sahih Muslim 47'
+    },
+    {
+        'id': '3',
+        'collection': 'Sahih Bukhari',
+        'arabic': 'الْمُسْلِمُ مَنْ سَلِمَ الْمُسْلِمُونَ مِنْ لِسَانِهِ وَيَدِهِ',
+        'english': 'The Muslim is one from whose tongue and hand the Muslims are safe.',
+        'narrator': 'Abdullah ibn Amr',
+        'reference': 'Sahih Bukhari 10'
+    },
+    {
+        'id': '4',
+        'collection': 'Jami at-Tirmidhi',
+        'arabic': 'اتَّقِ اللَّهَ حَيْثُمَا كُنْتَ وَأَتْبِعِ السَّيِّئَةَ الْحَسَنَةَ تَمْحُهَا',
+        'english': 'Fear Allah wherever you are, and follow a bad deed with a good deed which will wipe it out.',
+        'narrator': 'Abu Dharr',
+        'reference': 'Jami at-Tirmidhi 1987'
+    },
+    {
+        'id': '5',
+        'collection': 'Sahih Muslim',
+        'arabic': 'مَنْ دَعَا إِلَى هُدًى كَانَ لَهُ مِنَ الْأَجْرِ مِثْلُ أُجُورِ مَنْ تَبِعَهُ',
+        'english': 'Whoever calls to guidance will have a reward similar to that of those who follow it.',
+        'narrator': 'Abu Hurairah',
+        'reference': 'Sahih Muslim 2674'
+    },
+    {
+        'id': '6',
+        'collection': 'Sahih Bukhari',
+        'arabic': 'لَا يُؤْمِنُ أَحَدُكُمْ حَتَّى يُحِبَّ لِأَخِيهِ مَا يُحِبُّ لِنَفْسِهِ',
+        'english': 'None of you believes until he loves for his brother what he loves for himself.',
+        'narrator': 'Anas ibn Malik',
+        'reference': 'Sahih Bukhari 13'
+    },
+    {
+        'id': '7',
+        'collection': 'Sunan Abu Dawud',
+        'arabic': 'إِنَّ اللَّهَ يُحِبُّ إِذَا عَمِلَ أَحَدُكُمْ عَمَلًا أَنْ يُتْقِنَهُ',
+        'english': 'Indeed, Allah loves when one of you does a job, he does it with excellence.',
+        'narrator': 'Aisha',
+        'reference': 'Sunan Abu Dawud 4681'
+    },
+    {
+        'id': '8',
+        'collection': 'Sahih Muslim',
+        'arabic': 'الدِّينُ النَّصِيحَةُ قُلْنَا لِمَنْ قَالَ لِلَّهِ وَلِكِتَابِهِ وَلِرَسُولِهِ',
+        'english': 'Religion is sincere advice. We said: To whom? He said: To Allah, His Book, His Messenger.',
+        'narrator': 'Tamim ad-Dari',
+        'reference': 'Sahih Muslim 55'
+    }
+]
+
+def get_book_listing(collection_name):
+    """(books, version) from the locally stored listing"""
+    return book_listings.get(
+        collection_name, current_app._get_current_object(), current_app.config.get('SUNNAH_API_KEY')
+    )
+
+def build_books_catalog(collection_name):
+    listing = get_book_listing(collection_name)
+    if listing is None:
+        return None
+    books, _ = listing
+    return {
+        'success': True,
+        'collection': collection_name,
+        'books': books,
+        'total': len(books)
+    }
+
+def books_version(collection_name):
+    listing = get_book_listing(collection_name)
+    return listing[1] if listing else None
+
+# Book listings as precompressed, ETag-versioned blobs, rebuilt when a refresh lands
+books_catalog = CatalogBundle()
+for collection_key in HADITH_COLLECTIONS:
+    books_catalog.register(
+        f'books:{collection_key}',
+        partial(build_books_catalog, collection_key),
+        version=partial(books_version, collection_key)
+    )
 
 @hadith_bp.route('/collections', methods=['GET'])
 def get_collections():
     """Get all available Hadith collections"""
     try:
-        # Fallback to local collections with sample hadith
+        # Real counts once collections are imported, otherwise sample figures
+        counts = hadith_store.counts()
         fallback_collections = []
         for key, info in HADITH_COLLECTIONS.items():
             fallback_collections.append({
                 'id': key,
                 'name': info['name'],
                 'description': info['description'],
-                'total_hadith': 500,  # Simulate available hadith
+                'total_hadith': counts.get(key, 0) if counts else 500,
                 'hasBooks': True,
                 'hasChapters': True
             })
@@ -40,7 +148,7 @@ def get_collections():
             'success': True,
             'collections': fallback_collections,
             'total': len(fallback_collections),
-            'fallback': True
+            'fallback': not counts
         })
             
     except Exception as e:
@@ -53,36 +161,23 @@ def get_collections():
 def get_books(collection_name):
     """Get books for a specific collection"""
     try:
-        # Get books from Sunnah.com API
-        response = requests.get(f"{SUNNAH_API_BASE}/collections/{collection_name}/books", timeout=10)
-        
-        if response.status_code == 200:
-            api_data = response.json()
-            books = []
-            
-            for book in api_data.get('data', []):
-                book_info = {
-                    'id': book.get('bookID'),
-                    'number': book.get('bookNumber'),
-                    'name': book.get('book', {}).get('en', 'Unknown'),
-                    'arabic_name': book.get('book', {}).get('ar', ''),
-                    'hadith_start': book.get('hadithStartNumber'),
-                    'hadith_end': book.get('hadithEndNumber'),
-                    'total_hadith': book.get('totalHadith', 0)
-                }
-                books.append(book_info)
-            
-            return jsonify({
-                'success': True,
-                'collection': collection_name,
-                'books': books,
-                'total': len(books)
-            })
-        else:
+        if collection_name not in HADITH_COLLECTIONS:
             return jsonify({
                 'success': False,
                 'error': f'Books not found for collection: {collection_name}'
             }), 404
+
+        response = books_catalog.respond(f'books:{collection_name}')
+        if response is None:
+            # Collection neither imported nor reachable on sunnah.com: serve the sample listing
+            return jsonify({
+                'success': True,
+                'collection': collection_name,
+                'books': FALLBACK_BOOKS,
+                'total': len(FALLBACK_BOOKS),
+                'fallback': True
+            })
+        return response
             
     except Exception as e:
         return jsonify({
@@ -94,8 +189,33 @@ def get_books(collection_name):
 def get_hadith_by_collection(collection_name):
     """Get Hadith from a specific collection"""
     try:
-        page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', 10, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+
+        # Serve imported collections from the local corpus
+        if hadith_store.has(collection_name):
+            try:
+                total, hadith, next_cursor = hadith_store.list_collection(
+                    collection_name, limit, cursor=cursor, page=None if cursor else page
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+            pagination = {
+                'total_pages': (total + limit - 1) // limit,
+                'total_hadith': total,
+                'per_page': limit,
+                'next_cursor': next_cursor
+            }
+            if not cursor:
+                pagination['current_page'] = page
+            return jsonify({
+                'success': True,
+                'collection': collection_name,
+                'hadith': hadith,
+                'pagination': pagination
+            })
         
         # Sample hadith for fallback
         sample_hadith = [
@@ -198,13 +318,50 @@ def get_hadith_by_collection(collection_name):
             'error': f'Failed to fetch hadith: {str(e)}'
         }), 500
 
+@hadith_bp.route('/hadith/<int:hadith_id>/related', methods=['GET'])
+def get_related_hadith(hadith_id):
+    """Get parallel narrations and topic neighbours of a locally stored Hadith"""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_RELATED)
+        related = related_hadith(hadith_id, limit)
+        if related is None:
+            return jsonify({
+                'success': False,
+                'error': f'No related hadith for ID: {hadith_id}'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'hadith_id': str(hadith_id),
+            'related': related,
+            'total': len(related)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch related hadith: {str(e)}'
+        }), 500
+
 @hadith_bp.route('/hadith/<hadith_id>', methods=['GET'])
 def get_hadith_by_id(hadith_id):
     """Get specific Hadith by ID"""
     try:
-        response = requests.get(f"{SUNNAH_API_BASE}/hadith/{hadith_id}", timeout=10)
-        
-        if response.status_code == 200:
+        # Ids handed out by local listings, search, browse, random and daily
+        hadith = hadith_store.get(hadith_id) if hadith_id.isdigit() else None
+        if hadith is not None:
+            return jsonify({
+                'success': True,
+                'hadith': hadith
+            })
+
+        try:
+            response = upstream.get(f"{SUNNAH_API_BASE}/hadith/{hadith_id}", timeout=10)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching hadith {hadith_id}: {e}")
+            response = None
+
+        if response is not None and response.status_code == 200:
             api_data = response.json()
             hadith = api_data.get('data')
             
@@ -267,6 +424,28 @@ def search_hadith():
                 'success': False,
                 'error': 'Search query is required'
             }), 400
+
+        # Ranked full-text search over the local corpus, or typo-tolerant with ?fuzzy=1
+        if hadith_store.has(collection or None):
+            page, limit = max(page, 1), min(max(limit, 1), MAX_PAGE_SIZE)
+            fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true', 'yes')
+            search = fuzzy_index.search if fuzzy else hadith_store.search
+            total, results = search(query, collection or None, page, limit)
+            return jsonify({
+                'success': True,
+                'query': query,
+                'fuzzy': fuzzy,
+                'results': [
+                    dict(hadith, relevance_score=score, snippet=snippet)
+                    for hadith, score, snippet in results
+                ],
+                'pagination': {
+                    'current_page': page,
+                    'total_pages': (total + limit - 1) // limit,
+                    'total_results': total,
+                    'per_page': limit
+                }
+            })
         
         # Build search URL
         url = f"{SUNNAH_API_BASE}/hadith"
@@ -279,7 +458,7 @@ def search_hadith():
         if collection:
             params['collection'] = collection
         
-        response = requests.get(url, params=params, timeout=15)
+        response = upstream.get(url, params=params, timeout=15)
         
         if response.status_code == 200:
             api_data = response.json()
@@ -321,83 +500,79 @@ def search_hadith():
             'error': f'Search failed: {str(e)}'
         }), 500
 
+@hadith_bp.route('/browse', methods=['GET'])
+def browse_hadith():
+    """Browse imported Hadith filtered by topic, grade and collection, with facet counts"""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PAGE_SIZE)
+        grade = (request.args.get('grade') or '').lower() or None
+        if grade and grade not in GRADE_PREFIXES:
+            return jsonify({
+                'success': False,
+                'error': f"grade must be one of: {', '.join(GRADE_PREFIXES)}"
+            }), 400
+        if not hadith_store.has():
+            return jsonify({
+                'success': False,
+                'error': 'No hadith collections have been imported'
+            }), 503
+
+        # Repeated topics must all match
+        filters = [(FACET_TOPIC, topic) for topic in request.args.getlist('topic') if topic]
+        if grade:
+            filters.append((FACET_GRADE, grade))
+        if request.args.get('collection'):
+            filters.append((FACET_COLLECTION, request.args['collection']))
+
+        total, hadith, facets = hadith_facets.browse(filters, page, limit)
+        return jsonify({
+            'success': True,
+            'filters': {facet: value for facet, value in filters if facet != FACET_TOPIC},
+            'topics': [value for facet, value in filters if facet == FACET_TOPIC],
+            'hadith': hadith,
+            'facets': facets,
+            'pagination': {
+                'current_page': page,
+                'total_pages': (total + limit - 1) // limit,
+                'total_hadith': total,
+                'per_page': limit
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to browse hadith: {str(e)}'
+        }), 500
+
 @hadith_bp.route('/random', methods=['GET'])
 def get_random_hadith():
-    """Get a random Hadith"""
+    """Get a random Hadith, optionally from one collection and grade (sahih, hasan, daif)"""
     try:
-        collection = request.args.get('collection', 'bukhari')
-        
-        # Fallback hadith collection
-        sample_hadith = [
-            {
-                'id': '1',
-                'collection': 'Sahih Bukhari',
-                'arabic': 'إِنَّمَا الْأَعْمَالُ بِالنِّيَّاتِ وَإِنَّمَا لِكُلِّ امْرِئٍ مَا نَوَى',
-                'english': 'Actions are but by intention and every man shall have but that which he intended.',
-                'narrator': 'Umar ibn Al-Khattab',
-                'reference': 'Sahih Bukhari 1'
-            },
-            {
-                'id': '2',
-                'collection': 'Sahih Muslim',
-                'arabic': 'مَنْ كَانَ يُؤْمِنُ بِاللَّهِ وَالْيَوْمِ الْآخِرِ فَلْيَقُلْ خَيْرًا أَوْ لِيَصْمُتْ',
-                'english': 'Whoever believes in Allah and the Last Day should speak good or keep silent.',
-                'narrator': 'Abu Hurairah',
-                'reference': 'Sahih Muslim 47'
-            },
-            {
-                'id': '3',
-                'collection': 'Sahih Bukhari',
-                'arabic': 'الْمُسْلِمُ مَنْ سَلِمَ الْمُسْلِمُونَ مِنْ لِسَانِهِ وَيَدِهِ',
-                'english': 'The Muslim is one from whose tongue and hand the Muslims are safe.',
-                'narrator': 'Abdullah ibn Amr',
-                'reference': 'Sahih Bukhari 10'
-            },
-            {
-                'id': '4',
-                'collection': 'Jami at-Tirmidhi',
-                'arabic': 'اتَّقِ اللَّهَ حَيْثُمَا كُنْتَ وَأَتْبِعِ السَّيِّئَةَ الْحَسَنَةَ تَمْحُهَا',
-                'english': 'Fear Allah wherever you are, and follow a bad deed with a good deed which will wipe it out.',
-                'narrator': 'Abu Dharr',
-                'reference': 'Jami at-Tirmidhi 1987'
-            },
-            {
-                'id': '5',
-                'collection': 'Sahih Muslim',
-                'arabic': 'مَنْ دَعَا إِلَى هُدًى كَانَ لَهُ مِنَ الْأَجْرِ مِثْلُ أُجُورِ مَنْ تَبِعَهُ',
-                'english': 'Whoever calls to guidance will have a reward similar to that of those who follow it.',
-                'narrator': 'Abu Hurairah',
-                'reference': 'Sahih Muslim 2674'
-            },
-            {
-                'id': '6',
-                'collection': 'Sahih Bukhari',
-                'arabic': 'لَا يُؤْمِنُ أَحَدُكُمْ حَتَّى يُحِبَّ لِأَخِيهِ مَا يُحِبُّ لِنَفْسِهِ',
-                'english': 'None of you believes until he loves for his brother what he loves for himself.',
-                'narrator': 'Anas ibn Malik',
-                'reference': 'Sahih Bukhari 13'
-            },
-            {
-                'id': '7',
-                'collection': 'Sunan Abu Dawud',
-                'arabic': 'إِنَّ اللَّهَ يُحِبُّ إِذَا عَمِلَ أَحَدُكُمْ عَمَلًا أَنْ يُتْقِنَهُ',
-                'english': 'Indeed, Allah loves when one of you does a job, he does it with excellence.',
-                'narrator': 'Aisha',
-                'reference': 'Sunan Abu Dawud 4681'
-            },
-            {
-                'id': '8',
-                'collection': 'Sahih Muslim',
-                'arabic': 'الدِّينُ النَّصِيحَةُ قُلْنَا لِمَنْ قَالَ لِلَّهِ وَلِكِتَابِهِ وَلِرَسُولِهِ',
-                'english': 'Religion is sincere advice. We said: To whom? He said: To Allah, His Book, His Messenger.',
-                'narrator': 'Tamim ad-Dari',
-                'reference': 'Sahih Muslim 55'
-            }
-        ]
-        
-        # Return random hadith from the collection
-        import random
-        selected_hadith = random.choice(sample_hadith)
+        collection = request.args.get('collection') or None
+        grade = (request.args.get('grade') or '').lower() or None
+        if grade and grade not in GRADE_PREFIXES:
+            return jsonify({
+                'success': False,
+                'error': f"grade must be one of: {', '.join(GRADE_PREFIXES)}"
+            }), 400
+
+        # Uniform pick over the imported corpus
+        if hadith_store.has():
+            hadith = hadith_picker.random(collection, grade)
+            if hadith is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'No hadith match this collection and grade'
+                }), 404
+            return jsonify({
+                'success': True,
+                'hadith': hadith
+            })
+
+        # Return random hadith from the fallback samples
+        selected_hadith = random.choice(FALLBACK_HADITH)
         
         return jsonify({
             'success': True,
@@ -410,3 +585,48 @@ def get_random_hadith():
             'success': False,
             'error': f'Failed to fetch random hadith: {str(e)}'
         }), 500
+
+@hadith_bp.route('/daily', methods=['GET'])
+def get_daily_hadith():
+    """Get the hadith of the day; the same for every request on a given (UTC) date"""
+    try:
+        collection = request.args.get('collection') or None
+        grade = (request.args.get('grade') or '').lower() or None
+        if grade and grade not in GRADE_PREFIXES:
+            return jsonify({
+                'success': False,
+                'error': f"grade must be one of: {', '.join(GRADE_PREFIXES)}"
+            }), 400
+
+        now = datetime.utcnow()
+        try:
+            day = date.fromisoformat(request.args['date']) if request.args.get('date') else now.date()
+        except ValueError:
+            return jsonify({'success': False, 'error': 'date must be YYYY-MM-DD'}), 400
+
+        hadith = hadith_picker.daily(day, collection, grade) if hadith_store.has() else None
+        result = {'success': True, 'date': day.isoformat(), 'hadith': hadith}
+        if hadith is None:
+            if hadith_store.has():
+                return jsonify({
+                    'success': False,
+                    'error': 'No hadith match this collection and grade'
+                }), 404
+            result['hadith'] = FALLBACK_HADITH[daily_index(day, len(FALLBACK_HADITH), collection, grade)]
+            result['fallback'] = True
+
+        # Cacheable by browsers and proxies until the day rolls over
+        response = jsonify(result)
+        response.cache_control.public = True
+        if day == now.date():
+            midnight = datetime.combine(day + timedelta(days=1), datetime.min.time())
+            response.cache_control.max_age = int((midnight - now).total_seconds())
+        else:
+            response.cache_control.max_age = DAILY_MAX_AGE
+        return response
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch hadith of the day: {str(e)}'
+        }), 500
@@ -1,53 +1,72 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, PrayerTime
 import requests
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from services.prayer_calc import (
+    prayer_times, city_coordinates, CITY_COORDINATES, CITY_TIMEZONE, CITY_UTC_OFFSET,
+    METHODS, ASR_FACTORS, HIGH_LATITUDE_RULES, DEFAULT_METHOD, DEFAULT_ASR, DEFAULT_HIGH_LATITUDE_RULE
+)
+from services.prayer_store import stored_times, timetable
+from services.prayer_export import export_lines, EXPORT_FORMATS
+
+# Longest ?from=&to= range served by one timetable request
+MAX_TIMETABLE_DAYS = 366
 
 prayer_bp = Blueprint('prayer', __name__)
 
-# Indian cities with their prayer times (mock data)
-INDIAN_CITIES_PRAYER_TIMES = {
-    'Delhi': {'Fajr': '04:25', 'Dhuhr': '12:10', 'Asr': '15:45', 'Maghrib': '18:30', 'Isha': '20:00', 'Sunrise': '06:15'},
-    'Mumbai': {'Fajr': '05:15', 'Dhuhr': '12:25', 'Asr': '16:00', 'Maghrib': '18:45', 'Isha': '20:15', 'Sunrise': '06:45'},
-    'Bengaluru': {'Fajr': '05:20', 'Dhuhr': '12:20', 'Asr': '15:50', 'Maghrib': '18:40', 'Isha': '20:10', 'Sunrise': '06:30'},
-    'Hyderabad': {'Fajr': '05:10', 'Dhuhr': '12:15', 'Asr': '15:55', 'Maghrib': '18:35', 'Isha': '20:05', 'Sunrise': '06:25'},
-    'Chennai': {'Fajr': '05:25', 'Dhuhr': '12:30', 'Asr': '16:05', 'Maghrib': '18:50', 'Isha': '20:20', 'Sunrise': '06:50'},
-    'Kolkata': {'Fajr': '04:20', 'Dhuhr': '11:55', 'Asr': '15:30', 'Maghrib': '18:15', 'Isha': '19:45', 'Sunrise': '06:05'},
-    'Lucknow': {'Fajr': '04:30', 'Dhuhr': '12:05', 'Asr': '15:40', 'Maghrib': '18:25', 'Isha': '19:55', 'Sunrise': '06:10'},
-    'Ahmedabad': {'Fajr': '05:30', 'Dhuhr': '12:35', 'Asr': '16:10', 'Maghrib': '18:55', 'Isha': '20:25', 'Sunrise': '06:55'},
-    'Pune': {'Fajr': '05:18', 'Dhuhr': '12:28', 'Asr': '15:58', 'Maghrib': '18:48', 'Isha': '20:18', 'Sunrise': '06:48'},
-    'Jaipur': {'Fajr': '05:00', 'Dhuhr': '12:20', 'Asr': '15:50', 'Maghrib': '18:40', 'Isha': '20:10', 'Sunrise': '06:30'},
-    'Surat': {'Fajr': '05:28', 'Dhuhr': '12:33', 'Asr': '16:08', 'Maghrib': '18:53', 'Isha': '20:23', 'Sunrise': '06:53'},
-    'Kanpur': {'Fajr': '04:35', 'Dhuhr': '12:08', 'Asr': '15:43', 'Maghrib': '18:28', 'Isha': '19:58', 'Sunrise': '06:13'},
-    'Nagpur': {'Fajr': '05:00', 'Dhuhr': '12:10', 'Asr': '15:45', 'Maghrib': '18:30', 'Isha': '20:00', 'Sunrise': '06:20'},
-    'Patna': {'Fajr': '04:25', 'Dhuhr': '11:58', 'Asr': '15:33', 'Maghrib': '18:18', 'Isha': '19:48', 'Sunrise': '06:08'},
-    'Indore': {'Fajr': '05:05', 'Dhuhr': '12:18', 'Asr': '15:53', 'Maghrib': '18:38', 'Isha': '20:08', 'Sunrise': '06:28'},
-    'Thane': {'Fajr': '05:17', 'Dhuhr': '12:27', 'Asr': '16:02', 'Maghrib': '18:47', 'Isha': '20:17', 'Sunrise': '06:47'},
-    'Bhopal': {'Fajr': '05:00', 'Dhuhr': '12:15', 'Asr': '15:50', 'Maghrib': '18:35', 'Isha': '20:05', 'Sunrise': '06:25'},
-    'Visakhapatnam': {'Fajr': '05:15', 'Dhuhr': '12:10', 'Asr': '15:50', 'Maghrib': '18:30', 'Isha': '20:00', 'Sunrise': '06:20'},
-    'Vadodara': {'Fajr': '05:25', 'Dhuhr': '12:30', 'Asr': '16:05', 'Maghrib': '18:50', 'Isha': '20:20', 'Sunrise': '06:50'},
-    'Ghaziabad': {'Fajr': '04:28', 'Dhuhr': '12:13', 'Asr': '15:48', 'Maghrib': '18:33', 'Isha': '20:03', 'Sunrise': '06:18'}
-}
+def calculation_options(args):
+    """Validated prayer calculation options from query parameters; raises ValueError"""
+    methods = {name.lower(): name for name in METHODS}
+    method = methods.get(args.get('method', DEFAULT_METHOD).lower())
+    if method is None:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+    asr = args.get('asr', DEFAULT_ASR).lower()
+    if asr not in ASR_FACTORS:
+        raise ValueError(f"asr must be one of: {', '.join(ASR_FACTORS)}")
+    high_latitude = args.get('high_latitude', DEFAULT_HIGH_LATITUDE_RULE).lower()
+    if high_latitude not in HIGH_LATITUDE_RULES:
+        raise ValueError(f"high_latitude must be one of: {', '.join(HIGH_LATITUDE_RULES)}")
+    return {'method': method, 'asr': asr, 'high_latitude': high_latitude}
+
+
+def requested_date(args):
+    """?date=YYYY-MM-DD, or today; raises ValueError"""
+    if not args.get('date'):
+        return date.today()
+    try:
+        return date.fromisoformat(args['date'])
+    except ValueError:
+        raise ValueError('date must be in YYYY-MM-DD format')
 
 @prayer_bp.route('/times/<city>', methods=['GET'])
 def get_prayer_times(city):
     """Get prayer times for a specific city"""
     try:
-        city_name = city.capitalize()
-
-        if city_name in INDIAN_CITIES_PRAYER_TIMES:
-            prayer_times = INDIAN_CITIES_PRAYER_TIMES[city_name]
+        options = calculation_options(request.args)
+        day = requested_date(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    try:
+        match = city_coordinates(city)
+
+        if match:
+            city_name, (lat, lng) = match
+            # Stored timetables use the default Asr and high-latitude rule
+            times = None
+            if options['asr'] == DEFAULT_ASR and options['high_latitude'] == DEFAULT_HIGH_LATITUDE_RULE:
+                times = stored_times(city_name, day, options['method'])
             return jsonify({
                 'city': city_name,
-                'date': date.today().isoformat(),
-                'times': prayer_times,
-                'method': 'ISNA',
-                'timezone': 'Asia/Kolkata'
+                'date': day.isoformat(),
+                'times': times or prayer_times(lat, lng, day, CITY_UTC_OFFSET, **options),
+                'method': options['method'],
+                'asr': options['asr'],
+                'timezone': CITY_TIMEZONE
             }), 200
         else:
-            return jsonify({'error': f'Prayer times not available for {city_name}'}), 404
+            return jsonify({'error': f'Prayer times not available for {city.capitalize()}'}), 404
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -56,7 +75,7 @@ def get_prayer_times(city):
 def get_available_cities():
     """Get list of available Indian cities"""
     try:
-        cities = list(INDIAN_CITIES_PRAYER_TIMES.keys())
+        cities = list(CITY_COORDINATES.keys())
 
         return jsonify({
             'cities': cities,
@@ -66,25 +85,62 @@ def get_available_cities():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@prayer_bp.route('/methods', methods=['GET'])
+def get_calculation_methods():
+    """Get supported calculation methods, Asr juristic methods and high-latitude rules"""
+    return jsonify({
+        'methods': [
+            dict(params, id=method)
+            for method, params in METHODS.items()
+        ],
+        'asr': list(ASR_FACTORS),
+        'high_latitude': list(HIGH_LATITUDE_RULES),
+        'default_method': DEFAULT_METHOD
+    }), 200
+
 @prayer_bp.route('/times', methods=['GET'])
 def get_multiple_cities_prayer_times():
-    """Get prayer times for multiple cities"""
+    """Get prayer times for multiple cities, or for a location with ?lat=&lng=&tz="""
     try:
+        options = calculation_options(request.args)
+        day = requested_date(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        if lat is not None and lng is not None:
+            if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+                return jsonify({'error': 'lat must be within ±90 and lng within ±180'}), 400
+            # UTC offset in hours; defaults to India Standard Time
+            utc_offset = request.args.get('tz', CITY_UTC_OFFSET, type=float)
+            return jsonify({
+                'location': {'lat': lat, 'lng': lng},
+                'date': day.isoformat(),
+                'times': prayer_times(lat, lng, day, utc_offset, **options),
+                'method': options['method'],
+                'asr': options['asr'],
+                'utc_offset': utc_offset
+            }), 200
+
         cities = request.args.get('cities', '').split(',')
-        cities = [city.strip().capitalize() for city in cities if city.strip()]
+        cities = [city.strip() for city in cities if city.strip()]
 
         if not cities:
             return jsonify({'error': 'No cities specified'}), 400
 
         results = {}
         for city in cities:
-            if city in INDIAN_CITIES_PRAYER_TIMES:
-                results[city] = INDIAN_CITIES_PRAYER_TIMES[city]
+            match = city_coordinates(city)
+            if match:
+                city_name, (lat, lng) = match
+                results[city_name] = prayer_times(lat, lng, day, CITY_UTC_OFFSET, **options)
 
         return jsonify({
-            'date': date.today().isoformat(),
+            'date': day.isoformat(),
             'cities': results,
-            'method': 'ISNA'
+            'method': options['method']
         }), 200
 
     except Exception as e:
@@ -95,19 +151,16 @@ def get_multiple_cities_prayer_times():
 def get_current_prayer():
     """Get current prayer and next prayer time"""
     try:
-        city = request.args.get('city', 'Delhi')
-
-        if city not in INDIAN_CITIES_PRAYER_TIMES:
-            city = 'Delhi'  # Default fallback
+        match = city_coordinates(request.args.get('city', 'Delhi')) or city_coordinates('Delhi')  # Default fallback
+        city, (lat, lng) = match
 
-        prayer_times = INDIAN_CITIES_PRAYER_TIMES[city]
+        prayer_times_today = prayer_times(lat, lng, date.today(), CITY_UTC_OFFSET)
         current_time = datetime.now().time()
 
         # Convert prayer times to time objects for comparison
         prayers = []
-        for prayer, time_str in prayer_times.items():
+        for prayer, time_str in prayer_times_today.items():
             if prayer != 'Sunrise':  # Exclude Sunrise from prayer list
-                hour, minute = map(int, time_str.split(':'))
                 prayers.append({
                     'name': prayer,
                     'time': time_str,
@@ -134,14 +187,94 @@ def get_current_prayer():
         return jsonify({
             'city': city,
             'current_time': current_time.strftime('%H:%M'),
-            'current_prayer': current_prayer,
-            'next_prayer': next_prayer,
-            'all_times': prayer_times
+            'current_prayer': {'name': current_prayer['name'], 'time': current_prayer['time']},
+            'next_prayer': {'name': next_prayer['name'], 'time': next_prayer['time']},
+            'all_times': prayer_times_today
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def whole_number_arg(args, name):
+    """An integer query parameter, or None when it is absent; raises ValueError"""
+    value = args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a whole number')
+
+def timetable_range(args):
+    """(start, end, label) from ?from=&to= or ?year=&month=; raises ValueError"""
+    if args.get('from') or args.get('to'):
+        try:
+            start, end = date.fromisoformat(args.get('from', '')), date.fromisoformat(args.get('to', ''))
+        except ValueError:
+            raise ValueError('from and to must both be dates in YYYY-MM-DD format')
+        if not 0 <= (end - start).days < MAX_TIMETABLE_DAYS:
+            raise ValueError(f'to must be on or after from and at most {MAX_TIMETABLE_DAYS} days later')
+        return start, end, f'{start.isoformat()}_{end.isoformat()}'
+
+    year = whole_number_arg(args, 'year')
+    if year is None:
+        year = date.today().year
+    if not 1 <= year <= 9998:
+        raise ValueError('year must be between 1 and 9998')
+    month = whole_number_arg(args, 'month')
+    if month is None:
+        return date(year, 1, 1), date(year, 12, 31), str(year)
+    if not 1 <= month <= 12:
+        raise ValueError('month must be between 1 and 12')
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, 1), next_month - timedelta(days=1), f'{year}-{month:02d}'
+
+@prayer_bp.route('/timetable/<cities>', methods=['GET'])
+def get_timetable(cities):
+    """Stream a monthly, yearly or date-range timetable for one or more comma-separated cities"""
+    try:
+        options = calculation_options(request.args)
+        start, end, label = timetable_range(request.args)
+        export_format = request.args.get('format', 'json').lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        names = []
+        for city in cities.split(','):
+            match = city_coordinates(city) if city.strip() else None
+            if not match:
+                return jsonify({'error': f'Prayer times not available for {city.strip().capitalize()}'}), 404
+            if match[0] not in names:
+                names.append(match[0])
+
+        def rows():
+            for city in names:
+                for day, times in timetable(city, start, end, **options):
+                    yield city, day, times
+
+        meta = {
+            'cities': names,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'method': options['method'],
+            'asr': options['asr'],
+            'timezone': CITY_TIMEZONE
+        }
+        response = Response(
+            stream_with_context(export_lines(export_format, rows(), meta)),
+            mimetype=EXPORT_FORMATS[export_format]
+        )
+        if export_format != 'json':
+            filename = f"prayer-times-{'-'.join(name.lower() for name in names)}-{label}.{export_format}"
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @prayer_bp.route('/qibla', methods=['GET'])
 def get_qibla_direction():
     """Get Qibla direction from user's location"""
@@ -1,12 +1,24 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, redirect, request, jsonify, send_file, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import threading
+from datetime import datetime, timezone
 import requests
+from models import db, User, Bookmark, ReadingProgress
+from services.quran_store import quran_store, fetch_chapter_verses, QURAN_API_BASE, DEFAULT_TRANSLATION
+from services.cache import cached, cache_stats
+from services.quran_search import search_index, format_results
+from services.audio_mirrors import AudioMonitor, AUDIO_MIRRORS
+from services.audio_cache import AudioFileCache
+from services.catalog import CatalogBundle
+from services.word_store import word_store, WORD_COLUMNS
+from services.reading_progress import to_bits, to_bytes, mark_ranges, para_progress
+from services.quran_index import DIVISION_RANGES, JUZ_STARTS, SURAH_AYAH_COUNTS, division_range, juz_segments, verse_at, verse_offset, TOTAL_AYAHS
+from services.upstream import upstream
 
 quran_bp = Blueprint('quran', __name__)
 
-# Quran.com API base URL
-QURAN_API_BASE = "https://api.quran.com/api/v4"
-
 # Available reciters from Quran.com API
 RECITERS = [
     {'id': 7, 'name': 'Mishari Rashid al-Afasy', 'reciter_name': 'Mishari Rashid al-Afasy'},
@@ -16,48 +28,305 @@ RECITERS = [
     {'id': 6, 'name': 'Ahmed ibn Ali al-Ajamy', 'reciter_name': 'Ahmed ibn Ali al-Ajamy'}
 ]
 
-# Para to Surah mapping (accurate mapping based on Quran structure)
+# Para to Surah mapping, derived from the exact juz boundaries
 PARA_SURAH_MAPPING = {
-    1: [1, 2],      # Para 1: Al-Fatiha, Al-Baqarah (1-141)
-    2: [2],         # Para 2: Al-Baqarah (142-252)
-    3: [2, 3],      # Para 3: Al-Baqarah (253-286), Ali Imran (1-92)
-    4: [3, 4],      # Para 4: Ali Imran (93-200), An-Nisa (1-23)
-    5: [4],         # Para 5: An-Nisa (24-147)
-    6: [4, 5],      # Para 6: An-Nisa (148-176), Al-Maidah (1-81)
-    7: [5, 6],      # Para 7: Al-Maidah (82-120), Al-An'am (1-110)
-    8: [6, 7],      # Para 8: Al-An'am (111-165), Al-A'raf (1-87)
-    9: [7, 8],      # Para 9: Al-A'raf (88-206), Al-Anfal (1-40)
-    10: [8, 9],     # Para 10: Al-Anfal (41-75), At-Tawbah (1-92)
-    11: [9, 10, 11], # Para 11: At-Tawbah (93-129), Yunus, Hud (1-5)
-    12: [11, 12],   # Para 12: Hud (6-123), Yusuf (1-52)
-    13: [12, 13, 14], # Para 13: Yusuf (53-111), Ar-Ra'd, Ibrahim (1-52)
-    14: [14, 15],   # Para 14: Ibrahim (53-52), Al-Hijr
-    15: [15, 16, 17], # Para 15: Al-Hijr, An-Nahl, Al-Isra (1-111)
-    16: [17, 18, 19, 20], # Para 16: Al-Isra, Al-Kahf, Maryam, Ta-Ha (1-135)
-    17: [20, 21],   # Para 17: Ta-Ha (136), Al-Anbiya
-    18: [22, 23, 24, 25], # Para 18: Al-Hajj, Al-Mu'minun, An-Nur, Al-Furqan (1-20)
-    19: [25, 26, 27], # Para 19: Al-Furqan (21-77), Ash-Shu'ara, An-Naml (1-55)
-    20: [27, 28],   # Para 20: An-Naml (56-93), Al-Qasas
-    21: [29, 30, 31, 32, 33], # Para 21: Al-Ankabut, Ar-Rum, Luqman, As-Sajda, Al-Ahzab (1-30)
-    22: [33, 34, 35, 36], # Para 22: Al-Ahzab (31-73), Saba, Fatir, Ya-Sin (1-21)
-    23: [36, 37, 38, 39], # Para 23: Ya-Sin (22-83), As-Saffat, Sad, Az-Zumar (1-31)
-    24: [39, 40, 41], # Para 24: Az-Zumar (32-75), Ghafir, Fussilat (1-46)
-    25: [41, 42, 43, 44, 45], # Para 25: Fussilat (47-54), Ash-Shura, Az-Zukhruf, Ad-Dukhan, Al-Jathiya
-    26: [46, 47, 48, 49, 50, 51], # Para 26: Al-Ahqaf, Muhammad, Al-Fath, Al-Hujurat, Qaf, Adh-Dhariyat (1-30)
-    27: [51, 52, 53, 54, 55, 56, 57], # Para 27: Adh-Dhariyat (31-60), At-Tur, An-Najm, Al-Qamar, Ar-Rahman, Al-Waqi'a, Al-Hadid (1-29)
-    28: [58, 59, 60, 61, 62, 63, 64, 65, 66], # Para 28: Al-Mujadala, Al-Hashr, Al-Mumtahana, As-Saff, Al-Jumu'a, Al-Munafiqun, At-Taghabun, At-Talaq, At-Tahrim
-    29: [67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77], # Para 29: Al-Mulk, Al-Qalam, Al-Haqqah, Al-Ma'arij, Nuh, Al-Jinn, Al-Muzzammil, Al-Muddaththir, Al-Qiyamah, Al-Insan, Al-Mursalat
-    30: [78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112, 113, 114] # Para 30: An-Naba to An-Nas (37 surahs)
+    para: [surah for surah, _, _ in juz_segments(para)]
+    for para in range(1, len(JUZ_STARTS) + 1)
 }
 
+# Bounded pool shared by concurrent upstream lookups
+UPSTREAM_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='quran-upstream')
+
+# Health-probed audio sources
+audio_monitor = AudioMonitor(AUDIO_MIRRORS, [reciter['id'] for reciter in RECITERS])
+
+# Disk cache behind the audio proxy, created on first use
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+# Recitation lookups currently being fetched in the background
+_warming = set()
+_warming_lock = threading.Lock()
+
+# Overall deadline (seconds) for fetching every surah of a para
+PARA_FETCH_DEADLINE = 8
+
+# Most verse keys accepted by one batch lookup
+MAX_BATCH_KEYS = 300
+
+# Most translations merged into one verse response
+MAX_TRANSLATIONS = 5
+
+# Translation shown by default for a user's preferred language
+LANGUAGE_TRANSLATIONS = {
+    'en': 20,   # Saheeh International
+    'ur': 97,   # Tafheem-ul-Quran, Abul Ala Maududi
+    'hi': 122,  # Maulana Azizul Haque al-Umari
+    'bn': 161,  # Taisirul Quran
+}
+
+# Bookmark page size (default, max) and the most records accepted by one sync
+BOOKMARK_PAGE_SIZE = 50
+MAX_BOOKMARK_PAGE_SIZE = 200
+MAX_SYNC_BOOKMARKS = 500
+
+# Most ranges accepted by one reading progress update
+MAX_PROGRESS_RANGES = 500
+
+# Upstream cache lifetimes (seconds). Chapter metadata and verse text never change.
+CHAPTERS_CACHE_TTL = 24 * 60 * 60
+VERSES_CACHE_TTL = 24 * 60 * 60
+AUDIO_CACHE_TTL = 6 * 60 * 60
+SEARCH_CACHE_TTL = 10 * 60
+
+# Quran.com names for the division listing endpoints
+UPSTREAM_DIVISIONS = {'juz': 'by_juz', 'hizb': 'by_hizb', 'rub': 'by_rub'}
+UPSTREAM_PAGE_SIZE = 50
+
+def format_verse(verse):
+    """Reduce a Quran.com verse object to the shape served by this API"""
+    return {
+        'id': verse.get('id'),
+        'verse_number': verse.get('verse_number'),
+        'verse_key': verse.get('verse_key'),
+        'text_uthmani': verse.get('text_uthmani'),
+        'translation': verse.get('translations', [{}])[0].get('text', '') if verse.get('translations') else ''
+    }
+
+def fetch_verse_page(path, page, timeout=10):
+    """Fetch one page of a Quran.com verse listing"""
+    response = upstream.get(
+        f"{QURAN_API_BASE}/verses/{path}",
+        params={
+            'translations': '20',
+            'fields': 'text_uthmani',
+            'per_page': UPSTREAM_PAGE_SIZE,
+            'page': page
+        },
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+def fetch_division_verses(kind, number):
+    """Fetch every verse of a juz, hizb or rub, requesting the remaining pages concurrently"""
+    path = f"{UPSTREAM_DIVISIONS[kind]}/{number}"
+    first = fetch_verse_page(path, 1)
+    total_pages = (first.get('pagination') or {}).get('total_pages') or 1
+    pages = [first] + list(UPSTREAM_POOL.map(
+        upstream.with_budget(lambda page: fetch_verse_page(path, page)), range(2, total_pages + 1)
+    ))
+    return [format_verse(verse) for data in pages for verse in data.get('verses', [])]
+
+def wants_ndjson():
+    """True when the client opted into newline-delimited JSON streaming"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+def ndjson_response(lines, total=None):
+    """Stream an iterable of JSON-serializable objects, one per line"""
+    def generate():
+        try:
+            for item in lines:
+                yield json.dumps(item, ensure_ascii=False) + '\n'
+        except requests.exceptions.RequestException:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({'error': 'Network error: Failed to connect to Quran API'}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if total is not None:
+        response.headers['X-Total-Verses'] = str(total)
+    return response
+
+def stream_chapter_verses(surah_id):
+    """Yield a surah's verses page by page from Quran.com.
+
+    The first page is fetched eagerly so connection errors surface before
+    the response starts.
+    """
+    path = f"by_chapter/{surah_id}"
+    data = fetch_verse_page(path, 1, timeout=5)
+
+    def generate(data):
+        while True:
+            for verse in data.get('verses', []):
+                yield format_verse(verse)
+            next_page = (data.get('pagination') or {}).get('next_page')
+            if not next_page:
+                return
+            data = fetch_verse_page(path, next_page, timeout=5)
+
+    return generate(data)
+
+@cached('quran.chapters', ttl=CHAPTERS_CACHE_TTL, maxsize=1)
+def fetch_chapters():
+    """Fetch the full chapter list from Quran.com"""
+    response = upstream.get(f"{QURAN_API_BASE}/chapters", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+@cached('quran.chapter', ttl=CHAPTERS_CACHE_TTL, maxsize=114)
+def fetch_chapter(surah_id):
+    """Fetch a single chapter's metadata from Quran.com"""
+    response = upstream.get(f"{QURAN_API_BASE}/chapters/{surah_id}", timeout=PARA_FETCH_DEADLINE)
+    response.raise_for_status()
+    data = response.json()
+    if 'chapter' not in data:
+        raise ValueError(f'No chapter in response for surah {surah_id}')
+    return data['chapter']
+
+@cached('quran.verse_pages', ttl=VERSES_CACHE_TTL, maxsize=256)
+def fetch_chapter_page(surah_id, page):
+    """One page of a surah's verses from Quran.com, keyed by ayah number"""
+    data = fetch_verse_page(f"by_chapter/{surah_id}", page, timeout=PARA_FETCH_DEADLINE)
+    return {verse['verse_number']: format_verse(verse) for verse in data.get('verses', [])}
+
+@cached('quran.translations', ttl=VERSES_CACHE_TTL, maxsize=512)
+def fetch_translation_layer(surah_id, translation_id):
+    """One translation of a whole surah, as a list of texts in ayah order"""
+    response = upstream.get(
+        f"{QURAN_API_BASE}/quran/translations/{translation_id}",
+        params={'chapter_number': surah_id},
+        timeout=PARA_FETCH_DEADLINE
+    )
+    response.raise_for_status()
+    return [item.get('text', '') for item in response.json().get('translations', [])]
+
+def get_translation_layer(surah_id, translation_id):
+    """Translation texts for a surah, from the local corpus when it holds that translation"""
+    if translation_id == DEFAULT_TRANSLATION:
+        verses = quran_store.get_verses(surah_id)
+        if verses is not None:
+            return [verse['translation'] for verse in verses]
+    return fetch_translation_layer(surah_id, translation_id)
+
+def requested_translations():
+    """Translation ids from ?translations=, else the signed-in user's language, else None"""
+    raw = request.args.get('translations')
+    if raw:
+        try:
+            ids = list(dict.fromkeys(int(value) for value in raw.split(',') if value.strip()))
+        except ValueError:
+            raise ValueError('translations must be a comma-separated list of ids')
+        if not ids or len(ids) > MAX_TRANSLATIONS:
+            raise ValueError(f'Between 1 and {MAX_TRANSLATIONS} translation ids are allowed')
+        return ids
+
+    # An expired or malformed token only loses the preference, never the read
+    try:
+        verify_jwt_in_request(optional=True)
+        username = get_jwt_identity()
+    except Exception:
+        return None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        language = user.preferences.language if user and user.preferences else None
+        translation_id = LANGUAGE_TRANSLATIONS.get(language)
+        if translation_id and translation_id != DEFAULT_TRANSLATION:
+            return [translation_id]
+    return None
+
+def merge_translations(surah_id, verses, translation_ids):
+    """Attach every requested translation layer to each verse.
+
+    Layers are fetched concurrently and cached per (surah, translation), so
+    adding a translation only fetches that one layer.
+    """
+    layers = list(UPSTREAM_POOL.map(
+        upstream.with_budget(lambda tid: get_translation_layer(surah_id, tid)), translation_ids
+    ))
+    for verse in verses:
+        index = verse['verse_number'] - 1
+        texts = [
+            {'id': tid, 'text': layer[index] if index < len(layer) else ''}
+            for tid, layer in zip(translation_ids, layers)
+        ]
+        # The first requested translation becomes the primary text
+        yield dict(verse, translation=texts[0]['text'], translations=texts)
+
+@cached('quran.audio', ttl=AUDIO_CACHE_TTL, maxsize=1024)
+def fetch_chapter_recitation(reciter_id, chapter_id):
+    """Fetch the audio file record for a chapter recitation from Quran.com"""
+    response = upstream.get(f"{QURAN_API_BASE}/chapter_recitations/{reciter_id}/{chapter_id}", timeout=3)
+    response.raise_for_status()
+    data = response.json()
+    if 'audio_file' not in data or 'audio_url' not in data['audio_file']:
+        raise ValueError(f'No audio file for reciter {reciter_id} chapter {chapter_id}')
+    return data['audio_file']
+
+def get_audio_cache():
+    """The app's audio file cache, configured from AUDIO_CACHE_DIR and AUDIO_CACHE_MAX_BYTES"""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioFileCache(
+                current_app.config['AUDIO_CACHE_DIR'],
+                current_app.config['AUDIO_CACHE_MAX_BYTES']
+            )
+    return _audio_cache
+
+def warm_recitation(reciter_id, chapter_id):
+    """Fetch a chapter recitation into the cache without blocking the caller"""
+    key = (reciter_id, chapter_id)
+    with _warming_lock:
+        if key in _warming:
+            return
+        _warming.add(key)
+
+    def warm():
+        try:
+            fetch_chapter_recitation(reciter_id, chapter_id)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error fetching recitation {reciter_id}/{chapter_id}: {e}")
+        finally:
+            with _warming_lock:
+                _warming.discard(key)
+
+    UPSTREAM_POOL.submit(warm)
+
+@cached('quran.search', ttl=SEARCH_CACHE_TTL, maxsize=512)
+def search_upstream(query):
+    """Run a search against the Quran.com search API"""
+    response = upstream.get(f"{QURAN_API_BASE}/search", params={'q': query}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def build_paras_catalog():
+    """Payload for /paras: every para with its surahs and exact verse range"""
+    paras = []
+    for i in range(1, 31):
+        start, end = division_range('juz', i)
+        paras.append({
+            'number': i,
+            'name': f'Para {i}',
+            'surahs': PARA_SURAH_MAPPING.get(i, []),
+            'start': '%d:%d' % verse_at(start),
+            'end': '%d:%d' % verse_at(end - 1)
+        })
+    return {'paras': paras, 'total': 30}
+
+def build_chapters_catalog():
+    """Payload for /chapters from the local store, else Quran.com; None if neither is available"""
+    chapters = quran_store.chapters()
+    if chapters is not None:
+        return {'chapters': chapters}
+    try:
+        return fetch_chapters()
+    except requests.exceptions.RequestException:
+        return None
+
+# Catalog responses are serialized and compressed once, then served by ETag
+catalog = CatalogBundle()
+catalog.register('reciters', lambda: {'reciters': RECITERS, 'total': len(RECITERS)}, eager=True)
+catalog.register('paras', build_paras_catalog, eager=True)
+catalog.register('chapters', build_chapters_catalog, version=lambda: quran_store.version)
+
 @quran_bp.route('/reciters', methods=['GET'])
 def get_reciters():
     """Get available reciters"""
     try:
-        return jsonify({
-            'reciters': RECITERS,
-            'total': len(RECITERS)
-        }), 200
+        return catalog.respond('reciters')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -65,19 +334,7 @@ def get_reciters():
 def get_paras():
     """Get list of all paras with their surahs"""
     try:
-        paras = []
-        for i in range(1, 31):
-            surahs_in_para = PARA_SURAH_MAPPING.get(i, [])
-            paras.append({
-                'number': i,
-                'name': f'Para {i}',
-                'surahs': surahs_in_para
-            })
-        
-        return jsonify({
-            'paras': paras,
-            'total': 30
-        }), 200
+        return catalog.respond('paras')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -89,30 +346,53 @@ def get_para_surahs(para_number):
             return jsonify({'error': 'Para number must be between 1 and 30'}), 400
             
         surah_ids = PARA_SURAH_MAPPING.get(para_number, [])
+        found = {}
+        status = {}
+
+        # Local store first, then fan the remaining lookups out to Quran.com
+        pending = {}
+        for surah_id in surah_ids:
+            chapter = quran_store.get_chapter(surah_id)
+            if chapter:
+                found[surah_id] = chapter
+                status[str(surah_id)] = 'local'
+            else:
+                pending[UPSTREAM_POOL.submit(upstream.with_budget(fetch_chapter), surah_id)] = surah_id
+
+        if pending:
+            done, not_done = wait(pending, timeout=PARA_FETCH_DEADLINE)
+            for future in done:
+                surah_id = pending[future]
+                try:
+                    found[surah_id] = future.result()
+                    status[str(surah_id)] = 'ok'
+                except Exception as e:
+                    print(f"Error fetching surah {surah_id}: {e}")
+                    status[str(surah_id)] = 'error'
+            for future in not_done:
+                future.cancel()
+                status[str(pending[future])] = 'timeout'
+
         surahs = []
-        
-        # Fetch surah details from Quran.com API
         for surah_id in surah_ids:
-            try:
-                response = requests.get(f"{QURAN_API_BASE}/chapters/{surah_id}", timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'chapter' in data:
-                        surahs.append(data['chapter'])
-            except Exception as e:
-                print(f"Error fetching surah {surah_id}: {e}")
-                # Add fallback data
-                surahs.append({
-                    'id': surah_id,
-                    'name_simple': f'Surah {surah_id}',
-                    'name_arabic': f'السورة {surah_id}',
-                    'verses_count': 100  # Placeholder
-                })
+            # Add fallback data for lookups that failed or missed the deadline
+            surahs.append(found.get(surah_id) or {
+                'id': surah_id,
+                'name_simple': f'Surah {surah_id}',
+                'name_arabic': f'السورة {surah_id}',
+                'verses_count': 100  # Placeholder
+            })
         
         return jsonify({
             'para_number': para_number,
             'surahs': surahs,
-            'total': len(surahs)
+            'total': len(surahs),
+            'ranges': [
+                {'surah': surah, 'from': first, 'to': last}
+                for surah, first, last in juz_segments(para_number)
+            ],
+            'status': status,
+            'complete': all(value in ('local', 'ok') for value in status.values())
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -121,10 +401,9 @@ def get_para_surahs(para_number):
 def get_chapters():
     """Get all chapters (surahs)"""
     try:
-        response = requests.get(f"{QURAN_API_BASE}/chapters", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return jsonify(data), 200
+        response = catalog.respond('chapters')
+        if response is not None:
+            return response
         else:
             # Fallback data
             fallback_chapters = []
@@ -133,7 +412,7 @@ def get_chapters():
                     'id': i,
                     'name_simple': f'Surah {i}',
                     'name_arabic': f'السورة {i}',
-                    'verses_count': 50  # Placeholder
+                    'verses_count': SURAH_AYAH_COUNTS[i - 1]
                 })
             return jsonify({'chapters': fallback_chapters}), 200
     except Exception as e:
@@ -141,36 +420,34 @@ def get_chapters():
 
 @quran_bp.route('/chapter/<int:chapter_id>/audio', methods=['GET'])
 def get_chapter_audio(chapter_id):
-    """Get audio file for a chapter with multiple fallback URLs"""
+    """Get audio file for a chapter with multiple fallback URLs.
+
+    Answers from the recitation cache and mirror health state only; a cache
+    miss is filled in the background for the next request.
+    """
     try:
-        reciter_id = request.args.get('reciter_id', 7)
-        
-        # Multiple audio source attempts
-        audio_urls = [
-            f"https://server8.mp3quran.net/afs/{str(chapter_id).zfill(3)}.mp3",  # Mishari al-Afasy
-            f"https://server10.mp3quran.net/ajm/{str(chapter_id).zfill(3)}.mp3",  # Ahmed al-Ajamy
-            f"https://server11.mp3quran.net/sds/{str(chapter_id).zfill(3)}.mp3",  # Sudais
-            f"https://server12.mp3quran.net/basit/{str(chapter_id).zfill(3)}.mp3"  # Abdul Basit
-        ]
-        
-        # Try the official Quran.com API first with faster timeout
-        try:
-            response = requests.get(f"{QURAN_API_BASE}/chapter_recitations/{reciter_id}/{chapter_id}", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                if 'audio_file' in data and 'audio_url' in data['audio_file']:
-                    return jsonify({
-                        'audio_file': data['audio_file'],
-                        'chapter_id': chapter_id,
-                        'reciter_id': reciter_id
-                    }), 200
-        except:
-            pass
-        
+        reciter_id = request.args.get('reciter_id', 7, type=int)
+        audio_monitor.ensure_started()
+
+        # Direct MP3 mirrors, healthiest first
+        audio_urls = audio_monitor.ranked_urls(chapter_id, reciter_id)
+
+        # Prefer the official Quran.com recitation when we already have it
+        audio_file = fetch_chapter_recitation.cache.peek((reciter_id, chapter_id))
+        if audio_file is not None:
+            return jsonify({
+                'audio_file': dict(audio_file, fallback_urls=audio_urls),
+                'chapter_id': chapter_id,
+                'reciter_id': reciter_id
+            }), 200
+
+        if audio_monitor.reciter_is_up(reciter_id):
+            warm_recitation(reciter_id, chapter_id)
+
         # Fallback to direct MP3 URLs
         return jsonify({
             'audio_file': {
-                'audio_url': audio_urls[0],  # Default to first URL
+                'audio_url': audio_urls[0],
                 'chapter_id': chapter_id,
                 'fallback_urls': audio_urls[1:]
             },
@@ -181,9 +458,59 @@ def get_chapter_audio(chapter_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@quran_bp.route('/chapter/<int:chapter_id>/audio/stream', methods=['GET'])
+def stream_chapter_audio(chapter_id):
+    """Serve a chapter recitation through the local audio cache (supports HTTP Range).
+
+    A file not cached yet is fetched in the background while this request is
+    redirected to the healthiest mirror.
+    """
+    try:
+        if not current_app.config.get('AUDIO_PROXY_ENABLED'):
+            return jsonify({'error': 'Audio proxy is not enabled'}), 404
+        if chapter_id < 1 or chapter_id > 114:
+            return jsonify({'error': 'Chapter number must be between 1 and 114'}), 400
+
+        reciter_id = request.args.get('reciter_id', 7, type=int)
+        audio_monitor.ensure_started()
+        urls = audio_monitor.ranked_urls(chapter_id, reciter_id, only_reciter=True)
+        if not urls:
+            return jsonify({'error': f'No audio mirror for reciter {reciter_id}'}), 404
+
+        cache = get_audio_cache()
+        name = f"{reciter_id}/{str(chapter_id).zfill(3)}.mp3"
+        path = cache.acquire(name)
+        if path is None:
+            cache.prefetch(name, urls)
+            return redirect(urls[0])
+
+        # send_file opens the file while it is pinned; once open, eviction cannot cut the response short
+        try:
+            # conditional=True answers Range and If-None-Match; the file body goes out via wsgi.file_wrapper
+            return send_file(path, mimetype='audio/mpeg', conditional=True, max_age=7 * 24 * 60 * 60)
+        finally:
+            cache.release(name)
+
+    except requests.exceptions.RequestException:
+        return jsonify({'error': 'Audio is temporarily unavailable from all mirrors'}), 502
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@quran_bp.route('/audio/mirrors', methods=['GET'])
+def get_audio_mirrors():
+    """Availability and latency of the audio sources"""
+    audio_monitor.ensure_started()
+    state = audio_monitor.snapshot()
+    if _audio_cache is not None:
+        state['cache'] = _audio_cache.stats()
+    return jsonify(state), 200
+
 @quran_bp.route('/verses/<int:surah_id>')
 def get_verses(surah_id):
-    """Get verses for a specific surah with optimized performance"""
+    """Get verses for a specific surah with optimized performance.
+
+    Pass ?stream=1 or Accept: application/x-ndjson to receive one verse per line.
+    """
     try:
         # Validate surah ID
         if surah_id < 1 or surah_id > 114:
@@ -191,6 +518,34 @@ def get_verses(surah_id):
                 'success': False,
                 'error': 'Invalid surah ID. Must be between 1 and 114.'
             }), 400
+
+        try:
+            translation_ids = requested_translations()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Serve from the local corpus when it has been imported
+        verses = quran_store.get_verses(surah_id)
+
+        # Opt-in streaming: one verse per line as soon as it is available
+        if wants_ndjson():
+            source = iter(verses) if verses is not None else stream_chapter_verses(surah_id)
+            record_reading(*surah_range(surah_id))
+            if translation_ids:
+                source = merge_translations(surah_id, source, translation_ids)
+            return ndjson_response(source, total=SURAH_AYAH_COUNTS[surah_id - 1])
+
+        if verses is not None:
+            if translation_ids:
+                verses = list(merge_translations(surah_id, verses, translation_ids))
+            record_reading(*surah_range(surah_id))
+            return jsonify({
+                'success': True,
+                'verses': verses,
+                'total_verses': len(verses),
+                'surah_id': surah_id,
+                'translations': translation_ids or [DEFAULT_TRANSLATION]
+            })
         
         # Optimized API call with faster timeout and better error handling
         url = f"{QURAN_API_BASE}/verses/by_chapter/{surah_id}"
@@ -202,28 +557,26 @@ def get_verses(surah_id):
         }
         
         # Faster timeout settings
-        response = requests.get(url, params=params, timeout=5)
+        response = upstream.get(url, params=params, timeout=5)
         response.raise_for_status()
         
         data = response.json()
+
+        # Keep the word-by-word data we asked for
+        word_store.add_from_verses(surah_id, data.get('verses', []))
         
         # Optimize data structure for faster frontend processing
-        verses = []
-        for verse in data.get('verses', []):
-            verse_data = {
-                'id': verse.get('id'),
-                'verse_number': verse.get('verse_number'),
-                'verse_key': verse.get('verse_key'),
-                'text_uthmani': verse.get('text_uthmani'),
-                'translation': verse.get('translations', [{}])[0].get('text', '') if verse.get('translations') else ''
-            }
-            verses.append(verse_data)
+        verses = [format_verse(verse) for verse in data.get('verses', [])]
+        if translation_ids:
+            verses = list(merge_translations(surah_id, verses, translation_ids))
+        record_reading(*surah_range(surah_id))
         
         return jsonify({
             'success': True,
             'verses': verses,
             'total_verses': len(verses),
-            'surah_id': surah_id
+            'surah_id': surah_id,
+            'translations': translation_ids or [DEFAULT_TRANSLATION]
         })
         
     except requests.exceptions.Timeout:
@@ -246,6 +599,158 @@ def get_verses(surah_id):
             'error': f'Server error: {str(e)}'
         }), 500
 
+@quran_bp.route('/verses', methods=['GET'])
+def get_verses_by_key():
+    """Get many scattered verses in one call, e.g. ?keys=2:255,18:10,36:1"""
+    try:
+        raw_keys = [key.strip() for key in request.args.get('keys', '').split(',') if key.strip()]
+        if not raw_keys:
+            return jsonify({'success': False, 'error': 'keys parameter is required'}), 400
+        if len(raw_keys) > MAX_BATCH_KEYS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_KEYS} verse keys per request'
+            }), 400
+
+        # Parse and de-duplicate, keeping request order
+        keys, invalid = [], []
+        for key in dict.fromkeys(raw_keys):
+            try:
+                surah_id, ayah_number = map(int, key.split(':'))
+                verse_offset(surah_id, ayah_number)
+                keys.append((surah_id, ayah_number))
+            except ValueError:
+                invalid.append(key)
+
+        # Group by surah; anything the local store lacks is fetched by upstream page
+        found = {}
+        pending = {}
+        fetch_page = upstream.with_budget(fetch_chapter_page)
+        for surah_id, ayah_number in keys:
+            verse = quran_store.get_verse(surah_id, ayah_number)
+            if verse is not None:
+                found[(surah_id, ayah_number)] = verse
+                continue
+            page = (ayah_number - 1) // UPSTREAM_PAGE_SIZE + 1
+            if (surah_id, page) not in pending.values():
+                pending[UPSTREAM_POOL.submit(fetch_page, surah_id, page)] = (surah_id, page)
+
+        if pending:
+            done, not_done = wait(pending, timeout=PARA_FETCH_DEADLINE)
+            for future in not_done:
+                future.cancel()
+            for future in done:
+                surah_id, _ = pending[future]
+                try:
+                    for ayah_number, verse in future.result().items():
+                        found.setdefault((surah_id, ayah_number), verse)
+                except Exception as e:
+                    print(f"Error fetching verses of surah {surah_id}: {e}")
+
+        verses = [found[key] for key in keys if key in found]
+        missing = ['%d:%d' % key for key in keys if key not in found]
+        return jsonify({
+            'success': True,
+            'verses': verses,
+            'total_verses': len(verses),
+            'missing': missing,
+            'invalid': invalid
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+@quran_bp.route('/verses/<int:surah_id>/words', methods=['GET'])
+def get_verse_words(surah_id):
+    """Get word-by-word data for a surah (optionally ?from=&to= ayahs) as per-verse columns"""
+    try:
+        if surah_id < 1 or surah_id > 114:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid surah ID. Must be between 1 and 114.'
+            }), 400
+
+        total = SURAH_AYAH_COUNTS[surah_id - 1]
+        first = request.args.get('from', 1, type=int)
+        last = request.args.get('to', total, type=int)
+        if first < 1 or last > total or first > last:
+            return jsonify({
+                'success': False,
+                'error': f'Ayah range must be within 1-{total}'
+            }), 400
+
+        block = word_store.get(surah_id)
+        if block is None:
+            block = word_store.add_from_verses(surah_id, fetch_chapter_verses(surah_id, timeout=10))
+            if not block.is_complete:
+                return jsonify({
+                    'success': False,
+                    'error': f'Word data for Surah {surah_id} is incomplete upstream'
+                }), 502
+
+        return jsonify({
+            'success': True,
+            'surah_id': surah_id,
+            'columns': list(WORD_COLUMNS),
+            'verses': [block.verse_columns(ayah) for ayah in range(first, last + 1)]
+        })
+
+    except requests.exceptions.RequestException:
+        return jsonify({
+            'success': False,
+            'error': 'Network error: Failed to connect to Quran API'
+        }), 502
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+@quran_bp.route('/<any(juz, para, hizb, rub):division>/<int:number>/verses', methods=['GET'])
+def get_division_verses(division, number):
+    """Get exactly the ayahs of a juz (para), hizb or rub al-hizb"""
+    kind = 'juz' if division == 'para' else division
+    try:
+        try:
+            start, end = division_range(kind, number)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Slice from the local corpus, otherwise ask Quran.com for just this division
+        verses = quran_store.get_range(start, end)
+        if verses is None:
+            verses = fetch_division_verses(kind, number)
+
+        result = {
+            'success': True,
+            'division': kind,
+            'number': number,
+            'start': '%d:%d' % verse_at(start),
+            'end': '%d:%d' % verse_at(end - 1),
+            'verses': verses,
+            'total_verses': len(verses)
+        }
+        if kind == 'juz':
+            result['para_number'] = number
+        record_reading(start, end)
+        return jsonify(result), 200
+
+    except requests.exceptions.RequestException:
+        return jsonify({
+            'success': False,
+            'error': 'Network error: Failed to connect to Quran API'
+        }), 502
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
 # Legacy routes for backward compatibility
 @quran_bp.route('/juzs', methods=['GET'])
 def get_juzs():
@@ -255,7 +760,7 @@ def get_juzs():
 @quran_bp.route('/para/<int:para_number>', methods=['GET'])
 def get_para_ayahs(para_number):
     """Get ayahs for a specific para (legacy endpoint)"""
-    return get_para_surahs(para_number)
+    return get_division_verses('juz', para_number)
 
 @quran_bp.route('/imams', methods=['GET'])
 def get_imams():
@@ -271,11 +776,13 @@ def get_all_surahs():
 def get_surah(surah_number):
     """Get specific surah by number (legacy endpoint)"""
     try:
-        response = requests.get(f"{QURAN_API_BASE}/chapters/{surah_number}", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return jsonify(data), 200
-        else:
+        chapter = quran_store.get_chapter(surah_number)
+        if chapter:
+            return jsonify({'chapter': chapter}), 200
+
+        try:
+            return jsonify({'chapter': fetch_chapter(surah_number)}), 200
+        except (requests.exceptions.HTTPError, ValueError):
             return jsonify({'error': 'Surah not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -288,29 +795,92 @@ def search_quran():
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
 
+        # Answer from the offline index once the corpus has been imported
+        if search_index.is_ready:
+            page = max(request.args.get('page', 1, type=int), 1)
+            size = min(max(request.args.get('size', 20, type=int), 1), 50)
+            total, results = search_index.search(query, page=page, size=size)
+            return jsonify(format_results(query, total, results, page, size)), 200
+
         # Use Quran.com search API
-        response = requests.get(f"{QURAN_API_BASE}/search", params={'q': query}, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return jsonify(data), 200
-        else:
+        try:
+            return jsonify(search_upstream(query)), 200
+        except requests.exceptions.HTTPError:
             return jsonify({'error': 'Search failed'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@quran_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit and miss counters for the upstream response caches"""
+    return jsonify({'caches': cache_stats()}), 200
+
+def current_user_record():
+    """The signed-in User row; JWT identities are usernames"""
+    return User.query.filter_by(username=get_jwt_identity()).first()
+
+def parse_timestamp(value):
+    """ISO 8601 timestamp as naive UTC, matching how bookmark times are stored"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def bookmark_verse_key(item):
+    """Validated 'surah:ayah' key from a client bookmark payload"""
+    if not isinstance(item, dict):
+        raise ValueError('Bookmark must be an object with surah and ayah')
+    surah, ayah = int(item.get('surah')), int(item.get('ayah'))
+    verse_offset(surah, ayah)
+    return f'{surah}:{ayah}'
+
+def serialize_bookmark(bookmark):
+    data = bookmark.to_dict()
+    surah, ayah = bookmark.content_id.split(':')
+    data.update(surah=int(surah), ayah=int(ayah), note=bookmark.notes or '')
+    return data
+
 @quran_bp.route('/bookmarks', methods=['GET'])
 @jwt_required()
 def get_bookmarks():
-    """Get user's Quran bookmarks"""
+    """Get user's Quran bookmarks.
+
+    Pages are keyed on bookmark id: pass the returned next_cursor as ?cursor=.
+    With ?since=<timestamp> only bookmarks changed since then are returned,
+    including deleted ones, so offline clients can apply the delta.
+    """
     try:
-        current_user = get_jwt_identity()
-        # Mock bookmarks data
-        bookmarks = [
-            {'surah': 1, 'ayah': 1, 'note': 'Opening prayer'},
-            {'surah': 2, 'ayah': 255, 'note': 'Ayat al-Kursi'},
-            {'surah': 18, 'ayah': 10, 'note': 'Youth in the cave'}
-        ]
-        return jsonify({'bookmarks': bookmarks}), 200
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        server_time = datetime.utcnow()
+        try:
+            limit = min(max(int(request.args.get('limit', BOOKMARK_PAGE_SIZE)), 1), MAX_BOOKMARK_PAGE_SIZE)
+            cursor = int(request.args.get('cursor', 0))
+            since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid limit, cursor or since parameter'}), 400
+
+        query = Bookmark.query.filter(
+            Bookmark.user_id == user.id,
+            Bookmark.content_type == 'quran',
+            Bookmark.id > cursor
+        )
+        if since is not None:
+            query = query.filter(Bookmark.updated_at >= since)
+        else:
+            query = query.filter(Bookmark.deleted.is_(False))
+
+        bookmarks = query.order_by(Bookmark.id).limit(limit + 1).all()
+        has_more = len(bookmarks) > limit
+        bookmarks = bookmarks[:limit]
+
+        return jsonify({
+            'bookmarks': [serialize_bookmark(bookmark) for bookmark in bookmarks],
+            'next_cursor': bookmarks[-1].id if has_more else None,
+            'server_time': server_time.isoformat()
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -319,25 +889,296 @@ def get_bookmarks():
 def add_bookmark():
     """Add a Quran bookmark"""
     try:
-        current_user = get_jwt_identity()
-        data = request.get_json()
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True)
 
-        if not data.get('surah') or not data.get('ayah'):
+        if not isinstance(data, dict) or not data.get('surah') or not data.get('ayah'):
             return jsonify({'error': 'Surah and ayah numbers are required'}), 400
 
-        # Mock bookmark creation
-        bookmark = {
-            'id': 1,
-            'user': current_user,
-            'surah': data['surah'],
-            'ayah': data['ayah'],
-            'note': data.get('note', ''),
-            'created_at': '2025-08-29T18:00:00Z'
-        }
+        try:
+            content_id = bookmark_verse_key(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Re-bookmarking a verse updates the note and revives a deleted bookmark
+        bookmark = Bookmark.query.filter_by(user_id=user.id, content_type='quran', content_id=content_id).first()
+        if bookmark is None:
+            bookmark = Bookmark(user_id=user.id, content_type='quran', content_id=content_id)
+            db.session.add(bookmark)
+        bookmark.notes = data.get('note', '')
+        bookmark.deleted = False
+        bookmark.changed_at = datetime.utcnow()
+        db.session.commit()
 
         return jsonify({
             'message': 'Bookmark added successfully',
-            'bookmark': bookmark
+            'bookmark': serialize_bookmark(bookmark)
         }), 201
     except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@quran_bp.route('/bookmark/<int:surah>/<int:ayah>', methods=['DELETE'])
+@jwt_required()
+def delete_bookmark(surah, ayah):
+    """Delete a Quran bookmark, leaving a tombstone for delta sync"""
+    try:
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        bookmark = Bookmark.query.filter_by(
+            user_id=user.id, content_type='quran', content_id=f'{surah}:{ayah}', deleted=False
+        ).first()
+        if not bookmark:
+            return jsonify({'error': 'Bookmark not found'}), 404
+
+        bookmark.deleted = True
+        bookmark.changed_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'message': 'Bookmark deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@quran_bp.route('/bookmarks/sync', methods=['POST'])
+@jwt_required()
+def sync_bookmarks():
+    """Bulk upsert bookmarks from an offline client.
+
+    Body: {"bookmarks": [{"surah", "ayah", "note", "deleted", "updated_at"}]}, where
+    updated_at is when the change was made on the device. A record only
+    overwrites the server copy when that change is newer than the stored one's.
+    """
+    try:
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True) or {}
+        items = (data.get('bookmarks') or []) if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return jsonify({'error': 'bookmarks must be a list'}), 400
+        if len(items) > MAX_SYNC_BOOKMARKS:
+            return jsonify({'error': f'At most {MAX_SYNC_BOOKMARKS} bookmarks per sync'}), 400
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                return jsonify({'error': f'bookmarks[{index}] must be an object'}), 400
+
+        server_time = datetime.utcnow()
+        incoming, rejected = {}, []
+        for index, item in enumerate(items):
+            try:
+                content_id = bookmark_verse_key(item)
+                changed_at = parse_timestamp(item['updated_at']) if item.get('updated_at') else server_time
+            except (TypeError, ValueError):
+                rejected.append(index)
+                continue
+            # The newest change wins when a verse appears more than once
+            if content_id not in incoming or changed_at >= incoming[content_id][0]:
+                incoming[content_id] = (min(changed_at, server_time), item)
+
+        # One query for every bookmark the batch touches
+        existing = {}
+        if incoming:
+            existing = {
+                bookmark.content_id: bookmark
+                for bookmark in Bookmark.query.filter(
+                    Bookmark.user_id == user.id,
+                    Bookmark.content_type == 'quran',
+                    Bookmark.content_id.in_(list(incoming))
+                )
+            }
+
+        created = updated = skipped = 0
+        for content_id, (changed_at, item) in incoming.items():
+            bookmark = existing.get(content_id)
+            if bookmark is None:
+                bookmark = Bookmark(user_id=user.id, content_type='quran', content_id=content_id, created_at=changed_at)
+                db.session.add(bookmark)
+                created += 1
+            elif (bookmark.changed_at or bookmark.updated_at or changed_at) > changed_at:
+                # Compare change times, not sync times: a late sync of an older edit must lose
+                skipped += 1
+                continue
+            else:
+                updated += 1
+            bookmark.notes = item.get('note', '')
+            bookmark.deleted = bool(item.get('deleted', False))
+            bookmark.changed_at = changed_at
+            bookmark.updated_at = server_time
+        db.session.commit()
+
+        return jsonify({
+            'created': created,
+            'updated': updated,
+            'skipped': skipped,
+            'rejected': rejected,
+            'server_time': server_time.isoformat()
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def surah_range(surah_id):
+    """Half-open global offset range of a surah"""
+    start = verse_offset(surah_id, 1)
+    return start, start + SURAH_AYAH_COUNTS[surah_id - 1]
+
+def progress_summary(bits):
+    verses_read = bits.bit_count()
+    return {
+        'verses_read': verses_read,
+        'total_verses': TOTAL_AYAHS,
+        'percent': round(100 * verses_read / TOTAL_AYAHS, 1),
+        'khatm_complete': verses_read == TOTAL_AYAHS,
+        'paras': para_progress(bits)
+    }
+
+def update_progress(user, ranges, read=True):
+    """Apply offset ranges to a user's progress bitmap and return the new bits"""
+    progress = ReadingProgress.query.filter_by(user_id=user.id).with_for_update().first()
+    if progress is None:
+        progress = ReadingProgress(user_id=user.id, bitmap=to_bytes(0))
+        db.session.add(progress)
+    bits = mark_ranges(to_bits(progress.bitmap), ranges, read)
+    progress.bitmap = to_bytes(bits)
+    progress.verses_read = bits.bit_count()
+    db.session.commit()
+    return bits
+
+def record_reading(start, end):
+    """Mark served verses as read when a signed-in reader passes ?mark_read=1.
+
+    Never fails the read itself.
+    """
+    if request.args.get('mark_read', '').lower() not in ('1', 'true', 'yes'):
+        return
+    try:
+        verify_jwt_in_request(optional=True)
+        user = current_user_record() if get_jwt_identity() else None
+        if user:
+            update_progress(user, [(start, end)])
+    except Exception as e:
+        db.session.rollback()
+        print(f"Could not record reading progress: {e}")
+
+def whole_number(value):
+    """A positive int from an int or a digit string, or None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value) or None
+    return None
+
+def parse_verse_reference(value):
+    """Global offset of a 'surah:ayah' string or a [surah, ayah] pair, or None if it is not a verse"""
+    if isinstance(value, str):
+        value = value.split(':')
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        return None
+    surah, ayah = (whole_number(part) for part in value)
+    if surah is None or ayah is None or surah > len(SURAH_AYAH_COUNTS) or ayah > SURAH_AYAH_COUNTS[surah - 1]:
+        return None
+    return verse_offset(surah, ayah)
+
+def parse_progress_range(item):
+    """Offset range for {'from': '2:1', 'to': '2:141'}, {'surah': n}, {'para'|'hizb'|'rub': n},
+    a [surah, ayah] verse or a [from, to] pair of verses.
+
+    Verses may be 'surah:ayah' strings or [surah, ayah] pairs. Raises ValueError with a fixed message.
+    """
+    if isinstance(item, list) and len(item) == 2:
+        item = {'from': item} if all(isinstance(part, int) for part in item) else {'from': item[0], 'to': item[1]}
+    if not isinstance(item, dict):
+        raise ValueError('must be an object, a [surah, ayah] verse or a [from, to] pair of verses')
+
+    if 'from' in item:
+        first = parse_verse_reference(item['from'])
+        last = parse_verse_reference(item.get('to', item['from']))
+        if first is None or last is None:
+            raise ValueError('from and to must be verses such as "2:255" or [2, 255]')
+        if last < first:
+            raise ValueError('ends before it starts')
+        return first, last + 1
+    if 'surah' in item:
+        surah = whole_number(item['surah'])
+        if surah is None or surah > len(SURAH_AYAH_COUNTS):
+            raise ValueError(f'surah must be a number between 1 and {len(SURAH_AYAH_COUNTS)}')
+        return surah_range(surah)
+    for kind in ('para', 'juz', 'hizb', 'rub'):
+        if kind in item:
+            division = 'juz' if kind == 'para' else kind
+            number = whole_number(item[kind])
+            count = len(DIVISION_RANGES[division])
+            if number is None or number > count:
+                raise ValueError(f'{kind} must be a number between 1 and {count}')
+            return division_range(division, number)
+    raise ValueError('needs from/to, surah, para, hizb or rub')
+
+@quran_bp.route('/progress', methods=['GET'])
+@jwt_required()
+def get_progress():
+    """Get user's reading progress per para"""
+    try:
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        progress = db.session.get(ReadingProgress, user.id)
+        bits = to_bits(progress.bitmap) if progress else 0
+        return jsonify(progress_summary(bits)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@quran_bp.route('/progress', methods=['POST'])
+@jwt_required()
+def update_reading_progress():
+    """Mark ranges of ayahs as read (or unread with "read": false)"""
+    try:
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json(silent=True) or {}
+        items = (data.get('ranges') or []) if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'ranges must be a non-empty list'}), 400
+        if len(items) > MAX_PROGRESS_RANGES:
+            return jsonify({'error': f'At most {MAX_PROGRESS_RANGES} ranges per update'}), 400
+
+        ranges = []
+        for index, item in enumerate(items):
+            try:
+                ranges.append(parse_progress_range(item))
+            except ValueError as e:
+                return jsonify({'error': f'ranges[{index}] {e}'}), 400
+
+        bits = update_progress(user, ranges, read=data.get('read', True) is not False)
+        return jsonify(progress_summary(bits)), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@quran_bp.route('/progress', methods=['DELETE'])
+@jwt_required()
+def reset_progress():
+    """Clear reading progress to start a new khatm"""
+    try:
+        user = current_user_record()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        progress = db.session.get(ReadingProgress, user.id)
+        if progress:
+            db.session.delete(progress)
+            db.session.commit()
+        return jsonify({'message': 'Reading progress reset successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,156 @@
+"""
+On-disk cache for proxied recitation audio
+
+Files are downloaded once from the mirrors and kept under a byte budget,
+evicting the least recently served file first. A miss never holds a request:
+the file is fetched by a small background pool while the caller sends the
+client to a mirror, and a file being served is pinned so eviction leaves it
+alone until the response has it open.
+"""
+
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from services.upstream import upstream
+
+# Connect / read timeouts for mirror downloads
+DOWNLOAD_TIMEOUT = (5, 30)
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Files downloaded at once in the background
+MAX_DOWNLOADS = 4
+
+
+class AudioFileCache:
+    """Byte-budgeted LRU of audio files on local disk"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # name -> size in bytes, oldest first
+        self._inflight = set()  # names being downloaded
+        self._pins = Counter()  # name -> responses about to open the file
+        self._downloads = ThreadPoolExecutor(max_workers=MAX_DOWNLOADS, thread_name_prefix='audio-cache')
+        self._total_bytes = 0
+        self._scanned = False
+        self.hits = 0
+        self.misses = 0
+
+    def _scan(self):
+        """Pick up files left from a previous run, oldest access first"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                if '.part-' in filename:
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                found.append((stat.st_atime, os.path.relpath(path, self.directory), stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._scanned = True
+
+    def path_for(self, name):
+        return os.path.join(self.directory, name)
+
+    def acquire(self, name):
+        """Local path of a cached file, pinned until release(name), or None on a miss"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self._pins[name] += 1
+            self.hits += 1
+            return self.path_for(name)
+
+    def release(self, name):
+        """Unpin a file returned by acquire(), evicting anything held over budget by the pin"""
+        with self._lock:
+            self._pins[name] -= 1
+            if self._pins[name] <= 0:
+                del self._pins[name]
+            self._evict()
+
+    def prefetch(self, name, urls):
+        """Download a file in the background unless it is cached or already on its way"""
+        with self._lock:
+            if name in self._entries or name in self._inflight:
+                return
+            self._inflight.add(name)
+        self._downloads.submit(self._fill, name, list(urls))
+
+    def _fill(self, name, urls):
+        try:
+            size = self._download(name, urls)
+            with self._lock:
+                self._entries[name] = size
+                self._total_bytes += size
+                self._evict(keep=name)
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"Audio cache could not fetch {name}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(name)
+
+    def _download(self, name, urls):
+        path = self.path_for(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        last_error = None
+        for url in urls:
+            temp_path = f"{path}.part-{uuid.uuid4().hex}"
+            try:
+                with upstream.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                    response.raise_for_status()
+                    size = 0
+                    with open(temp_path, 'wb') as f:
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            size += len(chunk)
+                os.replace(temp_path, path)
+                return size
+            except (requests.exceptions.RequestException, OSError) as e:
+                print(f"Audio download failed from {url}: {e}")
+                last_error = e
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        raise last_error or requests.exceptions.RequestException(f'No source for {name}')
+
+    def _evict(self, keep=None):
+        """Drop least recently used unpinned files until under budget. Caller holds the lock."""
+        for name in list(self._entries):
+            if self._total_bytes <= self.max_bytes or len(self._entries) <= 1:
+                break
+            if name == keep or name in self._pins:
+                continue
+            try:
+                os.remove(self.path_for(name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Platforms that refuse to delete an open file: keep it for a later pass
+                print(f"Audio cache could not evict {name}: {e}")
+                continue
+            self._total_bytes -= self._entries.pop(name)
+
+    def stats(self):
+        return {
+            'files': len(self._entries),
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'downloading': len(self._inflight),
+            'serving': len(self._pins),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,152 @@
+"""
+Audio mirror health tracking
+
+A daemon thread periodically probes every mp3quran.net mirror and the
+Quran.com recitation API for each reciter, keeping availability and a
+smoothed latency per target. Request handlers only read this state, so
+choosing an audio source never waits on the network.
+"""
+
+import threading
+import time
+
+import requests
+
+from services.quran_store import QURAN_API_BASE
+
+# Direct MP3 mirrors, each serving one reciter
+AUDIO_MIRRORS = [
+    {'id': 'afs', 'reciter_id': 7, 'name': 'Mishari al-Afasy', 'base_url': 'https://server8.mp3quran.net/afs'},
+    {'id': 'ajm', 'reciter_id': 6, 'name': 'Ahmed al-Ajamy', 'base_url': 'https://server10.mp3quran.net/ajm'},
+    {'id': 'sds', 'reciter_id': 3, 'name': 'Sudais', 'base_url': 'https://server11.mp3quran.net/sds'},
+    {'id': 'basit', 'reciter_id': 1, 'name': 'Abdul Basit', 'base_url': 'https://server12.mp3quran.net/basit'}
+]
+
+# Seconds between probe rounds
+PROBE_INTERVAL = 60
+PROBE_TIMEOUT = 5
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.3
+
+# Consecutive failures before a target is treated as down
+FAILURE_THRESHOLD = 2
+
+
+def mirror_url(mirror, chapter_id):
+    return f"{mirror['base_url']}/{str(chapter_id).zfill(3)}.mp3"
+
+
+class TargetHealth:
+    """Availability and latency of one probed URL"""
+
+    def __init__(self):
+        self.latency_ms = None
+        self.failures = 0
+        self.last_checked = None
+        self.last_error = None
+
+    @property
+    def is_up(self):
+        # Unprobed targets are assumed up until proven otherwise
+        return self.failures < FAILURE_THRESHOLD
+
+    def record(self, latency_ms=None, error=None):
+        self.last_checked = time.time()
+        if error is not None:
+            self.failures += 1
+            self.last_error = error
+            return
+        self.failures = 0
+        self.last_error = None
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += LATENCY_SMOOTHING * (latency_ms - self.latency_ms)
+
+    def to_dict(self):
+        return {
+            'up': self.is_up,
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'failures': self.failures,
+            'last_checked': self.last_checked,
+            'last_error': self.last_error
+        }
+
+
+class AudioMonitor:
+    """Background prober for audio mirrors and Quran.com reciters"""
+
+    def __init__(self, mirrors, reciter_ids, interval=PROBE_INTERVAL):
+        self.mirrors = mirrors
+        self.interval = interval
+        self._mirror_health = {mirror['id']: TargetHealth() for mirror in mirrors}
+        self._reciter_health = {reciter_id: TargetHealth() for reciter_id in reciter_ids}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        """Start the probe thread on first use"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audio-mirror-probe', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self.probe_all()
+            time.sleep(self.interval)
+
+    def _probe(self, health, url):
+        started = time.monotonic()
+        try:
+            # A one-byte range request works on servers that reject HEAD
+            response = requests.get(url, headers={'Range': 'bytes=0-0'}, timeout=PROBE_TIMEOUT, stream=True)
+            response.close()
+            if response.status_code >= 400:
+                raise requests.exceptions.HTTPError(f'HTTP {response.status_code}')
+        except requests.exceptions.RequestException as e:
+            health.record(error=str(e))
+        else:
+            health.record(latency_ms=(time.monotonic() - started) * 1000)
+
+    def probe_all(self):
+        for mirror in self.mirrors:
+            self._probe(self._mirror_health[mirror['id']], mirror_url(mirror, 1))
+        for reciter_id, health in self._reciter_health.items():
+            self._probe(health, f"{QURAN_API_BASE}/chapter_recitations/{reciter_id}/1")
+
+    def reciter_is_up(self, reciter_id):
+        health = self._reciter_health.get(reciter_id)
+        return health is None or health.is_up
+
+    def ranked_urls(self, chapter_id, reciter_id=None, only_reciter=False):
+        """Mirror URLs for a chapter, healthiest first.
+
+        Among mirrors that are up, the requested reciter comes first and the
+        rest are ordered by measured latency.
+        """
+        def sort_key(mirror):
+            health = self._mirror_health[mirror['id']]
+            latency = health.latency_ms if health.latency_ms is not None else float('inf')
+            return (not health.is_up, mirror['reciter_id'] != reciter_id, latency)
+
+        mirrors = self.mirrors
+        if only_reciter:
+            mirrors = [mirror for mirror in mirrors if mirror['reciter_id'] == reciter_id]
+        return [mirror_url(mirror, chapter_id) for mirror in sorted(mirrors, key=sort_key)]
+
+    def snapshot(self):
+        return {
+            'mirrors': [
+                dict(mirror, **self._mirror_health[mirror['id']].to_dict())
+                for mirror in self.mirrors
+            ],
+            'reciters': {
+                str(reciter_id): health.to_dict()
+                for reciter_id, health in self._reciter_health.items()
+            },
+            'probe_interval': self.interval
+        }
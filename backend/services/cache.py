@@ -0,0 +1,151 @@
+"""
+In-process response cache for upstream API calls
+
+A size-bounded LRU where every entry carries a TTL. Once an entry expires it
+is still served for a grace period while a background thread refreshes it,
+so callers only ever wait on the network for a cold key.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Registry of named caches, used for the stats endpoint
+_caches = {}
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry and stale-while-revalidate"""
+
+    def __init__(self, name, ttl, maxsize=256, stale_ttl=None):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # How long past expiry an entry may still be served while refreshing
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def _lookup(self, key, now):
+        """Return (value, is_stale) for a servable entry, or None. Caller holds the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if now < expires_at:
+            self._data.move_to_end(key)
+            return value, False
+        if now < expires_at + self.stale_ttl:
+            self._data.move_to_end(key)
+            return value, True
+        del self._data[key]
+        return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, key, default=None):
+        """Return a cached value (fresh or stale) without loading or counting"""
+        with self._lock:
+            found = self._lookup(key, time.monotonic())
+        return default if found is None else found[0]
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        with self._lock:
+            found = self._lookup(key, time.monotonic())
+            if found is not None:
+                value, is_stale = found
+                if not is_stale:
+                    self.hits += 1
+                    return value
+                self.stale_hits += 1
+                refresh = key not in self._refreshing
+                if refresh:
+                    self._refreshing.add(key)
+            else:
+                self.misses += 1
+
+        if found is None:
+            value = loader()
+            self.set(key, value)
+            return value
+
+        if refresh:
+            threading.Thread(
+                target=self._refresh, args=(key, loader),
+                name=f'cache-refresh-{self.name}', daemon=True
+            ).start()
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+        except Exception as e:
+            # Keep serving the stale entry until its grace period runs out
+            self.refresh_errors += 1
+            print(f"Cache refresh failed for {self.name} {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'refresh_errors': self.refresh_errors,
+            'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+def get_cache(name, ttl, maxsize=256, stale_ttl=None):
+    """Create (or return the existing) named cache"""
+    if name not in _caches:
+        _caches[name] = TTLCache(name, ttl, maxsize=maxsize, stale_ttl=stale_ttl)
+    return _caches[name]
+
+
+def cached(name, ttl, maxsize=256, stale_ttl=None):
+    """Cache a function's return value by its positional arguments.
+
+    Exceptions are not cached, so a failed upstream call is retried on the
+    next request.
+    """
+    def decorator(func):
+        cache = get_cache(name, ttl, maxsize=maxsize, stale_ttl=stale_ttl)
+
+        @wraps(func)
+        def wrapper(*args):
+            return cache.get_or_load(args, lambda: func(*args))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Hit/miss counters for every registered cache"""
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
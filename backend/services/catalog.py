@@ -0,0 +1,95 @@
+"""
+Precompressed catalog responses
+
+Small, rarely changing JSON catalogs (chapters, paras, reciters) are
+serialized once into immutable byte blobs, stored alongside gzip and brotli
+encodings and a strong ETag derived from the content hash. Serving one is a
+header comparison and a bytes write; nothing is re-serialized per request.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+CATALOG_MAX_AGE = 60 * 60
+
+
+class CatalogBlob:
+    """One serialized catalog in every supported encoding"""
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encodings = {'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(self.body, quality=11)
+
+    def respond(self):
+        """Build the response for the current request, honouring If-None-Match and Accept-Encoding"""
+        if request.if_none_match.contains(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = self._negotiate()
+            body = self.encodings[encoding] if encoding else self.body
+            response = Response(body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.max_age = CATALOG_MAX_AGE
+        return response
+
+    def _negotiate(self):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encodings and accepted[encoding]:
+                return encoding
+        return None
+
+
+class CatalogBundle:
+    """Registry of catalogs, each rebuilt only when its source version changes"""
+
+    def __init__(self):
+        self._builders = {}
+        self._locks = {}  # name -> lock held while that catalog builds
+        self._blobs = {}  # name -> (version, blob)
+
+    def register(self, name, build, version=lambda: None, eager=False):
+        """Register a catalog. build() returns the payload, or None if it cannot be built yet."""
+        self._builders[name] = (build, version)
+        self._locks[name] = threading.Lock()
+        if eager:
+            self.get(name)
+
+    def get(self, name):
+        build, version = self._builders[name]
+        current = version()
+        cached = self._blobs.get(name)
+        if cached is not None and cached[0] == current:
+            return cached[1]
+        # A slow build (often an upstream fetch) only holds up requests for the same catalog
+        with self._locks[name]:
+            cached = self._blobs.get(name)
+            if cached is not None and cached[0] == current:
+                return cached[1]
+            payload = build()
+            if payload is None:
+                return None
+            blob = CatalogBlob(payload)
+            self._blobs[name] = (current, blob)
+            return blob
+
+    def respond(self, name):
+        """Response for a catalog, or None if it is not available"""
+        blob = self.get(name)
+        return blob.respond() if blob is not None else None
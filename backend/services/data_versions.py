@@ -0,0 +1,64 @@
+"""
+Import versions shared between processes
+
+Imports run in a separate `flask` CLI process, so invalidating a store
+in memory there does nothing for the running web workers. Each import bumps
+a counter in data_versions; stores poll it at most every
+IMPORT_CHECK_INTERVAL seconds and reload when it moves.
+"""
+
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, DataVersion
+
+# Seconds between checks for an import made by another process
+IMPORT_CHECK_INTERVAL = 30
+
+
+def read_version(name):
+    """Stored import version of a dataset, or None if it has never been imported"""
+    try:
+        row = db.session.get(DataVersion, name)
+    except SQLAlchemyError:
+        db.session.rollback()
+        return None
+    return row.version if row else None
+
+
+def bump_version(name):
+    """Record a finished import of a dataset"""
+    row = db.session.get(DataVersion, name)
+    if row is None:
+        row = DataVersion(name=name, version=0)
+        db.session.add(row)
+    row.version += 1
+    db.session.commit()
+    return row.version
+
+
+class ImportWatch:
+    """Notices imports of one dataset by any process, with at most one query per interval"""
+
+    def __init__(self, name, interval=IMPORT_CHECK_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self._seen = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def mark_loaded(self):
+        """Remember the version a store is about to load; call before reading the data"""
+        self._seen = read_version(self.name)
+        self._checked_at = time.monotonic()
+
+    def changed(self):
+        """True once when the stored version has moved since mark_loaded()"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.interval:
+                return False
+            self._checked_at = now
+        return read_version(self.name) != self._seen
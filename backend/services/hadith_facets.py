@@ -0,0 +1,147 @@
+"""
+Faceted hadith browsing
+
+Every imported hadith gets a position in collection order (collection, book,
+ordinal). Each topic, grade family and collection keeps the positions of its
+hadith as a bitset held in a Python int, so a filter is a few bitwise ANDs
+and a facet count is one popcount, with no scan over the hadith table.
+"""
+
+import threading
+from array import array
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, HadithRecord
+from services.hadith_random import grade_key
+from services.hadith_store import hadith_store
+
+FACET_TOPIC = 'topic'
+FACET_GRADE = 'grade'
+FACET_COLLECTION = 'collection'
+FACETS = (FACET_TOPIC, FACET_GRADE, FACET_COLLECTION)
+
+# Most values reported per facet, by descending count
+MAX_FACET_VALUES = 50
+
+# Bytes of a bitset popcounted at a time when skipping to a page
+POSITION_CHUNK_BYTES = 64
+
+
+def facet_value(value):
+    return (value or '').strip().lower()
+
+
+def positions(bits, start, count):
+    """Up to count set bit positions of a bitset, skipping the first start.
+
+    Whole chunks before the page are skipped by popcount, so a deep page
+    costs one pass over the bitset's bytes rather than a walk over every bit.
+    """
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    found = []
+    for offset in range(0, len(data), POSITION_CHUNK_BYTES):
+        chunk = int.from_bytes(data[offset:offset + POSITION_CHUNK_BYTES], 'little')
+        in_chunk = chunk.bit_count()
+        if in_chunk <= start:
+            start -= in_chunk
+            continue
+        base = offset * 8
+        while chunk and len(found) < count:
+            low = chunk & -chunk
+            if start:
+                start -= 1
+            else:
+                found.append(base + low.bit_length() - 1)
+            chunk ^= low
+        if len(found) == count:
+            break
+    return found
+
+
+class HadithFacetIndex:
+    """Per-value bitsets over the hadith store, rebuilt after each import"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = array('I')  # position -> hadith id
+        self._postings = {facet: {} for facet in FACETS}  # facet -> value -> bitset
+        self._labels = {facet: {} for facet in FACETS}  # facet -> value -> display name
+
+    def _ensure_built(self):
+        if self._version == self._store.version:
+            return
+        with self._lock:
+            if self._version == self._store.version:
+                return
+            ids = array('I')
+            members = {facet: {} for facet in FACETS}
+            labels = {facet: {} for facet in FACETS}
+            try:
+                rows = db.session.query(
+                    HadithRecord.id, HadithRecord.collection, HadithRecord.grades, HadithRecord.topics
+                ).order_by(HadithRecord.collection, HadithRecord.book_number, HadithRecord.ordinal)
+                for position, (hadith_id, collection, grades, topics) in enumerate(rows.yield_per(5000)):
+                    ids.append(hadith_id)
+                    values = [(FACET_COLLECTION, collection), (FACET_GRADE, grade_key(grades))]
+                    values += [(FACET_TOPIC, topic) for topic in topics or []]
+                    for facet, label in values:
+                        value = facet_value(label)
+                        if value:
+                            members[facet].setdefault(value, []).append(position)
+                            labels[facet].setdefault(value, label.strip())
+            except SQLAlchemyError as e:
+                print(f"Hadith facet index unavailable: {e}")
+                db.session.rollback()
+
+            # Set bits in one pass per value rather than one big-int copy per hadith
+            postings = {facet: {} for facet in FACETS}
+            for facet, values in members.items():
+                for value, value_positions in values.items():
+                    bits = bytearray((len(ids) + 7) // 8)
+                    for position in value_positions:
+                        bits[position >> 3] |= 1 << (position & 7)
+                    postings[facet][value] = int.from_bytes(bits, 'little')
+            self._ids = ids
+            self._postings = postings
+            self._labels = labels
+            self._version = self._store.version
+
+    def match(self, filters):
+        """Bitset of hadith matching every (facet, value) filter"""
+        self._ensure_built()
+        bits = (1 << len(self._ids)) - 1
+        for facet, value in filters:
+            bits &= self._postings[facet].get(facet_value(value), 0)
+            if not bits:
+                break
+        return bits
+
+    def counts(self, bits, limit=MAX_FACET_VALUES):
+        """{facet: [{value, name, count}]} of the values present in a bitset"""
+        facets = {}
+        for facet in FACETS:
+            counted = []
+            for value, posting in self._postings[facet].items():
+                count = (bits & posting).bit_count()
+                if count:
+                    counted.append({'value': value, 'name': self._labels[facet][value], 'count': count})
+            counted.sort(key=lambda entry: (-entry['count'], entry['value']))
+            facets[facet] = counted[:limit]
+        return facets
+
+    def browse(self, filters, page=1, limit=10):
+        """(total, hadith dicts for the page, facet counts) of the hadith matching the filters"""
+        bits = self.match(filters)
+        page_ids = [self._ids[position] for position in positions(bits, (page - 1) * limit, limit)]
+        hadiths = {hadith.id: hadith for hadith in HadithRecord.query.filter(HadithRecord.id.in_(page_ids))}
+        return (
+            bits.bit_count(),
+            [hadiths[hadith_id].to_dict() for hadith_id in page_ids if hadith_id in hadiths],
+            self.counts(bits)
+        )
+
+
+hadith_facets = HadithFacetIndex(hadith_store)
@@ -0,0 +1,151 @@
+"""
+Typo-tolerant hadith search
+
+An in-process trigram index over the vocabulary of the imported hadiths'
+English text and narrators. Each query word is matched to the vocabulary
+words whose trigram sets are most similar (Jaccard, as pg_trgm does), so
+"Hurayra", "Huraira" and "Hurairah" find each other. Hadith are then ranked
+by the summed similarity of their best match for every query word.
+"""
+
+import heapq
+import threading
+from array import array
+from collections import Counter
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, HadithRecord
+from services.hadith_store import hadith_store
+from services.quran_search import snippet, tokenize
+
+# Vocabulary words less similar than this to a query word are ignored
+MIN_SIMILARITY = 0.3
+
+# Most vocabulary words each query word may expand to
+MAX_EXPANSIONS = 12
+
+# A match in the narrator counts this much more than one in the text
+NARRATOR_BOOST = 2.0
+
+
+def trigrams(word):
+    """Trigrams of a word padded like pg_trgm: two spaces before, one after"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramVocabulary:
+    """One complete build of the index; replaced whole, never changed once published"""
+
+    def __init__(self):
+        self.words = []  # vocabulary, by word id
+        self.word_ids = {}
+        self.word_trigrams = []  # trigram count per word id
+        self.trigram_words = {}  # trigram -> array of word ids
+        self.text_postings = []  # word id -> array of doc numbers
+        self.narrator_postings = []
+        self.ids = array('I')  # doc number -> hadith id
+        self.collections = []  # doc number -> collection
+
+    def word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            self.text_postings.append(array('I'))
+            self.narrator_postings.append(array('I'))
+        return word_id
+
+
+class HadithTrigramIndex:
+    """Trigram vocabulary index built lazily from the hadith store"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._vocabulary = TrigramVocabulary()
+
+    def _ensure_built(self):
+        if self._version == self._store.version:
+            return
+        with self._lock:
+            if self._version == self._store.version:
+                return
+            # Built aside and swapped in with one assignment, so a concurrent
+            # search sees either the old index or the new one, never a partial one
+            vocabulary = TrigramVocabulary()
+            try:
+                rows = db.session.query(
+                    HadithRecord.id, HadithRecord.collection, HadithRecord.english, HadithRecord.narrator
+                ).order_by(HadithRecord.id)
+                for doc, (hadith_id, collection, english, narrator) in enumerate(rows.yield_per(2000)):
+                    vocabulary.ids.append(hadith_id)
+                    vocabulary.collections.append(collection)
+                    for word in set(tokenize(english or '')):
+                        vocabulary.text_postings[vocabulary.word_id(word)].append(doc)
+                    for word in set(tokenize(narrator or '')):
+                        vocabulary.narrator_postings[vocabulary.word_id(word)].append(doc)
+            except SQLAlchemyError as e:
+                print(f"Hadith trigram index unavailable: {e}")
+                db.session.rollback()
+
+            for word_id, word in enumerate(vocabulary.words):
+                grams = trigrams(word)
+                vocabulary.word_trigrams.append(len(grams))
+                for gram in grams:
+                    vocabulary.trigram_words.setdefault(gram, array('I')).append(word_id)
+            self._vocabulary = vocabulary
+            self._version = self._store.version
+
+    def similar_words(self, word, vocabulary=None):
+        """[(vocabulary word id, similarity)] closest to a query word"""
+        vocabulary = vocabulary or self._vocabulary
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(vocabulary.trigram_words.get(gram, ()))
+        matches = []
+        for word_id, common in shared.items():
+            similarity = common / (len(grams) + vocabulary.word_trigrams[word_id] - common)
+            if similarity >= MIN_SIMILARITY:
+                matches.append((word_id, similarity))
+        return heapq.nlargest(MAX_EXPANSIONS, matches, key=lambda match: match[1])
+
+    def search(self, query, collection=None, page=1, size=10):
+        """(total, [(hadith dict, score, snippet)]) for one page of fuzzy matches"""
+        self._ensure_built()
+        vocabulary = self._vocabulary
+        scores = {}
+        matched_words = set()
+        for term in set(tokenize(query)):
+            best = {}
+            for word_id, similarity in self.similar_words(term, vocabulary):
+                matched_words.add(vocabulary.words[word_id])
+                for postings, weight in ((vocabulary.text_postings, 1.0), (vocabulary.narrator_postings, NARRATOR_BOOST)):
+                    score = similarity * weight
+                    for doc in postings[word_id]:
+                        if score > best.get(doc, 0):
+                            best[doc] = score
+            for doc, score in best.items():
+                scores[doc] = scores.get(doc, 0.0) + score
+
+        if collection:
+            scores = {doc: score for doc, score in scores.items() if vocabulary.collections[doc] == collection}
+
+        # Ties keep corpus order
+        top = heapq.nlargest(page * size, scores.items(), key=lambda item: (item[1], -item[0]))[(page - 1) * size:]
+        hadiths = {
+            hadith.id: hadith
+            for hadith in HadithRecord.query.filter(HadithRecord.id.in_([vocabulary.ids[doc] for doc, _ in top]))
+        }
+        results = []
+        for doc, score in top:
+            hadith = hadiths.get(vocabulary.ids[doc])
+            if hadith is not None:
+                results.append((hadith.to_dict(), round(score, 4), snippet(hadith.english or '', matched_words)))
+        return len(scores), results
+
+
+fuzzy_index = HadithTrigramIndex(hadith_store)
@@ -0,0 +1,117 @@
+"""
+Random and daily hadith selection
+
+Ids of the imported hadiths are held in compact arrays per collection and
+per (collection, grade), so a pick is one index into an array plus a primary
+key lookup. The hadith of the day is derived from a hash of the date,
+collection and grade, so every worker picks the same one without sharing
+state.
+"""
+
+import hashlib
+import random
+import threading
+from array import array
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, HadithRecord
+from services.hadith_store import hadith_store
+
+# Grade families, matched against the start of a grade in English or Arabic
+GRADE_PREFIXES = {
+    'sahih': ('sahih', 'saheeh', 'صحيح'),
+    'hasan': ('hasan', 'حسن'),
+    'daif': ('daif', "da'if", 'da`if', 'da’if', 'weak', 'ضعيف'),
+    'maudu': ('maudu', "mawdu'", 'fabricated', 'موضوع'),
+}
+
+
+def grade_key(grades):
+    """Grade family of a hadith from its first grading, or None"""
+    if not grades:
+        return None
+    grade = (grades[0].get('grade') or '').strip().lower()
+    for key, prefixes in GRADE_PREFIXES.items():
+        if grade.startswith(prefixes):
+            return key
+    return None
+
+
+def daily_index(day, size, *parts):
+    """Stable index into a pool of the given size for a day"""
+    seed = ':'.join([day.isoformat()] + [part or '*' for part in parts])
+    return int.from_bytes(hashlib.sha256(seed.encode()).digest()[:8], 'big') % size
+
+
+class HadithPicker:
+    """Id pools over the hadith store, rebuilt after each import"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._pools = {}  # (collection or None, grade or None) -> array of ids
+        self._daily = {}  # (day, collection, grade) -> hadith dict, for the current day only
+
+    def _ensure_built(self):
+        if self._version == self._store.version:
+            return
+        with self._lock:
+            if self._version == self._store.version:
+                return
+            pools = {}
+            try:
+                rows = db.session.query(HadithRecord.id, HadithRecord.collection, HadithRecord.grades).order_by(
+                    HadithRecord.id
+                )
+                for hadith_id, collection, grades in rows.yield_per(5000):
+                    grade = grade_key(grades)
+                    keys = [(None, None), (collection, None)]
+                    if grade is not None:
+                        keys += [(None, grade), (collection, grade)]
+                    for key in keys:
+                        pools.setdefault(key, array('I')).append(hadith_id)
+            except SQLAlchemyError as e:
+                print(f"Hadith pools unavailable: {e}")
+                db.session.rollback()
+                pools = {}
+            self._pools = pools
+            self._daily = {}
+            self._version = self._store.version
+
+    def pool(self, collection=None, grade=None):
+        self._ensure_built()
+        return self._pools.get((collection, grade))
+
+    def random(self, collection=None, grade=None):
+        """Uniformly random hadith dict, or None if the pool is empty"""
+        pool = self.pool(collection, grade)
+        if not pool:
+            return None
+        hadith = db.session.get(HadithRecord, pool[random.randrange(len(pool))])
+        return hadith.to_dict() if hadith else None
+
+    def daily(self, day=None, collection=None, grade=None):
+        """The hadith of the day for a collection and grade, or None if the pool is empty"""
+        day = day or datetime.utcnow().date()
+        self._ensure_built()
+        key = (day, collection, grade)
+        cached = self._daily.get(key)
+        if cached is not None:
+            return cached
+        pool = self.pool(collection, grade)
+        if not pool:
+            return None
+        hadith = db.session.get(HadithRecord, pool[daily_index(day, len(pool), collection, grade)])
+        if hadith is None:
+            return None
+        # Only one day's picks are kept
+        if any(cached_day != day for cached_day, _, _ in self._daily):
+            self._daily = {}
+        self._daily[key] = hadith.to_dict()
+        return self._daily[key]
+
+
+hadith_picker = HadithPicker(hadith_store)
@@ -0,0 +1,152 @@
+"""
+Related hadith index
+
+Built once after each import. Hadith that cite the same references (or that
+are cited by each other) are parallel narrations; hadith that share topics
+are topic neighbours. Records from sunnah.com carry neither, so hadith under
+the same chapter heading, then in the same book, fill the remaining places.
+Each hadith's ranked neighbours are packed into a small binary blob in
+hadith_related, so a lookup is one primary key read.
+"""
+
+import re
+import struct
+from collections import Counter, defaultdict
+
+from models import db, HadithRecord, HadithRelated
+from services.hadith_store import HADITH_COLLECTIONS
+
+RELATION_PARALLEL = 1
+RELATION_TOPIC = 2
+RELATION_CHAPTER = 3
+RELATION_BOOK = 4
+RELATION_NAMES = {
+    RELATION_PARALLEL: 'parallel', RELATION_TOPIC: 'topic', RELATION_CHAPTER: 'chapter', RELATION_BOOK: 'book'
+}
+
+# Neighbours kept per hadith
+MAX_RELATED = 20
+
+# Reference groups larger than this are treated as misparsed and skipped
+MAX_PARALLEL_GROUP = 200
+
+# Topic, chapter and book neighbours are taken from this many hadith on each side in their listing
+TOPIC_WINDOW = 10
+
+# hadith id, score, relation
+_NEIGHBOUR = struct.Struct('<IHB')
+
+_REFERENCE = re.compile(r'^(.*?)[\s#:]*(\d+[a-z]?)$')
+_NOT_LETTERS = re.compile(r'[^a-z]')
+
+# Longest keys first so 'ibnmajah' wins over any shorter accidental match
+_COLLECTION_KEYS = sorted(HADITH_COLLECTIONS, key=len, reverse=True)
+
+
+def reference_key(reference):
+    """('bukhari', '1') for references like 'Bukhari 1' or 'Sahih al-Bukhari 1', else None"""
+    match = _REFERENCE.match((reference or '').strip().lower())
+    if not match:
+        return None
+    name = _NOT_LETTERS.sub('', match.group(1))
+    collection = next((key for key in _COLLECTION_KEYS if key in name), None)
+    return (collection, match.group(2)) if collection else None
+
+
+def pack_neighbours(neighbours):
+    return b''.join(_NEIGHBOUR.pack(hadith_id, min(score, 0xFFFF), relation) for hadith_id, score, relation in neighbours)
+
+
+def unpack_neighbours(blob):
+    """[(hadith_id, score, relation)] in rank order"""
+    return list(_NEIGHBOUR.iter_unpack(blob or b''))
+
+
+def windowed_neighbours(groups):
+    """{hadith id: Counter of neighbours} from the TOPIC_WINDOW hadith each side within each group.
+
+    Large groups would pair everything with everything; neighbours in collection order stand in.
+    """
+    neighbours = defaultdict(Counter)
+    for members in groups:
+        for position, hadith_id in enumerate(members):
+            window = members[max(0, position - TOPIC_WINDOW):position] + members[position + 1:position + 1 + TOPIC_WINDOW]
+            neighbours[hadith_id].update(window)
+    return neighbours
+
+
+def build_related_index(log=print):
+    """Recompute every hadith's related list and replace the hadith_related table"""
+    rows = db.session.query(
+        HadithRecord.id, HadithRecord.collection, HadithRecord.hadith_number, HadithRecord.refs,
+        HadithRecord.topics, HadithRecord.book_number, HadithRecord.chapter
+    ).order_by(HadithRecord.collection, HadithRecord.book_number, HadithRecord.ordinal).all()
+
+    # Every hadith answers to its own reference as well as those it cites
+    hadith_refs = {}
+    by_ref = defaultdict(list)
+    by_topic = defaultdict(list)
+    by_chapter = defaultdict(list)
+    by_book = defaultdict(list)
+    for hadith_id, collection, number, refs, topics, book_number, chapter in rows:
+        keys = {(collection, number.lower())}
+        keys.update(key for key in map(reference_key, refs or []) if key)
+        hadith_refs[hadith_id] = keys
+        for key in keys:
+            by_ref[key].append(hadith_id)
+        for topic in {topic.strip().lower() for topic in topics or [] if topic}:
+            by_topic[topic].append(hadith_id)
+        # Book 0 means the source gave no book number
+        if book_number:
+            by_book[(collection, book_number)].append(hadith_id)
+            if chapter and chapter.strip():
+                by_chapter[(collection, book_number, chapter.strip().lower())].append(hadith_id)
+
+    parallels = defaultdict(Counter)
+    for members in by_ref.values():
+        if 1 < len(members) <= MAX_PARALLEL_GROUP:
+            for hadith_id in members:
+                parallels[hadith_id].update(other for other in members if other != hadith_id)
+
+    relations = (
+        (RELATION_PARALLEL, parallels),
+        (RELATION_TOPIC, windowed_neighbours(by_topic.values())),
+        (RELATION_CHAPTER, windowed_neighbours(by_chapter.values())),
+        (RELATION_BOOK, windowed_neighbours(by_book.values())),
+    )
+
+    HadithRelated.query.delete()
+    entries = []
+    for hadith_id in hadith_refs:
+        ranked = []
+        seen = {hadith_id}
+        for relation, neighbours in relations:
+            for other, score in sorted(neighbours[hadith_id].items(), key=lambda item: (-item[1], item[0])):
+                if len(ranked) == MAX_RELATED:
+                    break
+                if other not in seen:
+                    seen.add(other)
+                    ranked.append((other, score, relation))
+        if ranked:
+            entries.append({'hadith_id': hadith_id, 'neighbours': pack_neighbours(ranked)})
+    db.session.bulk_insert_mappings(HadithRelated, entries)
+    db.session.commit()
+    log(f"Related index: {len(entries)} hadith with neighbours")
+    return len(entries)
+
+
+def related_hadith(hadith_id, limit=MAX_RELATED):
+    """Ranked related hadith dicts for a hadith, or None if it has no entry"""
+    entry = db.session.get(HadithRelated, hadith_id)
+    if entry is None:
+        return None
+    neighbours = unpack_neighbours(entry.neighbours)[:limit]
+    hadiths = {
+        hadith.id: hadith
+        for hadith in HadithRecord.query.filter(HadithRecord.id.in_([other for other, _, _ in neighbours]))
+    }
+    return [
+        dict(hadiths[other].to_dict(), relation=RELATION_NAMES[relation], score=score)
+        for other, score, relation in neighbours
+        if other in hadiths
+    ]
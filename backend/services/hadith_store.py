@@ -0,0 +1,560 @@
+"""
+Local hadith corpus
+
+Collections are imported once (``flask --app app import-hadith``) from
+sunnah.com or a JSON export into the hadiths table. On SQLite an FTS5 table
+indexes the Arabic (normalized), English and narrator text, so searches are
+ranked with bm25 and snippets come straight from the index. Other databases
+fall back to a LIKE scan.
+"""
+
+import base64
+import html
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import func, or_, text, tuple_
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from models import db, HadithRecord, HadithBook, HadithRelated
+from services.data_versions import ImportWatch, bump_version, read_version
+from services.quran_search import normalize_arabic, snippet, strip_tags
+from services.upstream import upstream
+
+# Sunnah.com API Configuration
+SUNNAH_API_BASE = "https://api.sunnah.com/v1"
+
+# Available Hadith Collections
+HADITH_COLLECTIONS = {
+    'bukhari': {'name': 'Sahih al-Bukhari', 'description': 'Most authentic collection of Hadith'},
+    'muslim': {'name': 'Sahih Muslim', 'description': 'Second most authentic collection'},
+    'abudawud': {'name': 'Sunan Abu Dawud', 'description': 'Comprehensive collection covering various topics'},
+    'tirmidhi': {'name': 'Jami at-Tirmidhi', 'description': 'Well-organized collection with grades'},
+    'nasai': {'name': 'Sunan an-Nasa\'i', 'description': 'Focused on legal matters'},
+    'ibnmajah': {'name': 'Sunan Ibn Majah', 'description': 'One of the six major collections'},
+    'malik': {'name': 'Muwatta Malik', 'description': 'Early collection focusing on Medina practices'},
+    'ahmad': {'name': 'Musnad Ahmad', 'description': 'Largest collection of Hadith'},
+    'darimi': {'name': 'Sunan ad-Darimi', 'description': 'Well-structured topical arrangement'}
+}
+
+# sunnah.com caps page size at 50
+IMPORT_PAGE_SIZE = 50
+
+# Book listings are re-checked weekly, or an hour after a failed refresh
+BOOKS_REFRESH_TTL = 7 * 24 * 60 * 60
+BOOKS_RETRY_INTERVAL = 60 * 60
+
+FTS_TABLE = 'hadith_fts'
+
+# bm25 column weights: arabic, english, narrator
+FTS_WEIGHTS = (1.0, 1.0, 0.5)
+
+# Tokens of context in an FTS snippet
+SNIPPET_TOKENS = 24
+
+_NARRATOR = re.compile(r'^\s*Narrated\s+([^:]{1,150}):')
+_TOKEN = re.compile(r'\w+')
+_WHITESPACE = re.compile(r'\s+')
+_LEADING_NUMBER = re.compile(r'\d+')
+
+
+def clean_text(value):
+    """Plain text from sunnah.com HTML bodies"""
+    return _WHITESPACE.sub(' ', html.unescape(strip_tags(value or ''))).strip()
+
+
+def _number(value):
+    match = _LEADING_NUMBER.search(str(value or ''))
+    return int(match.group()) if match else 0
+
+
+def _localized(value, lang='en'):
+    """sunnah.com sends names either as [{'lang', 'name'}] or as {'en': ...}"""
+    if isinstance(value, list):
+        return next((item.get('name') for item in value if item.get('lang') == lang), None)
+    if isinstance(value, dict):
+        return value.get(lang)
+    return value
+
+
+def normalize_hadith(raw, collection, books=None):
+    """Map a sunnah.com v1 hadith, or a record in this API's own shape, to HadithRecord fields"""
+    if isinstance(raw.get('hadith'), list):
+        langs = {entry.get('lang'): entry for entry in raw['hadith']}
+        english_entry, arabic_entry = langs.get('en', {}), langs.get('ar', {})
+        english = clean_text(english_entry.get('body'))
+        narrator = _NARRATOR.match(english)
+        fields = {
+            'hadith_number': str(raw.get('hadithNumber') or '').strip(),
+            'book_number': _number(raw.get('bookNumber')),
+            'book': None,
+            'chapter': english_entry.get('chapterTitle') or arabic_entry.get('chapterTitle'),
+            'arabic': clean_text(arabic_entry.get('body')),
+            'english': english,
+            'narrator': narrator.group(1).strip() if narrator else None,
+            'grades': [
+                {'grade': grade.get('grade'), 'graded_by': grade.get('graded_by')}
+                for grade in english_entry.get('grades') or arabic_entry.get('grades') or []
+            ],
+            'topics': [],
+            'refs': []
+        }
+    else:
+        fields = {
+            'hadith_number': str(raw.get('hadith_number') or raw.get('hadithNumber') or '').strip(),
+            'book_number': _number(raw.get('book_number')),
+            'book': raw.get('book'),
+            'chapter': raw.get('chapter'),
+            'arabic': clean_text(raw.get('arabic')),
+            'english': clean_text(raw.get('english')),
+            'narrator': raw.get('narrator'),
+            'grades': raw.get('grades') or [],
+            'topics': raw.get('topics') or [],
+            'refs': raw.get('references') or []
+        }
+
+    if not fields['book'] and books:
+        fields['book'] = books.get(fields['book_number'])
+    if not fields['refs'] and fields['hadith_number']:
+        name = HADITH_COLLECTIONS.get(collection, {}).get('name', collection)
+        fields['refs'] = [f"{name} {fields['hadith_number']}"]
+    return fields
+
+
+def parse_book(book):
+    """HadithBook fields from a sunnah.com book object"""
+    return {
+        'book_number': _number(book.get('bookNumber')),
+        'source_id': str(book['bookID']) if book.get('bookID') is not None else None,
+        'name': _localized(book.get('book')),
+        'arabic_name': _localized(book.get('book'), 'ar'),
+        'hadith_start': book.get('hadithStartNumber'),
+        'hadith_end': book.get('hadithEndNumber'),
+        'total_hadith': book.get('numberOfHadith') or book.get('totalHadith') or 0
+    }
+
+
+def fetch_books(collection, api_key=None, timeout=30):
+    """Every book of a collection from sunnah.com"""
+    response = upstream.get(
+        f"{SUNNAH_API_BASE}/collections/{collection}/books",
+        params={'limit': 500},
+        headers={'X-API-Key': api_key} if api_key else None,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return [parse_book(book) for book in response.json().get('data', [])]
+
+
+def store_books(collection, books):
+    """Upsert a collection's book listing"""
+    existing = {book.book_number: book for book in HadithBook.query.filter_by(collection=collection)}
+    now = datetime.utcnow()
+    for fields in books:
+        book = existing.get(fields['book_number'])
+        if book is None:
+            book = existing[fields['book_number']] = HadithBook(collection=collection)
+            db.session.add(book)
+        for name, value in fields.items():
+            setattr(book, name, value)
+        book.updated_at = now
+    db.session.commit()
+
+
+def imported_books(collection):
+    """Book listing dicts (as HadithBook.to_dict) derived from a collection's imported hadith, or None"""
+    rows = db.session.query(HadithRecord.book_number, HadithRecord.book, HadithRecord.hadith_number).filter_by(
+        collection=collection
+    ).order_by(HadithRecord.book_number, HadithRecord.ordinal)
+    books = []
+    for book_number, group in groupby(rows, key=lambda row: row.book_number):
+        group = list(group)
+        books.append({
+            'id': None,
+            'number': book_number,
+            'name': next((row.book for row in group if row.book), None) or f'Book {book_number}',
+            'arabic_name': '',
+            'hadith_start': _number(group[0].hadith_number),
+            'hadith_end': _number(group[-1].hadith_number),
+            'total_hadith': len(group)
+        })
+    return books or None
+
+
+class BookListings:
+    """Collection tables of contents, served from the hadith_books table.
+
+    Without a stored listing, an imported collection is listed from its own
+    hadith; only a collection with neither is fetched from sunnah.com. A
+    stored listing older than BOOKS_REFRESH_TTL keeps being served while a
+    background thread refreshes it. Imports by any process clear the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # collection -> {'books', 'version', 'next_refresh'}
+        self._retry_at = {}  # collection -> time before which a failed first fetch is not repeated
+        self._refreshing = set()
+        self._imports = ImportWatch('hadith')
+
+    def invalidate(self):
+        self._entries = {}
+        self._retry_at = {}
+
+    def _load_imported(self, collection):
+        books = imported_books(collection)
+        if books is None:
+            return None
+        # Replaced by the next import, never by a background refresh
+        return {'books': books, 'version': f"imported-{read_version('hadith')}", 'next_refresh': float('inf')}
+
+    def _load(self, collection):
+        rows = HadithBook.query.filter_by(collection=collection).order_by(HadithBook.book_number).all()
+        if not rows:
+            return None
+        updated_at = max(row.updated_at for row in rows)
+        return {
+            'books': [row.to_dict() for row in rows],
+            'version': updated_at.isoformat(),
+            'next_refresh': updated_at.timestamp() + BOOKS_REFRESH_TTL
+        }
+
+    def get(self, collection, app, api_key=None):
+        """(books, version) for a collection, or None if it cannot be listed"""
+        # Imports run in another process; pick them up within IMPORT_CHECK_INTERVAL
+        if (self._entries or self._retry_at) and self._imports.changed():
+            self.invalidate()
+        entry = self._entries.get(collection)
+        if entry is None:
+            # A failed first fetch is not retried on every request
+            if self._retry_at.get(collection, 0) > time.time():
+                return None
+            if not self._entries and not self._retry_at:
+                self._imports.mark_loaded()
+            try:
+                entry = self._load(collection) or self._load_imported(collection)
+                if entry is None:
+                    store_books(collection, fetch_books(collection, api_key))
+                    entry = self._load(collection)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Could not load books for {collection}: {e}")
+                entry = None
+            if entry is None:
+                self._retry_at[collection] = time.time() + BOOKS_RETRY_INTERVAL
+                return None
+            self._retry_at.pop(collection, None)
+            self._entries[collection] = entry
+        if entry['next_refresh'] <= time.time():
+            self._refresh_in_background(collection, app, api_key)
+        return entry['books'], entry['version']
+
+    def _refresh_in_background(self, collection, app, api_key):
+        with self._lock:
+            if collection in self._refreshing:
+                return
+            self._refreshing.add(collection)
+        threading.Thread(
+            target=self._refresh, args=(collection, app, api_key),
+            name=f'hadith-books-{collection}', daemon=True
+        ).start()
+
+    def _refresh(self, collection, app, api_key):
+        with app.app_context():
+            try:
+                store_books(collection, fetch_books(collection, api_key))
+                self._entries[collection] = self._load(collection)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Background refresh of {collection} books failed: {e}")
+                self._entries[collection]['next_refresh'] = time.time() + BOOKS_RETRY_INTERVAL
+            finally:
+                with self._lock:
+                    self._refreshing.discard(collection)
+
+
+book_listings = BookListings()
+
+
+def fetch_collection_hadiths(collection, api_key, timeout=30):
+    """Yield every hadith of a collection from sunnah.com following pagination"""
+    page = 1
+    while page:
+        response = upstream.get(
+            f"{SUNNAH_API_BASE}/collections/{collection}/hadiths",
+            params={'limit': IMPORT_PAGE_SIZE, 'page': page},
+            headers={'X-API-Key': api_key},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        yield from data.get('data', [])
+        page = data.get('next') if data.get('data') else None
+
+
+def load_hadith_file(path):
+    """Read a JSON export: {"bukhari": [...], ...} or a list of records with a collection field"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data
+    grouped = {}
+    for record in data:
+        grouped.setdefault(record.get('collection'), []).append(record)
+    return grouped
+
+
+def encode_cursor(book_number, ordinal):
+    """Opaque pagination cursor for the position after a hadith"""
+    raw = json.dumps([book_number, ordinal], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(book_number, ordinal) from a cursor; ValueError if it was not issued by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        book_number, ordinal = json.loads(raw)
+        return int(book_number), int(ordinal)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class HadithStore:
+    """Queries over the imported hadiths, with full-text search when SQLite FTS5 is available"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = None
+        self._fts = None
+        self._imports = ImportWatch('hadith')
+        self.version = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+            self.version += 1
+
+    def counts(self):
+        """Imported hadith per collection"""
+        # Imports run in another process; pick them up within IMPORT_CHECK_INTERVAL
+        if self._counts is not None and self._imports.changed():
+            self.invalidate()
+        counts = self._counts
+        if counts is not None:
+            return counts
+        with self._lock:
+            if self._counts is None:
+                self._imports.mark_loaded()
+                try:
+                    rows = db.session.query(HadithRecord.collection, func.count(HadithRecord.id)).group_by(
+                        HadithRecord.collection
+                    )
+                    self._counts = dict(rows.all())
+                except SQLAlchemyError as e:
+                    # Table not created yet - behave as an empty corpus until an import is recorded
+                    print(f"Hadith store unavailable: {e}")
+                    db.session.rollback()
+                    self._counts = {}
+            return self._counts
+
+    def has(self, collection=None):
+        counts = self.counts()
+        return bool(counts.get(collection)) if collection else bool(counts)
+
+    def get(self, hadith_id):
+        """An imported hadith as a dict by its local id, or None"""
+        try:
+            hadith = db.session.get(HadithRecord, int(hadith_id))
+        except (TypeError, ValueError):
+            return None
+        except SQLAlchemyError:
+            db.session.rollback()
+            return None
+        return hadith.to_dict() if hadith else None
+
+    @property
+    def fts_enabled(self):
+        """Create the FTS5 table on first use; False on databases without FTS5"""
+        if self._fts is None:
+            if db.engine.dialect.name != 'sqlite':
+                self._fts = False
+            else:
+                try:
+                    db.session.execute(text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                        "USING fts5(arabic, english, narrator, tokenize='unicode61 remove_diacritics 2')"
+                    ))
+                    db.session.commit()
+                    self._fts = True
+                except OperationalError as e:
+                    print(f"FTS5 unavailable, hadith search will scan: {e}")
+                    db.session.rollback()
+                    self._fts = False
+        return self._fts
+
+    def index_collection(self, collection):
+        """Replace a collection's rows in the FTS index"""
+        if not self.fts_enabled:
+            return
+        # Rows of hadith dropped by a re-import go too
+        db.session.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM hadiths WHERE collection = :collection) "
+                 "OR rowid NOT IN (SELECT id FROM hadiths)"),
+            {'collection': collection}
+        )
+        rows = [
+            {'id': hadith.id, 'arabic': normalize_arabic(hadith.arabic or ''),
+             'english': hadith.english or '', 'narrator': hadith.narrator or ''}
+            for hadith in HadithRecord.query.filter_by(collection=collection)
+        ]
+        if rows:
+            db.session.execute(
+                text(f"INSERT INTO {FTS_TABLE} (rowid, arabic, english, narrator) "
+                     "VALUES (:id, :arabic, :english, :narrator)"),
+                rows
+            )
+        db.session.commit()
+
+    def list_collection(self, collection, limit=10, cursor=None, page=None):
+        """(total, hadith dicts, next cursor) for one page of a collection in book order.
+
+        A cursor seeks straight to its (book_number, ordinal) position on the
+        collection index, so every page costs the same. page is an offset kept
+        for older clients.
+        """
+        query = HadithRecord.query.filter_by(collection=collection)
+        if cursor is not None:
+            query = query.filter(
+                tuple_(HadithRecord.book_number, HadithRecord.ordinal) > tuple_(*decode_cursor(cursor))
+            )
+        query = query.order_by(HadithRecord.book_number, HadithRecord.ordinal)
+        if page is not None:
+            query = query.offset((page - 1) * limit)
+
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].book_number, rows[-1].ordinal)
+        return self.counts().get(collection, 0), [row.to_dict() for row in rows], next_cursor
+
+    def search(self, query, collection=None, page=1, limit=10):
+        """(total, [(hadith dict, relevance score, snippet)]) for one page of results"""
+        terms = _TOKEN.findall(normalize_arabic(query).lower())
+        if not terms:
+            return 0, []
+        if self.fts_enabled:
+            return self._search_fts(terms, collection, page, limit)
+        return self._search_scan(terms, collection, page, limit)
+
+    def _search_fts(self, terms, collection, page, limit):
+        # Quoting every token keeps user input from being parsed as FTS syntax;
+        # the last one is a prefix so partly typed words still match
+        params = {'match': ' '.join(f'"{term}"' for term in terms) + '*'}
+        where = f"{FTS_TABLE} MATCH :match"
+        if collection:
+            where += " AND h.collection = :collection"
+            params['collection'] = collection
+        source = f"FROM {FTS_TABLE} JOIN hadiths h ON h.id = {FTS_TABLE}.rowid WHERE {where}"
+
+        total = db.session.execute(text(f"SELECT count(*) {source}"), params).scalar()
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        rows = db.session.execute(text(
+            f"SELECT h.id, bm25({FTS_TABLE}, {weights}) AS score, "
+            f"snippet({FTS_TABLE}, -1, '<em>', '</em>', '…', {SNIPPET_TOKENS}) AS snip "
+            f"{source} ORDER BY score LIMIT :limit OFFSET :offset"
+        ), dict(params, limit=limit, offset=(page - 1) * limit)).all()
+
+        hadiths = {hadith.id: hadith for hadith in HadithRecord.query.filter(HadithRecord.id.in_([row.id for row in rows]))}
+        # bm25() is lower-is-better; flip it so higher scores rank first
+        return total, [(hadiths[row.id].to_dict(), round(-row.score, 4), row.snip) for row in rows if row.id in hadiths]
+
+    def _search_scan(self, terms, collection, page, limit):
+        query = HadithRecord.query
+        if collection:
+            query = query.filter_by(collection=collection)
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(or_(
+                HadithRecord.english.ilike(pattern),
+                HadithRecord.narrator.ilike(pattern),
+                HadithRecord.arabic.ilike(pattern)
+            ))
+        total = query.count()
+        rows = query.order_by(HadithRecord.collection, HadithRecord.book_number, HadithRecord.ordinal).offset(
+            (page - 1) * limit
+        ).limit(limit).all()
+        return total, [(row.to_dict(), 0, snippet(row.english or '', set(terms))) for row in rows]
+
+
+hadith_store = HadithStore()
+
+
+def import_collection(collection, records, books=None):
+    """Replace one collection's hadiths, keeping ids stable across re-imports, and reindex it.
+
+    Ordinals are renumbered in import order and hadith missing from this
+    import are removed, so (book_number, ordinal) stays unique for cursor paging.
+    """
+    # Park the current ordinals below zero so renumbering never collides on the unique index
+    HadithRecord.query.filter_by(collection=collection).update(
+        {HadithRecord.ordinal: -HadithRecord.id}, synchronize_session=False
+    )
+    existing = {hadith.hadith_number: hadith for hadith in HadithRecord.query.filter_by(collection=collection)}
+    seen = set()
+    imported = 0
+    for raw in records:
+        fields = normalize_hadith(raw, collection, books)
+        if not fields['hadith_number']:
+            continue
+        hadith = existing.get(fields['hadith_number'])
+        if hadith is None:
+            hadith = existing[fields['hadith_number']] = HadithRecord(collection=collection)
+            db.session.add(hadith)
+        for name, value in fields.items():
+            setattr(hadith, name, value)
+        imported += 1
+        hadith.ordinal = imported
+        seen.add(fields['hadith_number'])
+
+    stale = [hadith.id for number, hadith in existing.items() if number not in seen and hadith.id is not None]
+    if stale:
+        HadithRelated.query.filter(HadithRelated.hadith_id.in_(stale)).delete(synchronize_session=False)
+        HadithRecord.query.filter(HadithRecord.id.in_(stale)).delete(synchronize_session=False)
+    db.session.commit()
+    hadith_store.index_collection(collection)
+    return imported
+
+
+def import_hadith(collections=None, api_key=None, path=None, log=print):
+    """Load collections from a JSON export or from sunnah.com into the local tables"""
+    if path:
+        source = load_hadith_file(path)
+        collections = collections or [name for name in source if name]
+    else:
+        if not api_key:
+            raise RuntimeError('sunnah.com requires an API key (set SUNNAH_API_KEY) or pass a JSON file')
+        collections = collections or list(HADITH_COLLECTIONS)
+
+    total = 0
+    for collection in collections:
+        if path:
+            records, books = source.get(collection, []), None
+        else:
+            book_rows = fetch_books(collection, api_key)
+            store_books(collection, book_rows)
+            books = {book['book_number']: book['name'] for book in book_rows}
+            records = fetch_collection_hadiths(collection, api_key)
+        count = import_collection(collection, records, books)
+        total += count
+        log(f"{collection}: {count} hadith")
+
+    bump_version('hadith')
+    hadith_store.invalidate()
+    book_listings.invalidate()
+    return total
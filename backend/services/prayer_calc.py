@@ -0,0 +1,209 @@
+"""
+Prayer time calculation
+
+Fajr, Sunrise, Dhuhr, Asr, Maghrib and Isha from the sun's position, for any
+latitude, longitude and date. Solar declination and the equation of time use
+the low-precision almanac formulas (good to about a minute until 2100) and
+are evaluated once per day at local solar noon, which keeps a full year for
+one location to a few milliseconds. Calculations run column-wise over a list
+of dates, so the sun's position for a location can be shared by every method.
+
+Times are decimal hours in the requested UTC offset and may be None when the
+sun never reaches a prayer's angle (polar day or night) and no high-latitude
+rule is applied.
+"""
+
+from datetime import date, timedelta
+from math import acos, asin, atan, atan2, cos, degrees, radians, sin, tan
+
+# Twilight angles (degrees below the horizon); Umm al-Qura sets Isha a fixed time after Maghrib
+METHODS = {
+    'ISNA': {'name': 'Islamic Society of North America', 'fajr': 15, 'isha': 15},
+    'MWL': {'name': 'Muslim World League', 'fajr': 18, 'isha': 17},
+    'Karachi': {'name': 'University of Islamic Sciences, Karachi', 'fajr': 18, 'isha': 18},
+    'UmmAlQura': {'name': 'Umm al-Qura University, Makkah', 'fajr': 18.5, 'isha_minutes': 90},
+    'Egyptian': {'name': 'Egyptian General Authority of Survey', 'fajr': 19.5, 'isha': 17.5},
+}
+
+DEFAULT_METHOD = 'ISNA'
+
+# Shadow length factor at Asr
+ASR_FACTORS = {'shafi': 1, 'hanafi': 2}
+
+DEFAULT_ASR = 'shafi'
+
+# How Fajr and Isha are bounded when twilight lasts all night
+HIGH_LATITUDE_RULES = ('none', 'night_middle', 'one_seventh', 'angle_based')
+
+DEFAULT_HIGH_LATITUDE_RULE = 'night_middle'
+
+# Sun's upper limb on the horizon, with refraction
+SUNRISE_ANGLE = 0.833
+
+PRAYERS = ('Fajr', 'Sunrise', 'Dhuhr', 'Asr', 'Maghrib', 'Isha')
+
+# Supported Indian cities: (latitude, longitude)
+CITY_COORDINATES = {
+    'Delhi': (28.6139, 77.2090),
+    'Mumbai': (19.0760, 72.8777),
+    'Bengaluru': (12.9716, 77.5946),
+    'Hyderabad': (17.3850, 78.4867),
+    'Chennai': (13.0827, 80.2707),
+    'Kolkata': (22.5726, 88.3639),
+    'Lucknow': (26.8467, 80.9462),
+    'Ahmedabad': (23.0225, 72.5714),
+    'Pune': (18.5204, 73.8567),
+    'Jaipur': (26.9124, 75.7873),
+    'Surat': (21.1702, 72.8311),
+    'Kanpur': (26.4499, 80.3319),
+    'Nagpur': (21.1458, 79.0882),
+    'Patna': (25.5941, 85.1376),
+    'Indore': (22.7196, 75.8577),
+    'Thane': (19.2183, 72.9781),
+    'Bhopal': (23.2599, 77.4126),
+    'Visakhapatnam': (17.6868, 83.2185),
+    'Vadodara': (22.3072, 73.1812),
+    'Ghaziabad': (28.6692, 77.4538),
+}
+
+# India Standard Time
+CITY_TIMEZONE = 'Asia/Kolkata'
+CITY_UTC_OFFSET = 5.5
+
+# Julian day of 0001-01-01 at 00:00 UT, so jd = ordinal + this
+_JD_ORDINAL = 1721424.5
+_J2000 = 2451545.0
+
+
+def sun_position(jd):
+    """(declination in degrees, equation of time in hours) at a Julian day"""
+    d = jd - _J2000
+    g = radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    ecliptic = radians(q + 1.915 * sin(g) + 0.020 * sin(2 * g))
+    obliquity = radians(23.439 - 0.00000036 * d)
+    right_ascension = degrees(atan2(cos(obliquity) * sin(ecliptic), cos(ecliptic))) / 15
+    equation = (q / 15 - right_ascension + 12) % 24 - 12
+    return degrees(asin(sin(obliquity) * sin(ecliptic))), equation
+
+
+def _night_portion(rule, angle, night):
+    if rule == 'angle_based':
+        return night * angle / 60
+    if rule == 'one_seventh':
+        return night / 7
+    return night / 2
+
+
+def _offset(base, hours, sign=1):
+    return base + sign * hours if base is not None and hours is not None else None
+
+
+def solar_days(latitude, longitude, days, utc_offset=CITY_UTC_OFFSET):
+    """(declinations, solar noons in hours) for a list of dates; the same for every method"""
+    suns = [sun_position(day.toordinal() + _JD_ORDINAL + 0.5 - longitude / 360) for day in days]
+    base = 12 + utc_offset - longitude / 15
+    return [declination for declination, _ in suns], [base - equation for _, equation in suns]
+
+
+def times_columns(latitude, longitude, days, utc_offset=CITY_UTC_OFFSET, method=DEFAULT_METHOD,
+                  asr=DEFAULT_ASR, high_latitude=DEFAULT_HIGH_LATITUDE_RULE, solar=None):
+    """{prayer: [decimal hours or None for each date]}, one pass per prayer over all dates.
+
+    solar is solar_days() for the same location and dates, when already computed.
+    """
+    params = METHODS[method]
+    factor = ASR_FACTORS[asr]
+    declinations, noons = solar or solar_days(latitude, longitude, days, utc_offset)
+
+    # cos(hour angle) = (sin(altitude) - sin(lat) sin(decl)) / (cos(lat) cos(decl))
+    phi = radians(latitude)
+    offsets = [sin(phi) * sin(radians(declination)) for declination in declinations]
+    scales = [cos(phi) * cos(radians(declination)) for declination in declinations]
+
+    def hour_angles(altitudes):
+        """Hours between solar noon and each day's sun altitude, or None if never reached"""
+        cosines = [(sin_altitude - offset) / scale for sin_altitude, offset, scale in zip(altitudes, offsets, scales)]
+        return [degrees(acos(x)) / 15 if -1 <= x <= 1 else None for x in cosines]
+
+    def below_horizon(angle):
+        return hour_angles([-sin(radians(angle))] * len(noons))
+
+    rise_set = below_horizon(SUNRISE_ANGLE)
+    sunrise = [_offset(noon, hours, -1) for noon, hours in zip(noons, rise_set)]
+    sunset = [_offset(noon, hours) for noon, hours in zip(noons, rise_set)]
+    # Asr when a shadow is factor times its object's length plus the noon shadow
+    asr_altitudes = [
+        sin(atan(1 / (factor + tan(radians(abs(latitude - declination)))))) for declination in declinations
+    ]
+    asr_times = [_offset(noon, hours) for noon, hours in zip(noons, hour_angles(asr_altitudes))]
+    fajr = [_offset(noon, hours, -1) for noon, hours in zip(noons, below_horizon(params['fajr']))]
+    if 'isha_minutes' in params:
+        isha = [_offset(maghrib, params['isha_minutes'] / 60) for maghrib in sunset]
+    else:
+        isha = [_offset(noon, hours) for noon, hours in zip(noons, below_horizon(params['isha']))]
+
+    if high_latitude != 'none':
+        for i, (rise, set_) in enumerate(zip(sunrise, sunset)):
+            if rise is None:
+                continue
+            night = 24 - (set_ - rise)
+            limit = _night_portion(high_latitude, params['fajr'], night)
+            if fajr[i] is None or rise - fajr[i] > limit:
+                fajr[i] = rise - limit
+            if 'isha' in params:
+                limit = _night_portion(high_latitude, params['isha'], night)
+                if isha[i] is None or isha[i] - set_ > limit:
+                    isha[i] = set_ + limit
+
+    return {'Fajr': fajr, 'Sunrise': sunrise, 'Dhuhr': noons, 'Asr': asr_times, 'Maghrib': sunset, 'Isha': isha}
+
+
+def day_times(latitude, longitude, day, utc_offset=CITY_UTC_OFFSET, method=DEFAULT_METHOD,
+              asr=DEFAULT_ASR, high_latitude=DEFAULT_HIGH_LATITUDE_RULE):
+    """{prayer: decimal hours or None} for one date"""
+    columns = times_columns(latitude, longitude, [day], utc_offset, method, asr, high_latitude)
+    return {prayer: column[0] for prayer, column in columns.items()}
+
+
+def format_time(hours):
+    """'HH:MM' (24-hour, rounded to the minute) for decimal hours, or None"""
+    if hours is None:
+        return None
+    minutes = int(hours * 60 + 0.5) % 1440
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def prayer_times(latitude, longitude, day=None, utc_offset=CITY_UTC_OFFSET, method=DEFAULT_METHOD,
+                 asr=DEFAULT_ASR, high_latitude=DEFAULT_HIGH_LATITUDE_RULE):
+    """{prayer: 'HH:MM'} for one date (today by default)"""
+    times = day_times(latitude, longitude, day or date.today(), utc_offset, method, asr, high_latitude)
+    return {prayer: format_time(times[prayer]) for prayer in PRAYERS}
+
+
+def date_range_times(latitude, longitude, start, days, utc_offset=CITY_UTC_OFFSET, method=DEFAULT_METHOD,
+                     asr=DEFAULT_ASR, high_latitude=DEFAULT_HIGH_LATITUDE_RULE, solar=None):
+    """[(date, {prayer: 'HH:MM'})] for consecutive days from start"""
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    columns = times_columns(latitude, longitude, dates, utc_offset, method, asr, high_latitude, solar)
+    formatted = [[format_time(hours) for hours in columns[prayer]] for prayer in PRAYERS]
+    return [(day, dict(zip(PRAYERS, times))) for day, times in zip(dates, zip(*formatted))]
+
+
+def year_days(year):
+    start = date(year, 1, 1)
+    return [start + timedelta(days=offset) for offset in range((date(year + 1, 1, 1) - start).days)]
+
+
+def year_times(latitude, longitude, year, **options):
+    """[(date, {prayer: 'HH:MM'})] for every day of a year"""
+    return date_range_times(latitude, longitude, date(year, 1, 1), len(year_days(year)), **options)
+
+
+def city_coordinates(city):
+    """(canonical name, (latitude, longitude)) for a supported city, case-insensitively, or None"""
+    key = city.strip().lower()
+    for name, coordinates in CITY_COORDINATES.items():
+        if name.lower() == key:
+            return name, coordinates
+    return None
@@ -0,0 +1,100 @@
+"""
+Prayer timetable export
+
+Generators that turn (city, date, times) rows into CSV, iCalendar or JSON
+text a line at a time, so a response can start as soon as the first day is
+ready and never holds the whole timetable in memory.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from services.prayer_calc import CITY_UTC_OFFSET, PRAYERS
+
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'ics': 'text/calendar',
+}
+
+# Prayers written to calendars as events; Sunrise marks the end of Fajr, not a prayer
+ICS_PRAYERS = ('Fajr', 'Dhuhr', 'Asr', 'Maghrib', 'Isha')
+
+# Length given to each prayer's calendar event
+ICS_EVENT_MINUTES = 15
+
+ICS_PRODUCT_ID = '-//Al-Masjid Al-Kareem//Prayer Timetable//EN'
+
+
+def csv_lines(rows):
+    """Header then one CSV line per city and day"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    yield line(['city', 'date'] + [prayer.lower() for prayer in PRAYERS])
+    for city, day, times in rows:
+        yield line([city, day.isoformat()] + [times[prayer] or '' for prayer in PRAYERS])
+
+
+def _ics_timestamp(day, time_str, utc_offset):
+    """UTC iCalendar timestamp for a local 'HH:MM' on a date"""
+    hour, minute = map(int, time_str.split(':'))
+    moment = datetime(day.year, day.month, day.day, hour, minute) - timedelta(hours=utc_offset)
+    return f'{moment.year:04d}{moment.month:02d}{moment.day:02d}T{moment.hour:02d}{moment.minute:02d}00Z'
+
+
+def ics_lines(rows, method, utc_offset=CITY_UTC_OFFSET):
+    """A VCALENDAR with one VEVENT per prayer, CRLF-terminated as RFC 5545 requires"""
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    yield (
+        'BEGIN:VCALENDAR\r\nVERSION:2.0\r\n'
+        f'PRODID:{ICS_PRODUCT_ID}\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n'
+        f'X-WR-CALNAME:Prayer times ({method})\r\n'
+    )
+    for city, day, times in rows:
+        uid_day = day.isoformat().replace('-', '')
+        events = []
+        for prayer in ICS_PRAYERS:
+            if not times[prayer]:
+                continue
+            events.append(
+                'BEGIN:VEVENT\r\n'
+                f'UID:{uid_day}-{prayer.lower()}-{city.lower()}-{method.lower()}@al-masjid-al-kareem\r\n'
+                f'DTSTAMP:{stamp}\r\n'
+                f'DTSTART:{_ics_timestamp(day, times[prayer], utc_offset)}\r\n'
+                f'DURATION:PT{ICS_EVENT_MINUTES}M\r\n'
+                f'SUMMARY:{prayer} ({city})\r\n'
+                'TRANSP:TRANSPARENT\r\n'
+                'END:VEVENT\r\n'
+            )
+        yield ''.join(events)
+    yield 'END:VCALENDAR\r\n'
+
+
+def json_lines(rows, meta):
+    """A JSON object with the request's metadata and a 'days' array, one day per line"""
+    head = json.dumps(meta, ensure_ascii=False)
+    yield head[:-1] + ', "days": [\n'
+    separator = ''
+    for city, day, times in rows:
+        yield separator + json.dumps({'city': city, 'date': day.isoformat(), 'times': times})
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+def export_lines(export_format, rows, meta):
+    """Text chunks of a timetable in one of EXPORT_FORMATS"""
+    if export_format == 'csv':
+        return csv_lines(rows)
+    if export_format == 'ics':
+        return ics_lines(rows, meta['method'])
+    return json_lines(rows, meta)
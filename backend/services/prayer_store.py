@@ -0,0 +1,102 @@
+"""
+Precomputed prayer timetables
+
+Whole years of prayer times for every supported city and calculation method
+are generated column-wise over the year's dates, sharing each city's sun
+positions between methods, and bulk-inserted into prayer_times. The unique
+(city, date, method) index then makes any day's times a single lookup.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, PrayerTime
+from services.prayer_calc import (
+    CITY_COORDINATES, CITY_UTC_OFFSET, DEFAULT_ASR, DEFAULT_HIGH_LATITUDE_RULE, METHODS, PRAYERS,
+    date_range_times, format_time, solar_days, times_columns, year_days
+)
+
+# Days calculated or read per step when streaming a timetable
+TIMETABLE_CHUNK_DAYS = 31
+
+
+def timetable_rows(city, year, methods):
+    """prayer_times mappings for one city, year and list of methods (default Asr and high-latitude rule)"""
+    latitude, longitude = CITY_COORDINATES[city]
+    days = year_days(year)
+    solar = solar_days(latitude, longitude, days, CITY_UTC_OFFSET)
+    rows = []
+    for method in methods:
+        columns = times_columns(latitude, longitude, days, CITY_UTC_OFFSET, method, solar=solar)
+        formatted = [[format_time(hours) for hours in columns[prayer]] for prayer in PRAYERS]
+        for day, times in zip(days, zip(*formatted)):
+            # Days the sun never reaches an angle have no row; lookups fall back to calculating
+            if None not in times:
+                row = dict(zip((prayer.lower() for prayer in PRAYERS), times))
+                row.update(city=city, date=day, method=method)
+                rows.append(row)
+    return rows
+
+
+def generate_timetables(years, cities=None, methods=None, log=print):
+    """Replace the stored timetables for the given years, cities and methods; returns rows written"""
+    cities = cities or list(CITY_COORDINATES)
+    methods = methods or list(METHODS)
+    total = 0
+    for year in years:
+        for city in cities:
+            rows = timetable_rows(city, year, methods)
+            PrayerTime.query.filter(
+                PrayerTime.city == city,
+                PrayerTime.method.in_(methods),
+                PrayerTime.date.between(date(year, 1, 1), date(year, 12, 31))
+            ).delete(synchronize_session=False)
+            db.session.execute(PrayerTime.__table__.insert(), rows)
+            db.session.commit()
+            total += len(rows)
+        log(f"{year}: {len(cities)} cities x {len(methods)} methods")
+    return total
+
+
+def stored_times(city, day, method):
+    """{prayer: 'HH:MM'} from the stored timetable, or None if that day is not stored"""
+    try:
+        row = PrayerTime.query.filter_by(city=city, date=day, method=method).first()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return None
+    if row is None:
+        return None
+    return {prayer: getattr(row, prayer.lower()) for prayer in PRAYERS}
+
+
+def timetable(city, start, end, method, asr=DEFAULT_ASR, high_latitude=DEFAULT_HIGH_LATITUDE_RULE,
+              chunk_days=TIMETABLE_CHUNK_DAYS):
+    """Yield (date, {prayer: 'HH:MM'}) for a city from start to end inclusive.
+
+    Stored rows are streamed when the whole range is stored; otherwise the
+    times are calculated a chunk of days at a time, so memory stays flat
+    however long the range is.
+    """
+    latitude, longitude = CITY_COORDINATES[city]
+    days = (end - start).days + 1
+    if asr == DEFAULT_ASR and high_latitude == DEFAULT_HIGH_LATITUDE_RULE:
+        rows = PrayerTime.query.filter(
+            PrayerTime.city == city, PrayerTime.method == method, PrayerTime.date.between(start, end)
+        )
+        try:
+            stored = rows.count() == days
+        except SQLAlchemyError:
+            db.session.rollback()
+            stored = False
+        if stored:
+            for row in rows.order_by(PrayerTime.date).yield_per(chunk_days):
+                yield row.date, {prayer: getattr(row, prayer.lower()) for prayer in PRAYERS}
+            return
+
+    for offset in range(0, days, chunk_days):
+        yield from date_range_times(
+            latitude, longitude, start + timedelta(days=offset), min(chunk_days, days - offset),
+            CITY_UTC_OFFSET, method, asr, high_latitude
+        )
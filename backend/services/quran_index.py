@@ -0,0 +1,119 @@
+"""
+Juz (para), hizb and rub al-hizb boundaries
+
+Static tables of where every division of the mushaf starts, plus helpers
+that turn them into (surah, ayah) ranges. Verses are addressed by a global
+0-based offset (0 = 1:1, 6235 = 114:6) so ranges can be sliced without
+loading whole surahs.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+# Number of ayahs in each surah, in mushaf order
+SURAH_AYAH_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98,
+    135, 112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88,
+    75, 85, 54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29,
+    22, 24, 13, 14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31,
+    50, 40, 46, 42, 29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8,
+    19, 5, 8, 8, 11, 11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6,
+)
+
+TOTAL_AYAHS = sum(SURAH_AYAH_COUNTS)
+
+# First ayah of each of the 240 rub al-hizb (quarter hizb). Every 4th entry
+# starts a hizb and every 8th starts a juz.
+RUB_STARTS = (
+    (1, 1), (2, 26), (2, 44), (2, 60), (2, 75), (2, 92), (2, 106), (2, 124),  # Juz 1
+    (2, 142), (2, 158), (2, 177), (2, 189), (2, 203), (2, 219), (2, 233), (2, 243),  # Juz 2
+    (2, 253), (2, 263), (2, 272), (2, 283), (3, 15), (3, 33), (3, 52), (3, 75),  # Juz 3
+    (3, 93), (3, 113), (3, 133), (3, 153), (3, 171), (3, 186), (4, 1), (4, 12),  # Juz 4
+    (4, 24), (4, 36), (4, 58), (4, 74), (4, 88), (4, 100), (4, 114), (4, 135),  # Juz 5
+    (4, 148), (4, 163), (5, 1), (5, 12), (5, 27), (5, 41), (5, 51), (5, 67),  # Juz 6
+    (5, 82), (5, 97), (5, 109), (6, 13), (6, 36), (6, 59), (6, 74), (6, 95),  # Juz 7
+    (6, 111), (6, 127), (6, 141), (6, 151), (7, 1), (7, 31), (7, 47), (7, 65),  # Juz 8
+    (7, 88), (7, 117), (7, 142), (7, 156), (7, 171), (7, 189), (8, 1), (8, 22),  # Juz 9
+    (8, 41), (8, 61), (9, 1), (9, 19), (9, 34), (9, 46), (9, 60), (9, 75),  # Juz 10
+    (9, 93), (9, 111), (9, 122), (10, 11), (10, 26), (10, 53), (10, 71), (10, 90),  # Juz 11
+    (11, 6), (11, 24), (11, 41), (11, 61), (11, 84), (11, 108), (12, 7), (12, 30),  # Juz 12
+    (12, 53), (12, 77), (12, 101), (13, 5), (13, 19), (13, 35), (14, 10), (14, 28),  # Juz 13
+    (15, 1), (15, 49), (16, 1), (16, 30), (16, 51), (16, 75), (16, 90), (16, 111),  # Juz 14
+    (17, 1), (17, 23), (17, 50), (17, 70), (17, 99), (18, 17), (18, 32), (18, 51),  # Juz 15
+    (18, 75), (18, 99), (19, 22), (19, 59), (20, 1), (20, 55), (20, 83), (20, 111),  # Juz 16
+    (21, 1), (21, 29), (21, 51), (21, 83), (22, 1), (22, 19), (22, 38), (22, 60),  # Juz 17
+    (23, 1), (23, 36), (23, 75), (24, 1), (24, 21), (24, 35), (24, 53), (25, 1),  # Juz 18
+    (25, 21), (25, 53), (26, 1), (26, 52), (26, 111), (26, 181), (27, 1), (27, 27),  # Juz 19
+    (27, 56), (27, 82), (28, 12), (28, 29), (28, 51), (28, 76), (29, 1), (29, 26),  # Juz 20
+    (29, 46), (30, 1), (30, 31), (30, 54), (31, 22), (32, 11), (33, 1), (33, 18),  # Juz 21
+    (33, 31), (33, 51), (33, 60), (34, 10), (34, 24), (34, 46), (35, 15), (35, 41),  # Juz 22
+    (36, 28), (36, 60), (37, 22), (37, 83), (37, 145), (38, 21), (38, 52), (39, 8),  # Juz 23
+    (39, 32), (39, 53), (40, 1), (40, 21), (40, 41), (40, 66), (41, 9), (41, 25),  # Juz 24
+    (41, 47), (42, 13), (42, 27), (42, 51), (43, 24), (43, 57), (44, 17), (45, 12),  # Juz 25
+    (46, 1), (46, 21), (47, 10), (47, 33), (48, 18), (49, 1), (49, 14), (50, 27),  # Juz 26
+    (51, 31), (52, 24), (53, 26), (54, 9), (55, 1), (56, 1), (56, 75), (57, 16),  # Juz 27
+    (58, 1), (58, 14), (59, 11), (60, 7), (62, 1), (63, 4), (65, 1), (66, 1),  # Juz 28
+    (67, 1), (68, 1), (69, 1), (70, 19), (72, 1), (73, 20), (75, 1), (76, 19),  # Juz 29
+    (78, 1), (80, 1), (82, 1), (84, 1), (87, 1), (90, 1), (94, 1), (100, 9),  # Juz 30
+)
+
+HIZB_STARTS = RUB_STARTS[::4]
+JUZ_STARTS = RUB_STARTS[::8]
+
+# Offset of the first ayah of each surah
+_SURAH_OFFSETS = (0,) + tuple(accumulate(SURAH_AYAH_COUNTS))[:-1]
+
+DIVISIONS = {
+    'juz': JUZ_STARTS,
+    'hizb': HIZB_STARTS,
+    'rub': RUB_STARTS
+}
+
+
+def verse_offset(surah, ayah):
+    """Global 0-based offset of a verse"""
+    if surah < 1 or surah > len(SURAH_AYAH_COUNTS) or ayah < 1 or ayah > SURAH_AYAH_COUNTS[surah - 1]:
+        raise ValueError(f'Invalid verse {surah}:{ayah}')
+    return _SURAH_OFFSETS[surah - 1] + ayah - 1
+
+
+def verse_at(offset):
+    """(surah, ayah) for a global 0-based offset"""
+    if offset < 0 or offset >= TOTAL_AYAHS:
+        raise ValueError(f'Invalid verse offset {offset}')
+    surah = bisect_right(_SURAH_OFFSETS, offset)
+    return surah, offset - _SURAH_OFFSETS[surah - 1] + 1
+
+
+def _offset_ranges(starts):
+    offsets = [verse_offset(surah, ayah) for surah, ayah in starts]
+    return tuple(zip(offsets, offsets[1:] + [TOTAL_AYAHS]))
+
+
+# Half-open [start, end) offset ranges for every division
+DIVISION_RANGES = {kind: _offset_ranges(starts) for kind, starts in DIVISIONS.items()}
+JUZ_RANGES = DIVISION_RANGES['juz']
+
+
+def division_range(kind, number):
+    """Half-open offset range of the given juz, hizb or rub (1-based)"""
+    ranges = DIVISION_RANGES[kind]
+    if number < 1 or number > len(ranges):
+        raise ValueError(f'{kind.capitalize()} number must be between 1 and {len(ranges)}')
+    return ranges[number - 1]
+
+
+def surah_segments(start, end):
+    """Split an offset range into (surah, first_ayah, last_ayah) pieces"""
+    segments = []
+    offset = start
+    while offset < end:
+        surah, ayah = verse_at(offset)
+        last = min(SURAH_AYAH_COUNTS[surah - 1], ayah + (end - offset) - 1)
+        segments.append((surah, ayah, last))
+        offset += last - ayah + 1
+    return segments
+
+
+def juz_segments(juz_number):
+    return surah_segments(*division_range('juz', juz_number))
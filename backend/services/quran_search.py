@@ -0,0 +1,163 @@
+"""
+Offline Quran search
+
+An in-process inverted index over the Uthmani Arabic text and the English
+translation held by the local Quran store. Arabic is normalized (tashkeel
+stripped, alef/hamza forms unified, taa marbuta folded) on both the index
+and the query side, and results are ranked with BM25.
+"""
+
+import heapq
+import html
+import math
+import re
+import threading
+
+from services.quran_store import quran_store, DEFAULT_TRANSLATION
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words of translation context kept on each side of the first match
+SNIPPET_CONTEXT = 12
+
+# Harakat, Quranic annotation marks, dagger alef and tatweel
+_TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_ARABIC_FOLD = str.maketrans({
+    'آ': 'ا',  # alef madda
+    'أ': 'ا',  # alef hamza above
+    'إ': 'ا',  # alef hamza below
+    'ٱ': 'ا',  # alef wasla
+    'ٲ': 'ا',
+    'ٳ': 'ا',
+    'ؤ': 'و',  # waw hamza
+    'ئ': 'ي',  # yeh hamza
+    'ى': 'ي',  # alef maksura
+    'ة': 'ه',  # taa marbuta
+})
+_TAGS = re.compile(r'<sup[^>]*>.*?</sup>|<[^>]+>')
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize_arabic(text):
+    """Strip diacritics and fold letter variants so spellings compare equal"""
+    return _TASHKEEL.sub('', text).translate(_ARABIC_FOLD)
+
+
+def strip_tags(text):
+    """Drop footnote markers and other markup from translation text"""
+    return _TAGS.sub('', text or '')
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize_arabic(text).lower())
+
+
+class QuranSearchIndex:
+    """Inverted index built lazily from the Quran store"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = {}  # term -> {doc: term frequency}
+        self._docs = []
+        self._lengths = []
+        self._avg_length = 0.0
+
+    def _ensure_built(self):
+        if self._version == self._store.version:
+            return
+        with self._lock:
+            if self._version == self._store.version:
+                return
+            postings, docs, lengths = {}, [], []
+            for doc, verse in enumerate(self._store.iter_verses()):
+                tokens = tokenize(verse['text_uthmani']) + tokenize(strip_tags(verse['translation']))
+                for token in tokens:
+                    entry = postings.setdefault(token, {})
+                    entry[doc] = entry.get(doc, 0) + 1
+                docs.append(verse)
+                lengths.append(len(tokens))
+
+            self._postings = postings
+            self._docs = docs
+            self._lengths = lengths
+            self._avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+            self._version = self._store.version
+
+    @property
+    def is_ready(self):
+        self._ensure_built()
+        return bool(self._docs)
+
+    def search(self, query, page=1, size=20):
+        """Return (total, [(score, verse, terms)]) for one page of results"""
+        self._ensure_built()
+        terms = set(tokenize(query))
+        scores = {}
+        total_docs = len(self._docs)
+        for term in terms:
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc, tf in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc] / self._avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        # Ties keep mushaf order
+        top = heapq.nlargest(page * size, scores.items(), key=lambda item: (item[1], -item[0]))
+        results = [(score, self._docs[doc], terms) for doc, score in top[(page - 1) * size:]]
+        return len(scores), results
+
+
+def _matches(word, terms):
+    return any(token in terms for token in tokenize(word))
+
+
+def highlight(text, terms):
+    """Wrap every word matching a query term in <em> tags"""
+    words = html.escape(text).split(' ')
+    return ' '.join(f'<em>{word}</em>' if _matches(word, terms) else word for word in words)
+
+
+def snippet(text, terms, context=SNIPPET_CONTEXT):
+    """Highlighted window of the text around its first matching word"""
+    words = strip_tags(text).split()
+    first = next((i for i, word in enumerate(words) if _matches(word, terms)), 0)
+    start = max(0, first - context)
+    end = min(len(words), first + context + 1)
+    body = highlight(' '.join(words[start:end]), terms)
+    return ('… ' if start > 0 else '') + body + (' …' if end < len(words) else '')
+
+
+def format_results(query, total, results, page, size):
+    """Shape results like the Quran.com search API"""
+    return {
+        'search': {
+            'query': query,
+            'total_results': total,
+            'current_page': page,
+            'total_pages': math.ceil(total / size) if total else 0,
+            'per_page': size,
+            'results': [
+                {
+                    'verse_key': verse['verse_key'],
+                    'verse_id': verse['id'],
+                    'text': verse['text_uthmani'],
+                    'highlighted': highlight(verse['text_uthmani'], terms),
+                    'score': round(score, 4),
+                    'translations': [{
+                        'resource_id': DEFAULT_TRANSLATION,
+                        'text': snippet(verse['translation'], terms)
+                    }]
+                }
+                for score, verse, terms in results
+            ]
+        }
+    }
+
+
+search_index = QuranSearchIndex(quran_store)
@@ -0,0 +1,215 @@
+"""
+Local Quran corpus store
+
+The full Quran text is imported once into the quran_surahs and quran_ayahs
+tables (``flask --app app import-quran``) and held in memory after the first
+read, so surah, verse and para lookups never go to the network.
+"""
+
+import threading
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, QuranSurah, QuranAyah, QuranWord
+from services.data_versions import ImportWatch, bump_version
+from services.quran_index import TOTAL_AYAHS, surah_segments
+from services.upstream import upstream
+
+# Quran.com API base URL
+QURAN_API_BASE = "https://api.quran.com/api/v4"
+
+TOTAL_SURAHS = 114
+
+# Saheeh International (English)
+DEFAULT_TRANSLATION = 20
+
+# Quran.com caps per_page at 50 for verse listings
+IMPORT_PAGE_SIZE = 50
+
+
+class QuranStore:
+    """In-memory view of the imported Quran tables"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._chapters = {}
+        self._verses = {}
+        self._total_ayahs = 0
+        self._version = 0
+        self._imports = ImportWatch('quran')
+
+    def _ensure_loaded(self):
+        # Imports run in another process; pick them up within IMPORT_CHECK_INTERVAL
+        if self._loaded and self._imports.changed():
+            self.invalidate()
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._imports.mark_loaded()
+            chapters, verses = {}, {}
+            try:
+                for surah in QuranSurah.query.all():
+                    chapters[surah.number] = surah.to_dict()
+                for ayah in QuranAyah.query.order_by(QuranAyah.id):
+                    verses.setdefault(ayah.surah_number, []).append(ayah.to_dict())
+            except SQLAlchemyError as e:
+                # Tables not created yet - behave as an empty store until an import is recorded
+                print(f"Quran store unavailable: {e}")
+                db.session.rollback()
+                chapters, verses = {}, {}
+
+            self._chapters = chapters
+            self._verses = verses
+            self._total_ayahs = sum(len(v) for v in verses.values())
+            self._version += 1
+            self._loaded = True
+
+    def invalidate(self):
+        """Drop the in-memory copy so the next lookup reloads from the database"""
+        with self._lock:
+            self._loaded = False
+
+    @property
+    def version(self):
+        """Bumped on every reload so derived indexes know when to rebuild"""
+        self._ensure_loaded()
+        return self._version
+
+    @property
+    def is_complete(self):
+        """True once all 6,236 ayahs have been imported"""
+        self._ensure_loaded()
+        return len(self._chapters) == TOTAL_SURAHS and self._total_ayahs == TOTAL_AYAHS
+
+    def chapters(self):
+        """All surahs in order, or None if the import is incomplete"""
+        if not self.is_complete:
+            return None
+        return [self._chapters[number] for number in sorted(self._chapters)]
+
+    def get_chapter(self, surah_id):
+        self._ensure_loaded()
+        return self._chapters.get(surah_id)
+
+    def get_verses(self, surah_id):
+        """Verses of a surah, or None unless every ayah of it is stored"""
+        self._ensure_loaded()
+        chapter = self._chapters.get(surah_id)
+        verses = self._verses.get(surah_id)
+        if not chapter or not verses or len(verses) != chapter['verses_count']:
+            return None
+        return verses
+
+    def get_verse(self, surah_id, ayah_number):
+        verses = self.get_verses(surah_id)
+        if verses is None or ayah_number < 1 or ayah_number > len(verses):
+            return None
+        return verses[ayah_number - 1]
+
+    def iter_verses(self):
+        """Every stored verse in mushaf order"""
+        self._ensure_loaded()
+        for surah_id in sorted(self._verses):
+            yield from self._verses[surah_id]
+
+    def get_range(self, start, end):
+        """Verses in the half-open global offset range [start, end), or None if any are missing"""
+        verses = []
+        for surah_id, first, last in surah_segments(start, end):
+            surah_verses = self.get_verses(surah_id)
+            if surah_verses is None:
+                return None
+            verses.extend(surah_verses[first - 1:last])
+        return verses
+
+
+quran_store = QuranStore()
+
+
+def fetch_chapter_verses(surah_id, translation_id=DEFAULT_TRANSLATION, timeout=30):
+    """Fetch every verse of a surah, with its words, from Quran.com following pagination"""
+    verses = []
+    page = 1
+    while page:
+        response = upstream.get(
+            f"{QURAN_API_BASE}/verses/by_chapter/{surah_id}",
+            params={
+                'words': 'true',
+                'word_fields': 'text_uthmani',
+                'translations': str(translation_id),
+                'fields': 'text_uthmani,juz_number,rub_el_hizb_number,page_number',
+                'per_page': IMPORT_PAGE_SIZE,
+                'page': page
+            },
+            timeout=timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        verses.extend(data.get('verses', []))
+        page = (data.get('pagination') or {}).get('next_page')
+    return verses
+
+
+def import_corpus(translation_id=DEFAULT_TRANSLATION, log=print):
+    """Load all surahs and ayahs from Quran.com into the local tables"""
+    response = upstream.get(f"{QURAN_API_BASE}/chapters", timeout=30)
+    response.raise_for_status()
+    chapters = response.json().get('chapters', [])
+
+    imported = 0
+    for chapter in chapters:
+        verses = fetch_chapter_verses(chapter['id'], translation_id)
+        if not verses:
+            raise RuntimeError(f"No verses returned for surah {chapter['id']}")
+
+        db.session.merge(QuranSurah(
+            number=chapter['id'],
+            name=chapter.get('name_arabic', ''),
+            english_name=chapter.get('name_simple', ''),
+            translated_name=(chapter.get('translated_name') or {}).get('name'),
+            number_of_ayahs=chapter.get('verses_count', len(verses)),
+            revelation_type='Medinan' if chapter.get('revelation_place') == 'madinah' else 'Meccan',
+            revelation_order=chapter.get('revelation_order'),
+            para=verses[0].get('juz_number', 1)
+        ))
+
+        # Words are replaced wholesale rather than merged row by row
+        verse_ids = [verse['id'] for verse in verses]
+        QuranWord.query.filter(QuranWord.verse_id.between(min(verse_ids), max(verse_ids))).delete(
+            synchronize_session=False
+        )
+
+        for verse in verses:
+            translations = verse.get('translations') or [{}]
+            surah_number, ayah_number = map(int, verse['verse_key'].split(':'))
+            words = [word for word in verse.get('words', []) if word.get('char_type_name', 'word') == 'word']
+            db.session.merge(QuranAyah(
+                id=verse['id'],
+                surah_number=surah_number,
+                ayah_number=ayah_number,
+                verse_key=verse['verse_key'],
+                arabic_text=verse.get('text_uthmani', ''),
+                translation=translations[0].get('text', ''),
+                transliteration=' '.join((word.get('transliteration') or {}).get('text') or '' for word in words) or None,
+                para=verse.get('juz_number'),
+                rub_el_hizb=verse.get('rub_el_hizb_number'),
+                page=verse.get('page_number')
+            ))
+            db.session.add_all(QuranWord(
+                verse_id=verse['id'],
+                position=word['position'],
+                text_uthmani=word.get('text_uthmani', ''),
+                transliteration=(word.get('transliteration') or {}).get('text'),
+                translation=(word.get('translation') or {}).get('text')
+            ) for word in words)
+
+        db.session.commit()
+        imported += len(verses)
+        log(f"Surah {chapter['id']}: {len(verses)} ayahs")
+
+    bump_version('quran')
+    quran_store.invalidate()
+    return imported
@@ -0,0 +1,51 @@
+"""
+Bitmap reading progress
+
+A user's progress is a single 6236-bit bitmap (780 bytes) in mushaf order,
+so marking any range of ayahs is one mask operation and a para's completion
+is a popcount over its precomputed offset range.
+"""
+
+from services.quran_index import JUZ_RANGES, TOTAL_AYAHS
+
+BITMAP_BYTES = (TOTAL_AYAHS + 7) // 8
+
+
+def to_bits(bitmap):
+    """Bitmap bytes as an int whose bit n is global ayah n"""
+    return int.from_bytes(bitmap or b'', 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def range_mask(start, end):
+    """Mask covering the half-open offset range [start, end)"""
+    return ((1 << (end - start)) - 1) << start
+
+
+def mark_ranges(bits, ranges, read=True):
+    """Set (or clear) every [start, end) range of offsets"""
+    for start, end in ranges:
+        mask = range_mask(start, end)
+        bits = bits | mask if read else bits & ~mask
+    return bits
+
+
+def count_read(bits, start=0, end=TOTAL_AYAHS):
+    return (bits & range_mask(start, end)).bit_count()
+
+
+def para_progress(bits):
+    """Read count and completion percentage for each of the 30 paras"""
+    progress = []
+    for para, (start, end) in enumerate(JUZ_RANGES, 1):
+        read = count_read(bits, start, end)
+        progress.append({
+            'para': para,
+            'read': read,
+            'total': end - start,
+            'percent': round(100 * read / (end - start), 1)
+        })
+    return progress
@@ -0,0 +1,109 @@
+"""
+In-place schema upgrades
+
+db.create_all() only creates missing tables; it never changes an existing
+one. Columns and indexes added to existing tables are listed here and
+applied on startup when missing, so a deployed database picks them up
+without a manual migration. Unique indexes that first need existing rows
+deleted or renumbered are only cleaned up by `flask upgrade-db`; on startup
+they are skipped while conflicting rows remain. database/migrations/ has
+the same changes as SQL.
+"""
+
+from sqlalchemy import inspect, text
+
+from models import db
+
+# table -> [(column, column DDL, backfill SQL or None)]
+ADDED_COLUMNS = {
+    'bookmarks': [
+        ('deleted', 'BOOLEAN NOT NULL DEFAULT FALSE', None),
+        ('updated_at', 'TIMESTAMP', 'UPDATE bookmarks SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)'),
+        ('changed_at', 'TIMESTAMP', 'UPDATE bookmarks SET changed_at = COALESCE(updated_at, created_at, CURRENT_TIMESTAMP)'),
+    ],
+}
+
+# (index name, table, columns, unique, cleanup SQL run by `flask upgrade-db` first or None)
+ADDED_INDEXES = [
+    (
+        'uq_bookmarks_user_content', 'bookmarks', ('user_id', 'content_type', 'content_id'), True,
+        # Older databases may hold duplicate bookmarks; keep the newest of each
+        'DELETE FROM bookmarks WHERE id NOT IN '
+        '(SELECT MAX(id) FROM bookmarks GROUP BY user_id, content_type, content_id)'
+    ),
+    ('ix_bookmarks_user_type', 'bookmarks', ('user_id', 'content_type', 'id'), False, None),
+    ('ix_bookmarks_user_updated', 'bookmarks', ('user_id', 'updated_at'), False, None),
+    (
+        'uq_hadiths_collection_ordinal', 'hadiths', ('collection', 'ordinal'), True,
+        # Re-imports used to leave ordinals from the previous import behind; renumber in order
+        'UPDATE hadiths SET ordinal = (SELECT ranked.position FROM '
+        '(SELECT id, ROW_NUMBER() OVER (PARTITION BY collection ORDER BY ordinal, id) AS position FROM hadiths) ranked '
+        'WHERE ranked.id = hadiths.id)'
+    ),
+    (
+        'uq_prayer_times_city_date_method', 'prayer_times', ('city', 'date', 'method'), True,
+        'DELETE FROM prayer_times WHERE id NOT IN '
+        '(SELECT MAX(id) FROM prayer_times GROUP BY city, date, method)'
+    ),
+]
+
+
+def _existing_indexes(inspector, table):
+    """Names and column tuples of a table's indexes and unique constraints"""
+    names, columns = set(), set()
+    for index in inspector.get_indexes(table) + inspector.get_unique_constraints(table):
+        names.add(index['name'])
+        columns.add(tuple(index['column_names']))
+    return names, columns
+
+
+def _has_conflicts(connection, table, columns):
+    """Whether existing rows would break a unique index on these columns"""
+    grouped = ', '.join(columns)
+    return connection.execute(text(
+        f'SELECT 1 FROM {table} GROUP BY {grouped} HAVING COUNT(*) > 1 LIMIT 1'
+    )).first() is not None
+
+
+def upgrade_schema(log=print, cleanup=False):
+    """Add missing columns and indexes to existing tables; returns the changes made
+
+    Cleanup SQL that deletes or rewrites rows only runs when cleanup is set
+    (the upgrade-db command); otherwise an index it would unblock is skipped.
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    changes = []
+    with db.engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table)}
+            for column, ddl, backfill in columns:
+                if column in present:
+                    continue
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+                if backfill:
+                    connection.execute(text(backfill))
+                changes.append(f'{table}.{column}')
+
+        for name, table, columns, unique, prepare in ADDED_INDEXES:
+            if table not in tables:
+                continue
+            names, covered = _existing_indexes(inspector, table)
+            if name in names or (unique and columns in covered):
+                continue
+            if prepare:
+                if cleanup:
+                    connection.execute(text(prepare))
+                elif _has_conflicts(connection, table, columns):
+                    log(f"Schema upgrade: skipped {name}, existing rows conflict; run `flask upgrade-db`")
+                    continue
+            connection.execute(text(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+            ))
+            changes.append(name)
+
+    for change in changes:
+        log(f"Schema upgraded: added {change}")
+    return changes
@@ -0,0 +1,186 @@
+"""
+Shared client for upstream APIs
+
+Every outbound call goes through one pooled session with a circuit breaker
+per host. After repeated failures a host's breaker opens and calls to it fail
+immediately with CircuitOpenError, so routes drop to their fallbacks instead
+of holding a worker for the full timeout. After a cool-down a single probe
+call is let through (half-open); its outcome closes or re-opens the breaker.
+
+Calls made while handling a request also share a latency budget: each
+timeout is capped by what is left of it, so one request cannot chain several
+long upstream waits. Pool threads have no request context, so work a request
+hands to a pool is wrapped with upstream.with_budget() to carry its deadline.
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from flask import g, has_request_context
+
+# Consecutive failures that open a breaker
+FAILURE_THRESHOLD = 5
+
+# Seconds an open breaker waits before letting a probe call through
+RESET_TIMEOUT = 30
+
+# Seconds of upstream time one incoming request may spend in total
+REQUEST_BUDGET = 12
+
+# Connections kept per upstream host
+POOL_SIZE = 16
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's breaker is open"""
+
+
+class BudgetExceededError(requests.exceptions.Timeout):
+    """Raised when the current request has no upstream time left"""
+
+
+class CircuitBreaker:
+    """Failure tracking for one upstream host"""
+
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go out now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.last_error = None
+            self._probing = False
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def to_dict(self):
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'retry_in': retry_in,
+            'last_error': self.last_error
+        }
+
+
+class UpstreamClient:
+    """requests.get replacement with per-host breakers and a per-request budget"""
+
+    def __init__(self, request_budget=REQUEST_BUDGET):
+        self.request_budget = request_budget
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # deadline carried into pool threads
+
+    def breaker(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(host, CircuitBreaker(host))
+        return breaker
+
+    def deadline(self):
+        """Monotonic time the current request's budget runs out, or None outside a request"""
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None and has_request_context():
+            deadline = g.setdefault('upstream_deadline', time.monotonic() + self.request_budget)
+        return deadline
+
+    def with_budget(self, fn):
+        """Wrap fn so the calls it makes on a pool thread count against the current request's budget"""
+        deadline = self.deadline()
+
+        def budgeted(*args, **kwargs):
+            previous = getattr(self._local, 'deadline', None)
+            self._local.deadline = deadline
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.deadline = previous
+        return budgeted
+
+    def _budgeted_timeout(self, timeout):
+        """Cap a timeout by what is left of the current request's budget"""
+        deadline = self.deadline()
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BudgetExceededError('Upstream time budget for this request is spent')
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def get(self, url, timeout=10, **kwargs):
+        timeout = self._budgeted_timeout(timeout)
+        breaker = self.breaker(urlsplit(url).netloc)
+        if not breaker.allow():
+            raise CircuitOpenError(f'{breaker.host} is unavailable (circuit open)')
+        try:
+            response = self._session.get(url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure(str(e))
+            raise
+        except BaseException:
+            # Never leave a half-open breaker waiting on a probe that did not finish
+            breaker.record_failure('interrupted')
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(f'HTTP {response.status_code}')
+        else:
+            breaker.record_success()
+        return response
+
+    def snapshot(self):
+        return {host: breaker.to_dict() for host, breaker in sorted(self._breakers.items())}
+
+    @property
+    def is_degraded(self):
+        return any(breaker.state != CLOSED for breaker in self._breakers.values())
+
+
+upstream = UpstreamClient()
@@ -0,0 +1,137 @@
+"""
+Columnar word-by-word store
+
+Word data is kept per surah as parallel columns (position, Uthmani text,
+transliteration, translation) plus an offsets array marking where each
+verse's words start. A verse's words are a slice of every column, so
+responses are built without creating a dict per word.
+"""
+
+import threading
+from array import array
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, QuranWord
+from services.quran_index import SURAH_AYAH_COUNTS, verse_at
+from services.quran_store import quran_store
+
+WORD_COLUMNS = ('position', 'text_uthmani', 'transliteration', 'translation')
+
+
+class SurahWords:
+    """Word columns for one surah"""
+
+    __slots__ = ('surah_id', 'verse_starts', 'position', 'text_uthmani', 'transliteration', 'translation')
+
+    def __init__(self, surah_id):
+        self.surah_id = surah_id
+        self.verse_starts = array('I', [0])  # verse_starts[i]:verse_starts[i + 1] are ayah i + 1's words
+        self.position = array('H')
+        self.text_uthmani = []
+        self.transliteration = []
+        self.translation = []
+
+    def append_word(self, position, text, transliteration, translation):
+        self.position.append(position)
+        self.text_uthmani.append(text)
+        self.transliteration.append(transliteration or '')
+        self.translation.append(translation or '')
+
+    def end_verse(self):
+        self.verse_starts.append(len(self.position))
+
+    @property
+    def is_complete(self):
+        return len(self.verse_starts) == SURAH_AYAH_COUNTS[self.surah_id - 1] + 1
+
+    def verse_columns(self, ayah_number):
+        """Column slices for one ayah"""
+        start, end = self.verse_starts[ayah_number - 1], self.verse_starts[ayah_number]
+        return {
+            'verse_key': f'{self.surah_id}:{ayah_number}',
+            'position': self.position[start:end].tolist(),
+            'text_uthmani': self.text_uthmani[start:end],
+            'transliteration': self.transliteration[start:end],
+            'translation': self.translation[start:end]
+        }
+
+    @classmethod
+    def from_verses(cls, surah_id, verses):
+        """Build from Quran.com verse objects fetched with words=true"""
+        block = cls(surah_id)
+        for verse in sorted(verses, key=lambda v: v['verse_number']):
+            for word in verse.get('words', []):
+                if word.get('char_type_name', 'word') != 'word':
+                    continue
+                block.append_word(
+                    word['position'],
+                    word.get('text_uthmani', ''),
+                    (word.get('transliteration') or {}).get('text'),
+                    (word.get('translation') or {}).get('text')
+                )
+            block.end_verse()
+        return block
+
+
+class WordStore:
+    """Per-surah word columns, loaded from quran_words and topped up from upstream responses"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._surahs = {}
+
+    def _ensure_loaded(self):
+        if self._version == self._store.version:
+            return
+        with self._lock:
+            if self._version == self._store.version:
+                return
+            surahs = {}
+            try:
+                query = db.session.query(
+                    QuranWord.verse_id, QuranWord.position, QuranWord.text_uthmani,
+                    QuranWord.transliteration, QuranWord.translation
+                ).order_by(QuranWord.verse_id, QuranWord.position)
+
+                block, current_verse = None, None
+                for verse_id, position, text, transliteration, translation in query.yield_per(5000):
+                    if verse_id != current_verse:
+                        surah_id, ayah_number = verse_at(verse_id - 1)
+                        if block is None or block.surah_id != surah_id:
+                            block = surahs[surah_id] = SurahWords(surah_id)
+                        # Close out this ayah's predecessors, including any without words
+                        while len(block.verse_starts) < ayah_number:
+                            block.end_verse()
+                        current_verse = verse_id
+                    block.append_word(position, text, transliteration, translation)
+                for block in surahs.values():
+                    block.end_verse()
+            except SQLAlchemyError as e:
+                print(f"Word store unavailable: {e}")
+                db.session.rollback()
+                surahs = {}
+
+            # Keep surahs harvested from upstream that the database does not have in full
+            for surah_id, block in self._surahs.items():
+                if surah_id not in surahs or not surahs[surah_id].is_complete:
+                    surahs[surah_id] = block
+            self._surahs = {surah_id: block for surah_id, block in surahs.items() if block.is_complete}
+            self._version = self._store.version
+
+    def get(self, surah_id):
+        self._ensure_loaded()
+        return self._surahs.get(surah_id)
+
+    def add_from_verses(self, surah_id, verses):
+        """Keep the word data of a complete surah fetched from Quran.com"""
+        block = SurahWords.from_verses(surah_id, verses)
+        if block.is_complete:
+            with self._lock:
+                self._surahs[surah_id] = block
+        return block
+
+
+word_store = WordStore(quran_store)
@@ -0,0 +1,70 @@
+import pytest
+
+import routes.quran as quran_routes
+from services.audio_cache import AudioFileCache
+from services.upstream import upstream
+
+
+class FakeDownload:
+    def __init__(self, body):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        yield self.body
+
+
+@pytest.fixture
+def mirror(monkeypatch):
+    monkeypatch.setattr(upstream, 'get', lambda url, **kwargs: FakeDownload(b'x' * 10))
+
+
+def fill(cache, name):
+    """Run the background download inline"""
+    cache._fill(name, [f'https://mirror.example/{name}'])
+
+
+def test_miss_returns_none_and_fills_in_background(tmp_path, mirror):
+    cache = AudioFileCache(str(tmp_path), max_bytes=100)
+    assert cache.acquire('7/001.mp3') is None
+    cache.prefetch('7/001.mp3', ['https://mirror.example/7/001.mp3'])
+    cache._downloads.shutdown(wait=True)
+    path = cache.acquire('7/001.mp3')
+    assert open(path, 'rb').read() == b'x' * 10
+    cache.release('7/001.mp3')
+
+
+def test_pinned_file_survives_eviction_until_released(tmp_path, mirror):
+    cache = AudioFileCache(str(tmp_path), max_bytes=15)
+    fill(cache, 'a.mp3')
+    path = cache.acquire('a.mp3')
+    fill(cache, 'b.mp3')
+    assert (tmp_path / 'a.mp3').exists()
+    cache.release('a.mp3')
+    assert not (tmp_path / 'a.mp3').exists()
+    assert (tmp_path / 'b.mp3').exists()
+    assert path.endswith('a.mp3')
+
+
+def test_stream_redirects_to_mirror_on_miss(client, app, tmp_path, mirror, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUDIO_PROXY_ENABLED', True)
+    monkeypatch.setattr(quran_routes, '_audio_cache', AudioFileCache(str(tmp_path), max_bytes=100))
+    monkeypatch.setattr(quran_routes.audio_monitor, 'ensure_started', lambda: None)
+
+    response = client.get('/api/quran/chapter/1/audio/stream?reciter_id=7')
+    assert response.status_code == 302
+    assert response.location.startswith('http')
+
+    quran_routes._audio_cache._downloads.shutdown(wait=True)
+    response = client.get('/api/quran/chapter/1/audio/stream?reciter_id=7')
+    assert response.status_code == 200
+    assert response.data == b'x' * 10
+    assert quran_routes._audio_cache.stats()['serving'] == 0
@@ -0,0 +1,86 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from models import db, Bookmark, User
+
+
+@pytest.fixture
+def auth(app):
+    user = User(username='reader', email='reader@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    yield {'Authorization': f"Bearer {create_access_token(identity='reader')}"}
+    Bookmark.query.filter_by(user_id=user.id).delete()
+    db.session.delete(user)
+    db.session.commit()
+
+
+def sync(client, auth, body):
+    return client.post('/api/quran/bookmarks/sync', json=body, headers=auth)
+
+
+def test_sync_creates_then_skips_an_older_change(client, auth):
+    response = sync(client, auth, {'bookmarks': [{'surah': 2, 'ayah': 255, 'note': 'new', 'updated_at': '2026-01-02T10:00:00'}]})
+    assert response.status_code == 200
+    assert response.json['created'] == 1
+
+    response = sync(client, auth, {'bookmarks': [{'surah': 2, 'ayah': 255, 'note': 'old', 'updated_at': '2026-01-01T10:00:00'}]})
+    assert response.json['skipped'] == 1
+    assert Bookmark.query.filter_by(content_id='2:255').one().notes == 'new'
+
+
+@pytest.mark.parametrize('item', [None, '1:1', 7, ['1', '1']])
+def test_sync_rejects_non_object_items_by_index(client, auth, item):
+    response = sync(client, auth, {'bookmarks': [{'surah': 1, 'ayah': 1}, item]})
+    assert response.status_code == 400
+    assert response.json['error'] == 'bookmarks[1] must be an object'
+
+
+@pytest.mark.parametrize('body', [['1:1'], 'bookmarks', {'bookmarks': {'surah': 1}}])
+def test_sync_rejects_malformed_bodies(client, auth, body):
+    assert sync(client, auth, body).status_code == 400
+
+
+def test_sync_reports_invalid_verses_without_failing_the_batch(client, auth):
+    response = sync(client, auth, {'bookmarks': [
+        {'surah': 1, 'ayah': 8}, {'surah': 'x', 'ayah': 1}, {'surah': 1, 'ayah': 1, 'updated_at': 'yesterday'},
+        {'surah': 1, 'ayah': 2}
+    ]})
+    assert response.status_code == 200
+    assert response.json['rejected'] == [0, 1, 2]
+    assert response.json['created'] == 1
+
+
+def test_add_bookmark_rejects_non_object_body(client, auth):
+    response = client.post('/api/quran/bookmark', json=['1:1'], headers=auth)
+    assert response.status_code == 400
+
+
+def test_listing_pages_by_cursor(client, auth):
+    sync(client, auth, {'bookmarks': [{'surah': 1, 'ayah': ayah} for ayah in (1, 2, 3)]})
+    verses, cursor = [], None
+    while True:
+        response = client.get('/api/quran/bookmarks?limit=2' + (f'&cursor={cursor}' if cursor else ''), headers=auth)
+        assert response.status_code == 200
+        verses += [bookmark['ayah'] for bookmark in response.json['bookmarks']]
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+    assert verses == [1, 2, 3]
+
+
+def test_listing_since_includes_deletions(client, auth):
+    sync(client, auth, {'bookmarks': [{'surah': 1, 'ayah': 1}, {'surah': 1, 'ayah': 2}]})
+    since = client.get('/api/quran/bookmarks', headers=auth).json['server_time']
+    assert client.delete('/api/quran/bookmark/1/2', headers=auth).status_code == 200
+
+    assert [bookmark['ayah'] for bookmark in client.get('/api/quran/bookmarks', headers=auth).json['bookmarks']] == [1]
+    delta = client.get(f'/api/quran/bookmarks?since={since}', headers=auth).json['bookmarks']
+    assert [(bookmark['ayah'], bookmark['deleted']) for bookmark in delta] == [(2, True)]
+
+
+@pytest.mark.parametrize('query', ['limit=ten', 'cursor=abc', 'since=yesterday'])
+def test_listing_rejects_bad_parameters(client, auth, query):
+    response = client.get(f'/api/quran/bookmarks?{query}', headers=auth)
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid limit, cursor or since parameter'
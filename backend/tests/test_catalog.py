@@ -0,0 +1,45 @@
+import threading
+
+from flask import Flask
+
+from services.catalog import CatalogBundle
+
+app = Flask(__name__)
+
+
+def test_slow_build_does_not_block_other_catalogs():
+    bundle = CatalogBundle()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return {'slow': True}
+
+    bundle.register('slow', slow)
+    bundle.register('fast', lambda: {'fast': True}, eager=True)
+
+    worker = threading.Thread(target=bundle.get, args=('slow',))
+    worker.start()
+    try:
+        assert started.wait(5)
+        # Cached and uncached catalogs alike answer while 'slow' is still building
+        assert bundle.get('fast') is not None
+        bundle.register('other', lambda: {'other': True})
+        assert bundle.get('other') is not None
+    finally:
+        release.set()
+        worker.join()
+    assert bundle.get('slow') is not None
+
+
+def test_catalog_rebuilds_when_version_changes():
+    bundle = CatalogBundle()
+    state = {'version': 1}
+    bundle.register('numbers', lambda: {'version': state['version']}, version=lambda: state['version'])
+    first = bundle.get('numbers')
+    assert bundle.get('numbers') is first
+    state['version'] = 2
+    assert bundle.get('numbers').etag != first.etag
+    with app.test_request_context('/', headers={'If-None-Match': f'"{bundle.get("numbers").etag}"'}):
+        assert bundle.respond('numbers').status_code == 304
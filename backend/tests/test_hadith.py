@@ -0,0 +1,192 @@
+import pytest
+import requests
+
+from models import db, DataVersion, HadithBook, HadithRecord, HadithRelated
+from services.data_versions import bump_version
+from services.hadith_store import FTS_TABLE, book_listings, hadith_store
+from services.upstream import upstream
+
+
+def add_hadith(collection, hadith_number, **fields):
+    hadith = HadithRecord(
+        collection=collection, hadith_number=str(hadith_number), ordinal=fields.pop('ordinal', hadith_number),
+        book_number=fields.pop('book_number', 1), english=fields.pop('english', f'Hadith {hadith_number}'), **fields
+    )
+    db.session.add(hadith)
+    db.session.commit()
+    return hadith
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def unreachable(url, **kwargs):
+        raise requests.exceptions.ConnectionError('offline')
+    monkeypatch.setattr(upstream, 'get', unreachable)
+
+
+@pytest.fixture(autouse=True)
+def clean_hadith(app):
+    yield
+    HadithRecord.query.delete()
+    HadithRelated.query.delete()
+    HadithBook.query.delete()
+    DataVersion.query.delete()
+    if hadith_store.fts_enabled:
+        db.session.execute(db.text(f'DELETE FROM {FTS_TABLE}'))
+    db.session.commit()
+    hadith_store.invalidate()
+    book_listings.invalidate()
+
+
+def test_hadith_by_local_id(client, offline):
+    hadith = add_hadith('bukhari', 1, english='Actions are by intentions')
+    response = client.get(f'/api/hadith/hadith/{hadith.id}')
+    assert response.status_code == 200
+    assert response.json['hadith']['english'] == 'Actions are by intentions'
+    assert response.json['hadith']['id'] == str(hadith.id)
+
+
+def test_unknown_hadith_is_404_when_upstream_unreachable(client, offline):
+    response = client.get('/api/hadith/hadith/999999')
+    assert response.status_code == 404
+    assert response.json['success'] is False
+
+
+def sunnah_record(number, book_number, chapter, body):
+    """A hadith as sunnah.com v1 sends it"""
+    return {
+        'collection': 'bukhari',
+        'bookNumber': str(book_number),
+        'chapterId': f'{book_number}.00',
+        'hadithNumber': str(number),
+        'hadith': [
+            {'lang': 'en', 'chapterNumber': '1', 'chapterTitle': chapter,
+             'body': f'<p>Narrated Abu Hurairah: {body}</p>', 'grades': []},
+            {'lang': 'ar', 'chapterNumber': '1', 'chapterTitle': '',
+             'body': '<p>حدثنا</p>', 'grades': []},
+        ]
+    }
+
+
+def test_related_hadith_for_sunnah_records(app):
+    from services.hadith_related import build_related_index, related_hadith
+    from services.hadith_store import import_collection, normalize_hadith
+
+    records = [
+        sunnah_record(1, 1, 'How the Divine Revelation started', 'Actions are by intentions.'),
+        sunnah_record(2, 1, 'How the Divine Revelation started', 'The revelation came like the bright daylight.'),
+        sunnah_record(3, 1, 'Reading the Quran', 'Read in the name of your Lord.'),
+        sunnah_record(4, 2, 'Belief', 'Faith has over sixty branches.'),
+    ]
+    fields = normalize_hadith(records[0], 'bukhari', {1: 'Revelation'})
+    assert fields['topics'] == [] and fields['refs'] == ['Sahih al-Bukhari 1']
+
+    import_collection('bukhari', records, {1: 'Revelation', 2: 'Belief'})
+    build_related_index(log=lambda message: None)
+    ids = {hadith.hadith_number: hadith.id for hadith in HadithRecord.query.filter_by(collection='bukhari')}
+
+    related = related_hadith(ids['1'])
+    assert [(hadith['hadith_number'], hadith['relation']) for hadith in related] == [('2', 'chapter'), ('3', 'book')]
+    assert all(hadith['id'] != str(ids['1']) for hadith in related)
+    # Alone in its book and chapter, with nothing else to go on
+    assert related_hadith(ids['4']) is None
+
+
+def test_books_listed_from_imported_hadith_when_upstream_unreachable(client, offline):
+    add_hadith('muslim', 1, book_number=1, book='The Book of Faith')
+    add_hadith('muslim', 2, book_number=1, book='The Book of Faith')
+    add_hadith('muslim', 3, book_number=2)
+
+    response = client.get('/api/hadith/collections/muslim/books')
+    assert response.status_code == 200
+    assert 'fallback' not in response.json
+    assert [(book['number'], book['name'], book['hadith_start'], book['hadith_end'], book['total_hadith'])
+            for book in response.json['books']] == [(1, 'The Book of Faith', 1, 2, 2), (2, 'Book 2', 3, 3, 1)]
+
+
+def test_sample_books_only_without_local_data(client, offline):
+    response = client.get('/api/hadith/collections/nasai/books')
+    assert response.status_code == 200
+    assert response.json['fallback'] is True
+
+
+def test_book_listing_follows_imports_from_other_processes(client, offline, monkeypatch):
+    monkeypatch.setattr(book_listings._imports, 'interval', 0)
+    add_hadith('malik', 1, book_number=1)
+    assert len(client.get('/api/hadith/collections/malik/books').json['books']) == 1
+
+    # Another process imports a second book and bumps the shared version
+    add_hadith('malik', 2, book_number=2)
+    bump_version('hadith')
+    assert len(client.get('/api/hadith/collections/malik/books').json['books']) == 2
+
+
+def numbered(*numbers, book_number=1):
+    return [{'hadith_number': str(number), 'book_number': book_number, 'english': f'Hadith {number}'} for number in numbers]
+
+
+def page_through(client, collection, limit):
+    numbers, cursor = [], None
+    while True:
+        url = f'/api/hadith/collections/{collection}/hadith?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        numbers += [hadith['hadith_number'] for hadith in response.json['hadith']]
+        cursor = response.json['pagination']['next_cursor']
+        if not cursor:
+            return numbers
+
+
+def test_reimport_renumbers_ordinals_and_drops_missing_hadith(client):
+    from services.hadith_store import import_collection
+
+    import_collection('abudawud', numbered(1, 2, 3, 4, 5))
+    ids = {hadith.hadith_number: hadith.id for hadith in HadithRecord.query.filter_by(collection='abudawud')}
+    import_collection('abudawud', numbered(5, 3, 1))
+    hadith_store.invalidate()
+
+    rows = HadithRecord.query.filter_by(collection='abudawud').order_by(HadithRecord.ordinal).all()
+    assert [(row.hadith_number, row.ordinal) for row in rows] == [('5', 1), ('3', 2), ('1', 3)]
+    # Kept hadith keep their ids
+    assert rows[0].id == ids['5']
+    assert page_through(client, 'abudawud', 2) == ['5', '3', '1']
+
+
+def test_cursor_pages_cover_every_hadith_once(client):
+    from services.hadith_store import import_collection
+
+    import_collection('ibnmajah', numbered(*range(1, 8), book_number=1) + numbered(*range(8, 12), book_number=2))
+    import_collection('ibnmajah', numbered(*range(1, 6), book_number=1) + numbered(*range(8, 13), book_number=2))
+    hadith_store.invalidate()
+    expected = [str(number) for number in list(range(1, 6)) + list(range(8, 13))]
+    for limit in (1, 3, 4, 50):
+        assert page_through(client, 'ibnmajah', limit) == expected
+
+
+def test_bad_cursor_is_400(client):
+    add_hadith('darimi', 1)
+    hadith_store.invalidate()
+    response = client.get('/api/hadith/collections/darimi/hadith?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+@pytest.mark.parametrize('cursor', ['WzFd', 'eyJhIjoxfQ', 'WyJ4IiwxXQ', 'W251bGwsMV0'])
+def test_cursor_that_was_not_issued_is_400(client, cursor):
+    # [1], {"a":1}, ["x",1] and [null,1]: valid base64 and JSON, but not a position
+    add_hadith('darimi', 1)
+    hadith_store.invalidate()
+    response = client.get(f'/api/hadith/collections/darimi/hadith?cursor={cursor}')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid cursor'
+
+
+def test_cursor_pages_leave_out_the_page_number(client):
+    for number in (1, 2, 3):
+        add_hadith('darimi', number)
+    hadith_store.invalidate()
+    first = client.get('/api/hadith/collections/darimi/hadith?limit=2').json['pagination']
+    assert first['current_page'] == 1
+    second = client.get(f"/api/hadith/collections/darimi/hadith?limit=2&cursor={first['next_cursor']}").json
+    assert [hadith['hadith_number'] for hadith in second['hadith']] == ['3']
+    assert 'current_page' not in second['pagination'] and second['pagination']['next_cursor'] is None
@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from routes.prayer import timetable_range
+
+
+@pytest.mark.parametrize('args, expected', [
+    ({'year': '2026'}, (date(2026, 1, 1), date(2026, 12, 31), '2026')),
+    ({'year': '2024', 'month': '2'}, (date(2024, 2, 1), date(2024, 2, 29), '2024-02')),
+    ({'year': '2026', 'month': '12'}, (date(2026, 12, 1), date(2026, 12, 31), '2026-12')),
+    ({'from': '2026-03-01', 'to': '2026-03-03'}, (date(2026, 3, 1), date(2026, 3, 3), '2026-03-01_2026-03-03')),
+    ({}, (date(date.today().year, 1, 1), date(date.today().year, 12, 31), str(date.today().year))),
+])
+def test_timetable_range(args, expected):
+    assert timetable_range(MultiDict(args)) == expected
+
+
+@pytest.mark.parametrize('args, message', [
+    ({'year': 'abc'}, 'year must be a whole number'),
+    ({'year': '2026.5'}, 'year must be a whole number'),
+    ({'year': '0'}, 'year must be between 1 and 9998'),
+    ({'year': '2026', 'month': 'abc'}, 'month must be a whole number'),
+    ({'year': '2026', 'month': '13'}, 'month must be between 1 and 12'),
+    ({'from': '2026-03-01'}, 'from and to must both be dates in YYYY-MM-DD format'),
+    ({'from': '2026-03-05', 'to': '2026-03-01'}, 'to must be on or after from and at most 366 days later'),
+    ({'from': '2026-01-01', 'to': '2027-01-02'}, 'to must be on or after from and at most 366 days later'),
+])
+def test_invalid_timetable_range(args, message):
+    with pytest.raises(ValueError) as error:
+        timetable_range(MultiDict(args))
+    assert str(error.value) == message
+
+
+def test_timetable_rejects_bad_year_instead_of_using_this_year(client):
+    response = client.get('/api/prayer/timetable/Delhi?year=abc')
+    assert response.status_code == 400
+    assert response.json['error'] == 'year must be a whole number'
+
+
+def test_monthly_csv_timetable(client):
+    response = client.get('/api/prayer/timetable/Delhi,Mumbai?year=2026&month=2&format=csv')
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'city,date,fajr,sunrise,dhuhr,asr,maghrib,isha'
+    assert len(lines) == 1 + 2 * 28
+    assert lines[1].startswith('Delhi,2026-02-01,')
+
+
+@pytest.mark.parametrize('query, message', [
+    ('method=nope', 'method must be one of: '),
+    ('asr=nope', 'asr must be one of: '),
+    ('format=pdf', 'format must be one of: '),
+    ('year=2026&month=0', 'month must be between 1 and 12'),
+    ('from=2026-03-05&to=2026-03-01', 'to must be on or after from and at most 366 days later'),
+])
+def test_timetable_rejects_bad_parameters(client, query, message):
+    response = client.get(f'/api/prayer/timetable/Delhi?{query}')
+    assert response.status_code == 400
+    assert response.json['error'].startswith(message)
+
+
+def test_date_range_timetable(client):
+    response = client.get('/api/prayer/timetable/Delhi?from=2026-03-01&to=2026-03-03&format=csv')
+    assert response.status_code == 200
+    assert [line.split(',')[1] for line in response.get_data(as_text=True).splitlines()[1:]] == [
+        '2026-03-01', '2026-03-02', '2026-03-03'
+    ]
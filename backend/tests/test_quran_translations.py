@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app  # noqa: E402
+from routes.quran import requested_translations  # noqa: E402
+
+
+def test_malformed_token_falls_back_to_default_translation():
+    with app.test_request_context('/api/quran/verses/1', headers={'Authorization': 'Bearer garbage'}):
+        assert requested_translations() is None
+
+
+def test_expired_token_falls_back_to_default_translation():
+    with app.app_context():
+        token = create_access_token(identity='user1', expires_delta=timedelta(seconds=-1))
+    with app.test_request_context('/api/quran/verses/1', headers={'Authorization': f'Bearer {token}'}):
+        assert requested_translations() is None
+
+
+def test_explicit_translations_ignore_token():
+    with app.test_request_context('/api/quran/verses/1?translations=20,131', headers={'Authorization': 'Bearer garbage'}):
+        assert requested_translations() == [20, 131]
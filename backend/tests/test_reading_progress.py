@@ -0,0 +1,71 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from models import db, ReadingProgress, User
+from routes.quran import parse_progress_range
+from services.quran_index import division_range, verse_offset
+
+
+@pytest.mark.parametrize('item, expected', [
+    ({'from': '2:1', 'to': '2:5'}, (verse_offset(2, 1), verse_offset(2, 5) + 1)),
+    ({'from': [2, 1], 'to': '2:5'}, (verse_offset(2, 1), verse_offset(2, 5) + 1)),
+    ({'from': '1:7'}, (verse_offset(1, 7), verse_offset(1, 7) + 1)),
+    (['2:1', [2, 5]], (verse_offset(2, 1), verse_offset(2, 5) + 1)),
+    ([2, 255], (verse_offset(2, 255), verse_offset(2, 255) + 1)),
+    ({'surah': 1}, (0, 7)),
+    ({'surah': '114'}, (verse_offset(114, 1), verse_offset(114, 6) + 1)),
+    ({'para': 30}, division_range('juz', 30)),
+    ({'rub': 240}, division_range('rub', 240)),
+])
+def test_valid_ranges(item, expected):
+    assert parse_progress_range(item) == expected
+
+
+@pytest.mark.parametrize('item, message', [
+    ('1:1', 'must be an object, a [surah, ayah] verse or a [from, to] pair of verses'),
+    (None, 'must be an object, a [surah, ayah] verse or a [from, to] pair of verses'),
+    ([1, 2, 3], 'must be an object, a [surah, ayah] verse or a [from, to] pair of verses'),
+    ({'from': '2'}, 'from and to must be verses such as "2:255" or [2, 255]'),
+    ({'from': '1:8'}, 'from and to must be verses such as "2:255" or [2, 255]'),
+    ({'from': '0:1'}, 'from and to must be verses such as "2:255" or [2, 255]'),
+    ({'from': '1:1:1'}, 'from and to must be verses such as "2:255" or [2, 255]'),
+    ({'from': [True, 1]}, 'from and to must be verses such as "2:255" or [2, 255]'),
+    ({'from': '2:5', 'to': '2:1'}, 'ends before it starts'),
+    ({'surah': 115}, 'surah must be a number between 1 and 114'),
+    ({'surah': 'abc'}, 'surah must be a number between 1 and 114'),
+    ({'para': 0}, 'para must be a number between 1 and 30'),
+    ({'hizb': 61}, 'hizb must be a number between 1 and 60'),
+    ({}, 'needs from/to, surah, para, hizb or rub'),
+])
+def test_invalid_ranges_have_fixed_messages(item, message):
+    with pytest.raises(ValueError) as error:
+        parse_progress_range(item)
+    assert str(error.value) == message
+
+
+@pytest.fixture
+def auth(app):
+    user = User(username='progress', email='progress@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    yield {'Authorization': f"Bearer {create_access_token(identity='progress')}"}
+    ReadingProgress.query.filter_by(user_id=user.id).delete()
+    db.session.delete(user)
+    db.session.commit()
+
+
+def test_progress_update_names_the_bad_range(client, auth):
+    response = client.post('/api/quran/progress', json={'ranges': [{'surah': 1}, '1:1']}, headers=auth)
+    assert response.status_code == 400
+    assert response.json['error'] == 'ranges[1] must be an object, a [surah, ayah] verse or a [from, to] pair of verses'
+
+
+def test_progress_update_marks_verses(client, auth):
+    response = client.post('/api/quran/progress', json={'ranges': [{'surah': 1}, [2, 255]]}, headers=auth)
+    assert response.status_code == 200
+    assert response.json['verses_read'] == 8
+
+
+def test_progress_update_rejects_a_list_body(client, auth):
+    response = client.post('/api/quran/progress', json=[{'surah': 1}], headers=auth)
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from models import db
+from services import schema
+
+SCRATCH_INDEX = (
+    'uq_scratch_rows_name', 'scratch_rows', ('name',), True,
+    'DELETE FROM scratch_rows WHERE id NOT IN (SELECT MAX(id) FROM scratch_rows GROUP BY name)'
+)
+
+
+@pytest.fixture
+def scratch(app, monkeypatch):
+    monkeypatch.setattr(schema, 'ADDED_INDEXES', [SCRATCH_INDEX])
+    with db.engine.begin() as connection:
+        connection.execute(text('CREATE TABLE scratch_rows (id INTEGER PRIMARY KEY, name TEXT NOT NULL)'))
+        connection.execute(text("INSERT INTO scratch_rows (name) VALUES ('a'), ('a'), ('b')"))
+    yield
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE scratch_rows'))
+
+
+def scratch_state():
+    with db.engine.connect() as connection:
+        rows = connection.execute(text('SELECT id, name FROM scratch_rows ORDER BY id')).all()
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('scratch_rows')}
+    return [tuple(row) for row in rows], indexes
+
+
+def test_startup_upgrade_leaves_conflicting_rows_alone(scratch):
+    logs = []
+    assert schema.upgrade_schema(log=logs.append) == []
+    rows, indexes = scratch_state()
+    assert rows == [(1, 'a'), (2, 'a'), (3, 'b')]
+    assert 'uq_scratch_rows_name' not in indexes
+    assert any('flask upgrade-db' in line for line in logs)
+
+
+def test_upgrade_command_cleans_up_before_adding_the_index(scratch):
+    assert schema.upgrade_schema(log=lambda line: None, cleanup=True) == ['uq_scratch_rows_name']
+    rows, indexes = scratch_state()
+    assert rows == [(2, 'a'), (3, 'b')]
+    assert 'uq_scratch_rows_name' in indexes
+
+
+def test_startup_upgrade_adds_the_index_when_rows_do_not_conflict(scratch):
+    with db.engine.begin() as connection:
+        connection.execute(text('DELETE FROM scratch_rows WHERE id = 1'))
+    assert schema.upgrade_schema(log=lambda line: None) == ['uq_scratch_rows_name']
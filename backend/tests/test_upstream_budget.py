@@ -0,0 +1,38 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.upstream import BudgetExceededError, UpstreamClient  # noqa: E402
+
+app = Flask(__name__)
+
+
+def test_pool_thread_timeout_is_capped_by_request_budget():
+    client = UpstreamClient(request_budget=2)
+    with ThreadPoolExecutor(max_workers=1) as pool, app.test_request_context('/'):
+        timeout = pool.submit(client.with_budget(client._budgeted_timeout), 10).result()
+    assert 0 < timeout <= 2
+
+
+def test_pool_thread_shares_spent_budget():
+    client = UpstreamClient(request_budget=0)
+    with ThreadPoolExecutor(max_workers=1) as pool, app.test_request_context('/'):
+        future = pool.submit(client.with_budget(client._budgeted_timeout), 10)
+        with pytest.raises(BudgetExceededError):
+            future.result()
+
+
+def test_deadline_does_not_outlive_the_wrapped_call():
+    client = UpstreamClient(request_budget=2)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(client.with_budget(client._budgeted_timeout), 10).result() == 10
+        with app.test_request_context('/'):
+            budgeted = client.with_budget(client._budgeted_timeout)
+        assert pool.submit(budgeted, 10).result() <= 2
+        # The same pool thread, running unrelated work afterwards, is unbudgeted again
+        assert pool.submit(client._budgeted_timeout, 10).result() == 10
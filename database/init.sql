@@ -25,7 +25,8 @@ CREATE TABLE IF NOT EXISTS prayer_times (
     sunrise VARCHAR(8) NOT NULL,
     date DATE DEFAULT CURRENT_DATE,
     method VARCHAR(20) DEFAULT 'ISNA',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_prayer_times_city_date_method UNIQUE (city, date, method)
 );
 
 -- Ramadan arrangements table
@@ -50,21 +51,47 @@ CREATE TABLE IF NOT EXISTS quran_surahs (
     number INTEGER PRIMARY KEY,
     name VARCHAR(50) NOT NULL,
     english_name VARCHAR(100) NOT NULL,
+    translated_name VARCHAR(100),
     number_of_ayahs INTEGER NOT NULL,
     revelation_type VARCHAR(20) CHECK (revelation_type IN ('Meccan', 'Medinan')),
+    revelation_order INTEGER,
     para INTEGER NOT NULL
 );
 
 -- Quran ayahs table
 CREATE TABLE IF NOT EXISTS quran_ayahs (
-    id SERIAL PRIMARY KEY,
+    id INTEGER PRIMARY KEY,
     surah_number INTEGER REFERENCES quran_surahs(number),
     ayah_number INTEGER NOT NULL,
+    verse_key VARCHAR(10) NOT NULL,
     arabic_text TEXT NOT NULL,
     translation TEXT NOT NULL,
     transliteration TEXT,
     para INTEGER NOT NULL,
-    audio_url VARCHAR(255)
+    rub_el_hizb INTEGER,
+    page INTEGER,
+    audio_url VARCHAR(255),
+    CONSTRAINT uq_quran_ayahs_surah_ayah UNIQUE (surah_number, ayah_number)
+);
+
+-- Quran word-by-word table
+CREATE TABLE IF NOT EXISTS quran_words (
+    id SERIAL PRIMARY KEY,
+    verse_id INTEGER NOT NULL REFERENCES quran_ayahs(id),
+    position INTEGER NOT NULL,
+    text_uthmani VARCHAR(100) NOT NULL,
+    transliteration VARCHAR(100),
+    translation VARCHAR(255),
+    CONSTRAINT uq_quran_words_verse_position UNIQUE (verse_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_quran_words_verse_id ON quran_words (verse_id);
+
+-- Reading progress: one bit per ayah (6236 bits) per user
+CREATE TABLE IF NOT EXISTS reading_progress (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id),
+    bitmap BYTEA NOT NULL,
+    verses_read INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Imam voices table
@@ -75,6 +102,52 @@ CREATE TABLE IF NOT EXISTS imams (
     audio_path VARCHAR(255) NOT NULL
 );
 
+-- Hadith corpus (imported with `flask --app app import-hadith`)
+CREATE TABLE IF NOT EXISTS hadiths (
+    id SERIAL PRIMARY KEY,
+    collection VARCHAR(20) NOT NULL,
+    book_number INTEGER NOT NULL DEFAULT 0,
+    book VARCHAR(200),
+    chapter VARCHAR(500),
+    hadith_number VARCHAR(20) NOT NULL,
+    ordinal INTEGER NOT NULL,
+    arabic TEXT,
+    english TEXT,
+    narrator VARCHAR(200),
+    grades JSON,
+    topics JSON,
+    refs JSON,
+    CONSTRAINT uq_hadiths_collection_number UNIQUE (collection, hadith_number),
+    CONSTRAINT uq_hadiths_collection_ordinal UNIQUE (collection, ordinal)
+);
+CREATE INDEX IF NOT EXISTS ix_hadiths_collection_book ON hadiths (collection, book_number, ordinal);
+
+-- Related hadith: 7-byte (hadith_id, score, relation) records, rebuilt on import
+CREATE TABLE IF NOT EXISTS hadith_related (
+    hadith_id INTEGER PRIMARY KEY REFERENCES hadiths(id),
+    neighbours BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS hadith_books (
+    id SERIAL PRIMARY KEY,
+    collection VARCHAR(20) NOT NULL,
+    book_number INTEGER NOT NULL,
+    source_id VARCHAR(20),
+    name VARCHAR(200),
+    arabic_name VARCHAR(200),
+    hadith_start INTEGER,
+    hadith_end INTEGER,
+    total_hadith INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_hadith_books_collection_number UNIQUE (collection, book_number)
+);
+
 -- Bookmarks table
 CREATE TABLE IF NOT EXISTS bookmarks (
     id SERIAL PRIMARY KEY,
@@ -82,9 +155,16 @@ CREATE TABLE IF NOT EXISTS bookmarks (
     content_type VARCHAR(20) NOT NULL,
     content_id VARCHAR(50) NOT NULL,
     notes TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_bookmarks_user_content UNIQUE (user_id, content_type, content_id)
 );
 
+CREATE INDEX IF NOT EXISTS ix_bookmarks_user_type ON bookmarks (user_id, content_type, id);
+CREATE INDEX IF NOT EXISTS ix_bookmarks_user_updated ON bookmarks (user_id, updated_at);
+
 -- User preferences table
 CREATE TABLE IF NOT EXISTS user_preferences (
     id SERIAL PRIMARY KEY,
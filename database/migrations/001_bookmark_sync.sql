@@ -0,0 +1,18 @@
+-- Bookmark sync columns and indexes for databases created before them.
+-- `flask upgrade-db` applies the same changes (services/schema.py).
+
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS deleted BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS changed_at TIMESTAMP;
+UPDATE bookmarks SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL;
+UPDATE bookmarks SET changed_at = COALESCE(updated_at, created_at, CURRENT_TIMESTAMP) WHERE changed_at IS NULL;
+ALTER TABLE bookmarks ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE bookmarks ALTER COLUMN changed_at SET DEFAULT CURRENT_TIMESTAMP;
+
+-- Keep the newest of any duplicate bookmarks before enforcing uniqueness
+DELETE FROM bookmarks WHERE id NOT IN (
+    SELECT MAX(id) FROM bookmarks GROUP BY user_id, content_type, content_id
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bookmarks_user_content ON bookmarks (user_id, content_type, content_id);
+CREATE INDEX IF NOT EXISTS ix_bookmarks_user_type ON bookmarks (user_id, content_type, id);
+CREATE INDEX IF NOT EXISTS ix_bookmarks_user_updated ON bookmarks (user_id, updated_at);
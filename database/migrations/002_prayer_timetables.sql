@@ -0,0 +1,9 @@
+-- Unique (city, date, method) index behind stored prayer timetables, for
+-- databases created before it. `flask upgrade-db` applies the same change
+-- (services/schema.py).
+
+-- Keep the newest of any duplicate rows before enforcing uniqueness
+DELETE FROM prayer_times WHERE id NOT IN (
+    SELECT MAX(id) FROM prayer_times GROUP BY city, date, method
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_prayer_times_city_date_method ON prayer_times (city, date, method);
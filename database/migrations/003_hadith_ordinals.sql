@@ -0,0 +1,9 @@
+-- Unique (collection, ordinal) index behind hadith cursor paging, for
+-- databases created before it. `flask upgrade-db` applies the same change
+-- (services/schema.py).
+
+-- Re-imports used to leave ordinals from the previous import behind; renumber in order
+UPDATE hadiths SET ordinal = ranked.position
+FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY collection ORDER BY ordinal, id) AS position FROM hadiths) ranked
+WHERE ranked.id = hadiths.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_hadiths_collection_ordinal ON hadiths (collection, ordinal);